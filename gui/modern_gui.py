@@ -1081,6 +1081,13 @@ class ModernProxyGUI:
     
     def check_url_security(self, url):
         """Check URL security using the middleware"""
+        # Prefer the binary daemon (url_checker.py --serve-binary) when it is running
+        result = self.check_url_security_binary(url)
+        if result is None:
+            # Then the REST API (main.py), if it is running
+            result = self.check_url_security_api(url)
+        if result is not None:
+            return result
         try:
             import subprocess
             import json
@@ -1128,6 +1135,57 @@ class ModernProxyGUI:
                 'explanation': f'Error: {str(e)}'
             }
     
+    def import_middleware(self, module_name):
+        """Import a module from ../url-security-middleware"""
+        import sys
+        import importlib
+        middleware_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "url-security-middleware")
+        if middleware_dir not in sys.path:
+            sys.path.append(middleware_dir)
+        return importlib.import_module(module_name)
+    
+    def check_url_security_api(self, url):
+        """Check URL security through the REST API client; None if the API is not reachable"""
+        try:
+            if getattr(self, 'api_client', None) is None:
+                url_client = self.import_middleware("url_client")
+                self.api_client = url_client.URLCheckerClient(timeout=5.0)
+            verdict = self.api_client.check(url)
+        except Exception:
+            return None
+        reasons = verdict.get('reasons') or []
+        if verdict['status'] == 'invalid':
+            # Rejected before the model ran; the reason says why
+            return {'prediction': 'not_a_url', 'score': 1.0, 'is_safe': False, 'explanation': '; '.join(reasons)}
+        # The API reports the model class as "Predicted as PHISHING by CNN-LSTM model"
+        match = re.match(r"Predicted as (\S+) by ", reasons[0]) if reasons else None
+        return {
+            'prediction': match.group(1).lower() if match else 'unknown',
+            'score': float(verdict.get('score') or 0.0),
+            'is_safe': verdict['status'] == 'allowed',
+            'explanation': ''
+        }
+    
+    def check_url_security_binary(self, url):
+        """Check URL security over the binary protocol; None if the daemon is not available"""
+        try:
+            binary_protocol = self.import_middleware("binary_protocol")
+            if not os.path.exists(binary_protocol.DEFAULT_BINARY_SOCKET_PATH):
+                return None
+            if getattr(self, 'binary_client', None) is None:
+                self.binary_client = binary_protocol.BinaryClient()
+            verdict = self.binary_client.check(url)
+        except Exception:
+            return None
+        if verdict.get('error'):
+            return None
+        return {
+            'prediction': verdict['prediction'],
+            'score': float(verdict['score']),
+            'is_safe': verdict['result'] == 0,
+            'explanation': verdict['explanation'] or ''
+        }
+    
     def log_security_event(self, message):
         """Log a security event to the security log"""
         try:
@@ -1188,15 +1246,16 @@ class ModernProxyGUI:
             # Try to read from the proxy's security log
             log_file = "../proxy/logs/url_security.log"
             if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    recent_lines = lines[-20:]  # Last 20 lines
-                    
-                    self.log_security_event("🔄 Refreshing from security log...")
-                    for line in recent_lines:
-                        if line.strip():
-                            self.log_security_event(line.strip())
-                    self.log_security_event("")
+                # Reads only the end of the file; text and JSONL logs parse the same
+                proxy_log = self.import_middleware("proxy_log")
+                recent_entries = proxy_log.last_entries(log_file, 20)  # Last 20 checks
+
+                self.log_security_event("🔄 Refreshing from security log...")
+                for entry in recent_entries:
+                    verdict = "✅ SAFE" if entry['safe'] else "❌ MALICIOUS"
+                    self.log_security_event(f"[{entry['timestamp']}] {verdict} {entry['url']} "
+                                            f"({entry['prediction']}, {entry['score']:.3f})")
+                self.log_security_event("")
             else:
                 self.log_security_event("ℹ️ No security log file found. Start the proxy to see security events.")
                 
@@ -32,6 +32,7 @@
 #define BACKLOG 10        // Max pending connections in queue
 #define INIT_BUF 1024     // Initial buffer size for requests
 #define TIMEOUT_SEC 5     // Socket recv/send timeout in seconds
+#define VERDICT_DEADLINE_MS 2000  // Speculative mode: how long a response may wait for its verdict
 
 // Global cache and its mutex
 static optimisedcache *cache;
@@ -64,6 +65,169 @@ int connect_to_server(const char *host, int port) {
     return fd;
 }
 
+// Opt-in speculative fetching (PROXY_SPECULATIVE_FETCH=1): the upstream DNS lookup and
+// fetch run while the URL is being classified, instead of after it. The response is held
+// until the URL is allowed, and a blocked URL aborts the fetch. A URL with no verdict
+// within PROXY_VERDICT_DEADLINE_MS, or whose check failed outright, is served (fail-open,
+// the default) or refused with 503 (PROXY_VERDICT_FAIL_CLOSED=1).
+static int speculative_fetch_enabled = 0;
+static int verdict_deadline_ms = VERDICT_DEADLINE_MS;
+static int verdict_fail_closed = 0;
+
+enum { VERDICT_ALLOW, VERDICT_BLOCK, VERDICT_TIMED_OUT, VERDICT_CHECK_FAILED };
+
+// Reason shown on the block page for a verdict other than VERDICT_ALLOW
+static const char *verdict_reason(int verdict, const url_security_result_t *sec) {
+    switch (verdict) {
+    case VERDICT_BLOCK: return sec->explanation;
+    case VERDICT_TIMED_OUT: return "URL security check did not finish in time";
+    default: return "URL security check failed";
+    }
+}
+
+typedef struct {
+    pthread_t tid;
+    char host[256];
+    char path[256];
+    fetch_abort_t abort;   // Its mutex also guards finished
+    int finished;
+    char *response;
+    long double response_size;
+    long double latency;
+} speculative_fetch_t;
+
+static void speculative_fetch_free(speculative_fetch_t *f) {
+    free(f->response);
+    pthread_mutex_destroy(&f->abort.mutex);
+    free(f);
+}
+
+static void *speculative_fetch_worker(void *arg) {
+    speculative_fetch_t *f = arg;
+    FetchResServerAbortable(f->host, f->path, &f->response, &f->response_size, &f->latency, &f->abort);
+    pthread_mutex_lock(&f->abort.mutex);
+    f->finished = 1;
+    int abandoned = f->abort.aborted;
+    pthread_mutex_unlock(&f->abort.mutex);
+    if (abandoned) speculative_fetch_free(f);  // The handler has already moved on
+    return NULL;
+}
+
+// Abort a fetch the handler no longer wants: it gives up before its next step and a
+// blocked recv() returns at once. Whichever side finishes last frees it, so the handler
+// can answer its client without waiting for a DNS lookup or connect.
+static void speculative_fetch_cancel(speculative_fetch_t *f) {
+    pthread_mutex_lock(&f->abort.mutex);
+    f->abort.aborted = 1;
+    if (f->abort.fd >= 0) shutdown(f->abort.fd, SHUT_RDWR);
+    int finished = f->finished;
+    pthread_t tid = f->tid;  // Once we unlock, an unfinished worker may free f
+    pthread_mutex_unlock(&f->abort.mutex);
+    if (finished) {
+        pthread_join(tid, NULL);
+        speculative_fetch_free(f);
+    } else {
+        pthread_detach(tid);
+    }
+}
+
+// Classify url while fetching host/path upstream (host NULL: classify only). Returns a
+// VERDICT_*; on VERDICT_ALLOW the caller owns *response (NULL if the fetch failed).
+static int classify_while_fetching(const char *url, const char *host, const char *path,
+                                   url_security_result_t *sec, char **response,
+                                   long double *response_size, long double *latency) {
+    *response = NULL;
+    *response_size = 0;
+    *latency = 0;
+
+    speculative_fetch_t *f = NULL;
+    if (host) {
+        f = calloc(1, sizeof(*f));
+        if (f) {
+            snprintf(f->host, sizeof(f->host), "%s", host);
+            snprintf(f->path, sizeof(f->path), "%s", path);
+            fetch_abort_init(&f->abort);
+            if (pthread_create(&f->tid, NULL, speculative_fetch_worker, f) != 0) {
+                pthread_mutex_destroy(&f->abort.mutex);
+                free(f);
+                f = NULL;
+            }
+        }
+    }
+
+    int verdict;
+    int rc = check_url_security_timeout(url, sec, verdict_deadline_ms);
+    if (rc == URL_SECURITY_TIMED_OUT) {
+        printf("[SECURITY] No verdict for %s in %d ms, failing %s\n", url, verdict_deadline_ms,
+               verdict_fail_closed ? "closed" : "open");
+        verdict = verdict_fail_closed ? VERDICT_TIMED_OUT : VERDICT_ALLOW;
+    } else if (rc != 0) {
+        printf("[SECURITY] URL check failed for %s (%s), failing %s\n", url, sec->error,
+               verdict_fail_closed ? "closed" : "open");
+        verdict = verdict_fail_closed ? VERDICT_CHECK_FAILED : VERDICT_ALLOW;
+    } else {
+        verdict = sec->is_safe ? VERDICT_ALLOW : VERDICT_BLOCK;
+    }
+
+    if (verdict != VERDICT_ALLOW) {
+        if (f) speculative_fetch_cancel(f);
+        return verdict;
+    }
+    if (f) {
+        pthread_join(f->tid, NULL);
+        *response = f->response;
+        *response_size = f->response_size;
+        *latency = f->latency;
+        f->response = NULL;
+        speculative_fetch_free(f);
+    } else if (host) {
+        FetchResServer(host, path, response, response_size, latency);  // Could not start the thread
+    }
+    return verdict;
+}
+
+// Speculative version of the plain HTTP path: like FetchResCache, but the upstream
+// fetch of a cache miss overlaps with classification
+static int fetch_http_with_verdict(const char *req, const char *url, url_security_result_t *sec,
+                                   char **response, long double *response_size, long double *latency) {
+    char method[16], host[256] = "", path[256] = "/";
+    sscanf(req, "%15s", method);
+    const char *rest = url;
+    if (strncmp(url, "http://", 7) == 0) rest = url + 7;
+    else if (strncmp(url, "https://", 8) == 0) rest = url + 8;
+    sscanf(rest, "%255[^/]%255s", host, path);
+    if (strcmp(method, "GET") != 0) {
+        return classify_while_fetching(url, NULL, NULL, sec, response, response_size, latency);
+    }
+
+    char *cached = NULL;
+    long double cached_size = 0;
+    pthread_mutex_lock(&cache_mutex);
+    CacheEntry *e = lookupcache(cache, host, path);
+    if (e && (cached = malloc((size_t)e->response_size + 1))) {
+        memcpy(cached, e->response, (size_t)e->response_size);
+        cached[(size_t)e->response_size] = '\0';
+        cached_size = e->response_size;
+    }
+    pthread_mutex_unlock(&cache_mutex);
+
+    int verdict = classify_while_fetching(url, cached ? NULL : host, path, sec, response, response_size, latency);
+    if (verdict != VERDICT_ALLOW) {
+        free(cached);
+        return verdict;
+    }
+    if (cached) {
+        *response = cached;
+        *response_size = cached_size;
+        *latency = 0.0L;  // Cache hit has zero latency
+    } else if (*response && *response_size > 0) {
+        pthread_mutex_lock(&cache_mutex);
+        insertcache(cache, host, path, *response, *response_size, *latency);
+        pthread_mutex_unlock(&cache_mutex);
+    }
+    return verdict;
+}
+
 // Helper: Relay data between two sockets (bi-directional)
 void relay_data(int fd1, int fd2) {
     fd_set fds;
@@ -105,6 +269,14 @@ int main() {
     }
 
     setvbuf(stdout, NULL, _IONBF, 0);
+    const char *env = getenv("PROXY_SPECULATIVE_FETCH");
+    speculative_fetch_enabled = env && strcmp(env, "1") == 0;
+    if ((env = getenv("PROXY_VERDICT_DEADLINE_MS")) && atoi(env) > 0) verdict_deadline_ms = atoi(env);
+    verdict_fail_closed = (env = getenv("PROXY_VERDICT_FAIL_CLOSED")) && strcmp(env, "1") == 0;
+    if (speculative_fetch_enabled) {
+        printf("Speculative fetch on: verdict deadline %d ms, fail-%s\n",
+               verdict_deadline_ms, verdict_fail_closed ? "closed" : "open");
+    }
     struct addrinfo hints = {0}, *res;
     hints.ai_family   = AF_UNSPEC;
     hints.ai_socktype = SOCK_STREAM;
@@ -390,17 +562,29 @@ static void *handle_client(void *arg) {
                         char full_https_url[1024];
                         snprintf(full_https_url, sizeof(full_https_url), "https://%s%s", req_host, path);
                         url_security_result_t https_sec_result = {0};
+                        char *response = NULL;
+                        long double response_size = 0;
+                        long double latency = 0.0L;
+                        int verdict;
+                        if (speculative_fetch_enabled) {
+                            verdict = classify_while_fetching(full_https_url, req_host, path, &https_sec_result,
+                                                              &response, &response_size, &latency);
+                        } else {
+                            verdict = check_url_security(full_https_url, &https_sec_result) == 0 && !https_sec_result.is_safe ?
+                                      VERDICT_BLOCK : VERDICT_ALLOW;
+                        }
                         
-                        if (check_url_security(full_https_url, &https_sec_result) == 0 && !https_sec_result.is_safe) {
-                            printf("[SECURITY] Blocked HTTPS request: %s | Reason: %s\n", full_https_url, https_sec_result.explanation);
-                            const char *block_html = get_block_page_html(https_sec_result.explanation);
+                        if (verdict != VERDICT_ALLOW) {
+                            const char *reason = verdict_reason(verdict, &https_sec_result);
+                            printf("[SECURITY] Blocked HTTPS request: %s | Reason: %s\n", full_https_url, reason);
+                            const char *block_html = get_block_page_html(reason);
                             
                             // Create block response
                             char block_response[8192];
                             int html_len = strlen(block_html);
                             snprintf(block_response, sizeof(block_response),
-                                "HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n%s",
-                                html_len, block_html);
+                                "HTTP/1.1 %s\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n%s",
+                                verdict == VERDICT_BLOCK ? "403 Forbidden" : "503 Service Unavailable", html_len, block_html);
                             
                             // Send block response via SSL
                             if (SSL_write(ssl_client, block_response, strlen(block_response)) > 0) {
@@ -415,20 +599,18 @@ static void *handle_client(void *arg) {
                             return NULL;
                         }
                         
-                        // Use the existing HTTP flow to fetch the response
-                        char *response = NULL;
-                        long double response_size = 0;
-                        long double latency = 0.0L;
-                        
-                        // Measure start time for latency
-                        struct timeval start_time, end_time;
-                        gettimeofday(&start_time, NULL);
-                        
-                        // Use FetchResServer to get the response via HTTP
-                        FetchResServer(req_host, path, &response, &response_size, &latency);
-                        
-                        gettimeofday(&end_time, NULL);
-                        latency = (end_time.tv_sec - start_time.tv_sec) + (end_time.tv_usec - start_time.tv_usec) / 1000000.0L;
+                        // Use the existing HTTP flow to fetch the response (already fetched when speculative)
+                        if (!speculative_fetch_enabled) {
+                            // Measure start time for latency
+                            struct timeval start_time, end_time;
+                            gettimeofday(&start_time, NULL);
+                            
+                            // Use FetchResServer to get the response via HTTP
+                            FetchResServer(req_host, path, &response, &response_size, &latency);
+                            
+                            gettimeofday(&end_time, NULL);
+                            latency = (end_time.tv_sec - start_time.tv_sec) + (end_time.tv_usec - start_time.tv_usec) / 1000000.0L;
+                        }
                         
                         // Cache and send the response
                         if (response && response_size > 0) {
@@ -492,21 +674,30 @@ static void *handle_client(void *arg) {
             printf("[DEBUG] Handling plain HTTP...\n");
             // --- URL Security Check for HTTP ---
             url_security_result_t sec_result = {0};
-            if (check_url_security(url, &sec_result) == 0 && !sec_result.is_safe) {
-                printf("[SECURITY] Blocked HTTP URL: %s | Reason: %s\n", url, sec_result.explanation);
-                const char *block_html = get_block_page_html(sec_result.explanation);
+            char *response = NULL;
+            long double res_len = -1, latency = 0.0L;
+            int verdict;
+            if (speculative_fetch_enabled) {
+                verdict = fetch_http_with_verdict(buffer, url, &sec_result, &response, &res_len, &latency);
+            } else {
+                verdict = check_url_security(url, &sec_result) == 0 && !sec_result.is_safe ? VERDICT_BLOCK : VERDICT_ALLOW;
+            }
+            if (verdict != VERDICT_ALLOW) {
+                const char *reason = verdict_reason(verdict, &sec_result);
+                printf("[SECURITY] Blocked HTTP URL: %s | Reason: %s\n", url, reason);
+                const char *block_html = get_block_page_html(reason);
                 char block_response[4096];
                 int html_len = strlen(block_html);
                 snprintf(block_response, sizeof(block_response),
-                    "HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n%s",
-                    html_len, block_html);
+                    "HTTP/1.1 %s\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n%s",
+                    verdict == VERDICT_BLOCK ? "403 Forbidden" : "503 Service Unavailable", html_len, block_html);
                 send(client_fd, block_response, strlen(block_response), 0);
                 free(buffer); close(client_fd); return NULL;
             }
-            char *response = NULL;
-            long double res_len = -1, latency = 0.0L;
             pthread_mutex_lock(&cache_mutex);
-            FetchResCache(buffer, total_received, &response, &res_len, cache, &latency);
+            if (!speculative_fetch_enabled) {
+                FetchResCache(buffer, total_received, &response, &res_len, cache, &latency);
+            }
             print_cache_state(cache);
             printf("\n");
             pthread_mutex_unlock(&cache_mutex);
@@ -11,9 +11,46 @@
 
 // getIP function is defined in CallDns.c
 
+void fetch_abort_init(fetch_abort_t *abort) {
+    pthread_mutex_init(&abort->mutex, NULL);
+    abort->fd = -1;
+    abort->aborted = 0;
+}
+
+// Publish the connected socket so an abort can shut it down; returns 0 if already aborted
+static int fetch_attach(fetch_abort_t *abort, int sock) {
+    if (!abort) return 1;
+    pthread_mutex_lock(&abort->mutex);
+    int alive = !abort->aborted;
+    if (alive) abort->fd = sock;
+    pthread_mutex_unlock(&abort->mutex);
+    return alive;
+}
+
+static void fetch_detach(fetch_abort_t *abort) {
+    if (!abort) return;
+    pthread_mutex_lock(&abort->mutex);
+    abort->fd = -1;
+    pthread_mutex_unlock(&abort->mutex);
+}
+
+static int fetch_aborted(fetch_abort_t *abort) {
+    if (!abort) return 0;
+    pthread_mutex_lock(&abort->mutex);
+    int aborted = abort->aborted;
+    pthread_mutex_unlock(&abort->mutex);
+    return aborted;
+}
+
 void FetchResServer(const char *host, const char *path,
                     char **res, long double *ressize,
                     long double *latency) {
+    FetchResServerAbortable(host, path, res, ressize, latency, NULL);
+}
+
+void FetchResServerAbortable(const char *host, const char *path,
+                             char **res, long double *ressize,
+                             long double *latency, fetch_abort_t *abort) {
     *res = NULL; 
     *ressize = 0; 
     *latency = 0;
@@ -25,7 +62,7 @@ void FetchResServer(const char *host, const char *path,
     }
 
     struct timeval start, end;
-    for (int try = 0; try < 3; ++try) {
+    for (int try = 0; try < 3 && !fetch_aborted(abort); ++try) {
         gettimeofday(&start, NULL);
         int sock = -1;
         
@@ -50,6 +87,10 @@ void FetchResServer(const char *host, const char *path,
             fprintf(stderr, "Failed to connect to %s (attempt %d)\n", host, try + 1);
             continue;
         }
+        if (!fetch_attach(abort, sock)) {
+            close(sock);
+            break;
+        }
 
         // Construct HTTP request
         char req[1024];
@@ -63,6 +104,7 @@ void FetchResServer(const char *host, const char *path,
         
         if (send(sock, req, len, 0) < 0) {
             fprintf(stderr, "Failed to send request to %s\n", host);
+            fetch_detach(abort);
             close(sock);
             continue;
         }
@@ -72,6 +114,7 @@ void FetchResServer(const char *host, const char *path,
         char *buf = malloc(cap);
         if (!buf) {
             perror("FetchResServer: malloc failed");
+            fetch_detach(abort);
             close(sock);
             continue;
         }
@@ -85,13 +128,19 @@ void FetchResServer(const char *host, const char *path,
                 if (!newbuf) {
                     perror("FetchResServer: realloc failed");
                     free(buf);
+                    fetch_detach(abort);
                     close(sock);
                     goto next_try;
                 }
                 buf = newbuf;
             }
         }
+        fetch_detach(abort);
         close(sock);
+        if (fetch_aborted(abort)) {
+            free(buf);  // Cut short on purpose: not a response to keep
+            break;
+        }
         
         if (total > 0) {
             gettimeofday(&end, NULL);
@@ -42,8 +42,19 @@ void            insertcache(optimisedcache *, const char *url, const char *path,
 void            freecache(optimisedcache *);
 
 /* ---------- PROXY CORE ---------- */
+/* Lets another thread cancel an upstream fetch that is in progress */
+typedef struct {
+    pthread_mutex_t mutex;
+    int fd;        /* Upstream socket while connected, -1 otherwise */
+    int aborted;
+} fetch_abort_t;
+
 void  FetchResServer(const char *host, const char *path,
                      char **res, long double *ressize, long double *latency);
+void  FetchResServerAbortable(const char *host, const char *path,
+                              char **res, long double *ressize, long double *latency,
+                              fetch_abort_t *abort);
+void  fetch_abort_init(fetch_abort_t *abort);
 void  FetchResCache(char *req, long double reqsize,
                     char **res, long double *ressize,
                     optimisedcache *cache, long double *latency);
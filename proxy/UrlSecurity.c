@@ -1,3 +1,4 @@
+#define _GNU_SOURCE  // pipe2, SOCK_NONBLOCK/SOCK_CLOEXEC
 #include "UrlSecurity.h"
 #include <sys/types.h>
 #include <sys/stat.h>
@@ -5,6 +6,65 @@
 #include <errno.h>
 #include <ctype.h>
 #include <time.h>
+#include <pthread.h>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <sys/time.h>
+#include <poll.h>
+#include <signal.h>
+#include <sys/mman.h>
+#include <sys/uio.h>
+#include <limits.h>
+
+// Pool of open connections to the url_checker.py daemon, shared by all client threads.
+// A thread borrows one connection for a single check and puts it back afterwards, so
+// up to URL_CHECKER_POOL_SIZE checks are in flight at once.
+static struct {
+    int idle_fds[URL_CHECKER_POOL_SIZE];
+    int idle;                  // Connections waiting in idle_fds
+    int open;                  // Idle plus lent out
+    int daemon_fd;             // Pipe held open by the url_checker.py --serve we launched; -1 if none
+    int starting;              // A thread is waiting for the daemon to load the model
+    long long start_deadline;  // When that wait gives up (monotonic ms)
+    long long next_start;      // No daemon (re)launch before this (monotonic ms)
+    long long next_connect;    // No connect attempts before this (monotonic ms)
+    int backoff_ms;
+    pthread_mutex_t mutex;
+    pthread_cond_t cond;
+} pool = { .daemon_fd = -1, .backoff_ms = URL_CHECKER_BACKOFF_MIN_MS, .mutex = PTHREAD_MUTEX_INITIALIZER };
+static pthread_once_t pool_once = PTHREAD_ONCE_INIT;
+
+static void pool_init(void) {
+    // Deadlines are monotonic, so the condition variable must be too
+    pthread_condattr_t attr;
+    pthread_condattr_init(&attr);
+    pthread_condattr_setclock(&attr, CLOCK_MONOTONIC);
+    pthread_cond_init(&pool.cond, &attr);
+    pthread_condattr_destroy(&attr);
+}
+
+static long long now_ms(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000 + ts.tv_nsec / 1000000;
+}
+
+static struct timespec to_timespec(long long ms) {
+    struct timespec ts = { ms / 1000, (ms % 1000) * 1000000 };
+    return ts;
+}
+
+// Wait until fd is ready for events or the deadline passes; returns 0 when ready
+static int wait_fd(int fd, short events, long long deadline) {
+    while (1) {
+        long long remaining = deadline - now_ms();
+        if (remaining <= 0) return -1;
+        struct pollfd pfd = { fd, events, 0 };
+        int n = poll(&pfd, 1, (int)remaining);
+        if (n > 0) return 0;
+        if (n < 0 && errno != EINTR) return -1;
+    }
+}
 
 // Simple value extraction using grep-like approach
 static int extract_value(const char *output, const char *key, char *value_buffer, size_t buffer_size) {
@@ -44,11 +104,452 @@ static int extract_value(const char *output, const char *key, char *value_buffer
     return 0; // Not found
 }
 
+static char checker_socket[sizeof(((struct sockaddr_un *)0)->sun_path)];
+static pthread_once_t checker_socket_once = PTHREAD_ONCE_INIT;
+
+static void checker_socket_init(void) {
+    const char *runtime = getenv("XDG_RUNTIME_DIR");
+    if (runtime && runtime[0] == '/') {
+        int n = snprintf(checker_socket, sizeof(checker_socket), "%s/" URL_CHECKER_RUNTIME_SUBDIR "/"
+                         URL_CHECKER_SOCKET_NAME, runtime);
+        if (n > 0 && (size_t)n < sizeof(checker_socket)) return;
+    }
+    snprintf(checker_socket, sizeof(checker_socket), "/tmp/" URL_CHECKER_RUNTIME_SUBDIR "-%u/" URL_CHECKER_SOCKET_NAME,
+             (unsigned)geteuid());
+}
+
+// Daemon socket path, inside a directory only this user can use (see runtime_dir.py)
+static const char *checker_socket_path(void) {
+    pthread_once(&checker_socket_once, checker_socket_init);
+    return checker_socket;
+}
+
+// Connect to the url_checker.py daemon socket; the connection is non-blocking.
+// A listener run by another user is refused, whoever managed to bind the path.
+static int connect_checker(void) {
+    int fd = socket(AF_UNIX, SOCK_STREAM | SOCK_NONBLOCK | SOCK_CLOEXEC, 0);
+    if (fd < 0) return -1;
+
+    struct sockaddr_un addr;
+    memset(&addr, 0, sizeof(addr));
+    addr.sun_family = AF_UNIX;
+    memcpy(addr.sun_path, checker_socket_path(), sizeof(addr.sun_path));  // Same size, NUL terminated
+
+    // Unix sockets connect immediately or fail (EAGAIN means the listen backlog is full)
+    if (connect(fd, (struct sockaddr *)&addr, sizeof(addr)) != 0) {
+        close(fd);
+        return -1;
+    }
+    struct ucred peer;
+    socklen_t peer_len = sizeof(peer);
+    if (getsockopt(fd, SOL_SOCKET, SO_PEERCRED, &peer, &peer_len) != 0 || peer.uid != geteuid()) {
+        fprintf(stderr, "URL checker socket %s is not served by this user; refusing it\n", checker_socket_path());
+        close(fd);
+        return -1;
+    }
+    return fd;
+}
+
+// Run ../url-security-middleware/venv/bin/python3 url_checker.py <args> without a shell.
+// stdout goes to out_fd (or /dev/null when it is -1); keep_fd, if not -1, stays open
+// in the child as fd 3. Returns the child pid.
+static pid_t spawn_checker(const char *arg1, const char *arg2, int out_fd, int keep_fd) {
+    long max_fd = sysconf(_SC_OPEN_MAX);
+    if (max_fd < 0 || max_fd > 65536) max_fd = 65536;
+    pid_t pid = fork();
+    if (pid != 0) return pid;
+
+    // Child: only async-signal-safe calls until exec
+    int devnull = open("/dev/null", O_RDWR);
+    dup2(devnull, STDIN_FILENO);
+    dup2(out_fd >= 0 ? out_fd : devnull, STDOUT_FILENO);
+    dup2(devnull, STDERR_FILENO);
+    int first_closed = STDERR_FILENO + 1;
+    if (keep_fd >= 0) {
+        // dup2 onto itself would leave close-on-exec set
+        if (keep_fd == first_closed) fcntl(keep_fd, F_SETFD, 0);
+        else dup2(keep_fd, first_closed);
+        first_closed++;
+    }
+    // Client sockets are not close-on-exec; Python must not keep them open
+    for (int fd = first_closed; fd < max_fd; fd++) close(fd);
+    if (chdir("../url-security-middleware") != 0) _exit(127);
+    execl("./venv/bin/python3", "python3", "url_checker.py", arg1, arg2, (char *)NULL);
+    _exit(127);
+}
+
+// Whether the daemon holding the write end of daemon_fd is still running, waiting up to
+// timeout_ms for it to exit. The daemon never writes, so any event means it has gone
+// (or never got as far as exec).
+static int checker_daemon_alive(int daemon_fd, int timeout_ms) {
+    struct pollfd pfd = { .fd = daemon_fd, .events = POLLIN };
+    int n;
+    while ((n = poll(&pfd, 1, timeout_ms)) < 0 && errno == EINTR) {
+    }
+    return n == 0;
+}
+
+// Launch url_checker.py --serve in the background and wait until it accepts connections,
+// it exits, or limit passes. *daemon_fd is set to a pipe that hangs up when the daemon
+// exits. Only the first check pays for the Python start and the model load.
+static int start_checker_daemon(long long limit, int *daemon_fd) {
+    int alive[2];
+    const char *socket_path = checker_socket_path();  // Resolved before fork()
+    if (pipe2(alive, O_CLOEXEC) != 0) return -1;
+
+    // Double fork so the daemon is reparented to init and never left a zombie
+    pid_t pid = fork();
+    if (pid < 0) {
+        close(alive[0]);
+        close(alive[1]);
+        return -1;
+    }
+    if (pid == 0) {
+        setsid();
+        _exit(spawn_checker("--serve", socket_path, -1, alive[1]) < 0 ? 1 : 0);
+    }
+    close(alive[1]);
+    waitpid(pid, NULL, 0);
+    *daemon_fd = alive[0];
+
+    long long deadline = now_ms() + URL_CHECKER_STARTUP_TIMEOUT_SEC * 1000LL;
+    if (limit < deadline) deadline = limit;
+    while (now_ms() < deadline) {
+        int fd = connect_checker();
+        if (fd >= 0) return fd;
+        long long remaining = deadline - now_ms();
+        if (!checker_daemon_alive(alive[0], remaining < 100 ? (int)remaining : 100)) {
+            break;  // Exited before it ever listened (bad venv, model failed to load...)
+        }
+    }
+    return -1;
+}
+
+// Borrow a connection, opening one if the pool has room. Returns -1 when none is
+// available before the deadline or while reconnects are backing off. While the daemon
+// is starting, callers wait for it until the startup deadline, but never past limit.
+static int pool_acquire(long long deadline, long long limit) {
+    pthread_once(&pool_once, pool_init);
+    pthread_mutex_lock(&pool.mutex);
+    while (1) {
+        if (pool.idle > 0) {
+            int fd = pool.idle_fds[--pool.idle];
+            pthread_mutex_unlock(&pool.mutex);
+            return fd;
+        }
+        if (pool.open < URL_CHECKER_POOL_SIZE && !pool.starting) {
+            if (now_ms() < pool.next_connect) {
+                break;  // Daemon recently unreachable: fail fast instead of hammering it
+            }
+            pool.open++;
+            pthread_mutex_unlock(&pool.mutex);
+
+            int fd = connect_checker();
+
+            pthread_mutex_lock(&pool.mutex);
+            // Launch the daemon if we never have or ours has died; relaunch at most
+            // once per URL_CHECKER_RESTART_INTERVAL_MS so a broken install can't fork-loop
+            if (fd < 0 && !pool.starting && now_ms() >= pool.next_start &&
+                (pool.daemon_fd < 0 || !checker_daemon_alive(pool.daemon_fd, 0))) {
+                if (pool.daemon_fd >= 0) close(pool.daemon_fd);
+                pool.daemon_fd = -1;
+                pool.starting = 1;
+                pool.start_deadline = now_ms() + URL_CHECKER_STARTUP_TIMEOUT_SEC * 1000LL;
+                pool.next_start = now_ms() + URL_CHECKER_RESTART_INTERVAL_MS;
+                pthread_mutex_unlock(&pool.mutex);
+                int daemon_fd = -1;
+                fd = start_checker_daemon(limit, &daemon_fd);
+                pthread_mutex_lock(&pool.mutex);
+                pool.daemon_fd = daemon_fd;
+                pool.starting = 0;
+                pthread_cond_broadcast(&pool.cond);
+            }
+            if (fd < 0) {
+                pool.open--;
+                pool.next_connect = now_ms() + pool.backoff_ms;
+                pool.backoff_ms = pool.backoff_ms * 2 > URL_CHECKER_BACKOFF_MAX_MS ?
+                                  URL_CHECKER_BACKOFF_MAX_MS : pool.backoff_ms * 2;
+                break;
+            }
+            pool.backoff_ms = URL_CHECKER_BACKOFF_MIN_MS;
+            pool.next_connect = 0;
+            pthread_mutex_unlock(&pool.mutex);
+            return fd;
+        }
+        // Every connection is busy, or the daemon is still loading the model: wait for either to change
+        long long wait_until = pool.starting ? pool.start_deadline : deadline;
+        struct timespec until = to_timespec(wait_until < limit ? wait_until : limit);
+        if (pthread_cond_timedwait(&pool.cond, &pool.mutex, &until) == ETIMEDOUT) {
+            break;
+        }
+    }
+    pthread_mutex_unlock(&pool.mutex);
+    return -1;
+}
+
+// Return a borrowed connection; a connection that failed mid-request is closed instead
+static void pool_release(int fd, int healthy) {
+    pthread_mutex_lock(&pool.mutex);
+    if (healthy) {
+        pool.idle_fds[pool.idle++] = fd;
+    } else {
+        close(fd);
+        pool.open--;
+    }
+    pthread_cond_signal(&pool.cond);
+    pthread_mutex_unlock(&pool.mutex);
+}
+
+static int send_all(int fd, const char *data, size_t len, long long deadline) {
+    while (len > 0) {
+        ssize_t n = send(fd, data, len, MSG_NOSIGNAL);
+        if (n < 0 && (errno == EAGAIN || errno == EINTR)) {
+            if (wait_fd(fd, POLLOUT, deadline) != 0) return -1;
+            continue;
+        }
+        if (n <= 0) return -1;
+        data += n;
+        len -= n;
+    }
+    return 0;
+}
+
+// Send one URL and read its KEY: value block (terminated by an empty line)
+static int checker_roundtrip(int fd, const char *url, char *output, size_t output_size, long long deadline) {
+    if (send_all(fd, url, strlen(url), deadline) != 0 || send_all(fd, "\n", 1, deadline) != 0) {
+        return -1;
+    }
+
+    char buffer[1024];
+    size_t total_len = 0;
+    char prev = '\0';
+    while (1) {
+        ssize_t n = recv(fd, buffer, sizeof(buffer), 0);
+        if (n < 0 && (errno == EAGAIN || errno == EINTR)) {
+            if (wait_fd(fd, POLLIN, deadline) != 0) return -1;
+            continue;
+        }
+        if (n <= 0) return -1;
+        for (ssize_t i = 0; i < n; i++) {
+            if (total_len < output_size - 1) {
+                output[total_len++] = buffer[i];
+            }
+            if (buffer[i] == '\n' && prev == '\n') {
+                output[total_len] = '\0';
+                return 0;
+            }
+            prev = buffer[i];
+        }
+    }
+}
+
+// Ask the daemon over a pooled connection, retrying once on a fresh connection if
+// a kept-open one went stale (e.g. the daemon was restarted)
+static int query_checker_daemon(const char *url, char *output, size_t output_size, long long limit) {
+    long long deadline = now_ms() + URL_CHECKER_CALL_TIMEOUT_MS;
+    if (limit < deadline) deadline = limit;
+    for (int attempt = 0; attempt < 2; attempt++) {
+        int fd = pool_acquire(deadline, limit);
+        if (fd < 0) return -1;
+        if (checker_roundtrip(fd, url, output, output_size, deadline) == 0) {
+            pool_release(fd, 1);
+            return 0;
+        }
+        // A timed-out connection may still deliver the old reply later, so it is never reused
+        pool_release(fd, 0);
+    }
+    return -1;
+}
+
+// One-shot fallback: run url_checker.py as a subprocess for this URL
+static int run_checker_subprocess(const char *url, char *output, size_t output_size, long long limit) {
+    if (now_ms() >= limit) return -1;
+    int pipe_fds[2];
+    if (pipe2(pipe_fds, O_CLOEXEC) != 0) {
+        return -1;
+    }
+    // The URL is passed as its own argv entry: no shell, no quoting, no length limit
+    pid_t pid = spawn_checker(url, NULL, pipe_fds[1], -1);
+    close(pipe_fds[1]);
+    if (pid < 0) {
+        close(pipe_fds[0]);
+        return -1;
+    }
+
+    // The subprocess loads the model itself, so it gets the startup allowance
+    long long deadline = now_ms() + URL_CHECKER_STARTUP_TIMEOUT_SEC * 1000LL;
+    if (limit < deadline) deadline = limit;
+    size_t total_len = 0;
+    int ret = 0;
+    while (1) {
+        if (wait_fd(pipe_fds[0], POLLIN, deadline) != 0) {
+            kill(pid, SIGKILL);
+            ret = -1;
+            break;
+        }
+        char buffer[1024];
+        ssize_t n = read(pipe_fds[0], buffer, sizeof(buffer));
+        if (n < 0 && errno == EINTR) continue;
+        if (n <= 0) break;
+        size_t copy = (size_t)n < output_size - 1 - total_len ? (size_t)n : output_size - 1 - total_len;
+        memcpy(output + total_len, buffer, copy);
+        total_len += copy;
+    }
+    output[total_len] = '\0';
+    close(pipe_fds[0]);
+    waitpid(pid, NULL, 0);
+    // Exit status 1 means "malicious", so only an empty reply counts as a failure (e.g. exec failed)
+    return total_len > 0 ? ret : -1;
+}
+
+// Read-only mapping of the checker's shared verdict table (see UrlSecurity.h),
+// published once with an atomic store; until then every lookup is a miss. The
+// capacity and hash key are copied out when the table is mapped and never read
+// from the live header again.
+static const unsigned char *verdict_table;
+static uint64_t verdict_table_mask;
+static uint64_t verdict_table_k0, verdict_table_k1;
+static long long verdict_table_next_try;  // Monotonic ms; guarded by verdict_table_mutex
+static pthread_mutex_t verdict_table_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+static const unsigned char *map_verdict_table(void) {
+    const unsigned char *table = __atomic_load_n(&verdict_table, __ATOMIC_ACQUIRE);
+    if (table) return table;
+
+    // The checker creates the file when it starts; look again at most once a second
+    pthread_mutex_lock(&verdict_table_mutex);
+    table = verdict_table;
+    if (!table && now_ms() >= verdict_table_next_try) {
+        verdict_table_next_try = now_ms() + URL_VERDICT_RETRY_MS;
+        int fd = open(URL_VERDICT_TABLE_PATH, O_RDONLY | O_NOFOLLOW | O_CLOEXEC);
+        struct stat st;
+        // Only trust a table that we (i.e. the checker we run) own and nobody else can write
+        if (fd >= 0 && fstat(fd, &st) == 0 && S_ISREG(st.st_mode) && st.st_uid == geteuid() &&
+            (st.st_mode & 022) == 0 && st.st_size > URL_VERDICT_HEADER_SIZE) {
+            void *mem = mmap(NULL, st.st_size, PROT_READ, MAP_SHARED, fd, 0);
+            if (mem != MAP_FAILED) {
+                url_verdict_header_t header;
+                memcpy(&header, mem, sizeof(header));
+                uint32_t capacity = header.capacity;
+                if (header.magic == URL_VERDICT_TABLE_MAGIC && header.version == URL_VERDICT_TABLE_VERSION &&
+                    header.entry_size == sizeof(url_verdict_entry_t) && capacity && !(capacity & (capacity - 1)) &&
+                    (uint64_t)st.st_size == URL_VERDICT_HEADER_SIZE + (uint64_t)capacity * sizeof(url_verdict_entry_t)) {
+                    verdict_table_mask = capacity - 1;
+                    memcpy(&verdict_table_k0, header.hash_key, 8);
+                    memcpy(&verdict_table_k1, header.hash_key + 8, 8);
+                    table = mem;
+                    __atomic_store_n(&verdict_table, table, __ATOMIC_RELEASE);
+                } else {
+                    munmap(mem, st.st_size);
+                }
+            }
+        }
+        if (fd >= 0) close(fd);
+    }
+    pthread_mutex_unlock(&verdict_table_mutex);
+    return table;
+}
+
+#define SIPROUND do { \
+        v0 += v1; v1 = (v1 << 13) | (v1 >> 51); v1 ^= v0; v0 = (v0 << 32) | (v0 >> 32); \
+        v2 += v3; v3 = (v3 << 16) | (v3 >> 48); v3 ^= v2; \
+        v0 += v3; v3 = (v3 << 21) | (v3 >> 43); v3 ^= v0; \
+        v2 += v1; v1 = (v1 << 17) | (v1 >> 47); v1 ^= v2; v2 = (v2 << 32) | (v2 >> 32); \
+    } while (0)
+
+// SipHash-2-4 of the URL with ASCII letters lowercased, under the table's key.
+// Must match url_key() in shared_verdicts.py.
+static uint64_t url_verdict_key(const char *url) {
+    uint64_t v0 = verdict_table_k0 ^ 0x736f6d6570736575ULL, v1 = verdict_table_k1 ^ 0x646f72616e646f6dULL;
+    uint64_t v2 = verdict_table_k0 ^ 0x6c7967656e657261ULL, v3 = verdict_table_k1 ^ 0x7465646279746573ULL;
+    uint64_t m = 0;
+    size_t len = 0;
+    for (const unsigned char *p = (const unsigned char *)url; *p; p++, len++) {
+        uint64_t c = (*p >= 'A' && *p <= 'Z') ? *p + ('a' - 'A') : *p;
+        m |= c << (8 * (len & 7));
+        if ((len & 7) == 7) {
+            v3 ^= m; SIPROUND; SIPROUND; v0 ^= m;
+            m = 0;
+        }
+    }
+    m |= (uint64_t)(len & 0xff) << 56;
+    v3 ^= m; SIPROUND; SIPROUND; v0 ^= m;
+    v2 ^= 0xff;
+    SIPROUND; SIPROUND; SIPROUND; SIPROUND;
+    uint64_t h = v0 ^ v1 ^ v2 ^ v3;
+    return h ? h : 1;
+}
+
+// Copy a NUL-padded string out of the table header, bounded by its slot width
+static void copy_table_string(char *dst, size_t dst_size, const unsigned char *src, size_t width) {
+    size_t n = strnlen((const char *)src, width);
+    if (n >= dst_size) n = dst_size - 1;
+    memcpy(dst, src, n);
+    dst[n] = '\0';
+}
+
+// Answer from the shared verdict table; returns 0 on a live hit, -1 on a miss
+static int lookup_shared_verdict(const char *url, url_security_result_t *result) {
+    const unsigned char *table = map_verdict_table();
+    if (!table) return -1;
+
+    const url_verdict_header_t *header = (const url_verdict_header_t *)table;
+    const url_verdict_entry_t *entries = (const url_verdict_entry_t *)(table + URL_VERDICT_HEADER_SIZE);
+    uint64_t key = url_verdict_key(url);
+    uint64_t mask = verdict_table_mask;
+
+    for (int probe = 0; probe < URL_VERDICT_PROBE_LIMIT; probe++) {
+        const url_verdict_entry_t *slot = &entries[(key + probe) & mask];
+        // Seqlock read: an odd or changed counter means the checker was mid-write
+        uint32_t before = __atomic_load_n(&slot->seq, __ATOMIC_ACQUIRE);
+        if (before & 1) return -1;
+        uint64_t slot_key = __atomic_load_n(&slot->key, __ATOMIC_RELAXED);
+        int64_t expires_ms = __atomic_load_n(&slot->expires_ms, __ATOMIC_RELAXED);
+        uint8_t is_malicious = __atomic_load_n(&slot->result, __ATOMIC_RELAXED);
+        int8_t class_id = __atomic_load_n(&slot->class_id, __ATOMIC_RELAXED);
+        uint8_t explanation = __atomic_load_n(&slot->explanation, __ATOMIC_RELAXED);
+        float score;
+        __atomic_load(&slot->score, &score, __ATOMIC_RELAXED);
+        __atomic_thread_fence(__ATOMIC_ACQUIRE);
+        if (__atomic_load_n(&slot->seq, __ATOMIC_RELAXED) != before) return -1;
+
+        if (slot_key == 0) return -1;  // Slots are never emptied, so the key is not further on
+        if (slot_key != key) continue;
+
+        struct timespec ts;
+        clock_gettime(CLOCK_REALTIME, &ts);
+        if (expires_ms <= (int64_t)ts.tv_sec * 1000 + ts.tv_nsec / 1000000) return -1;
+
+        result->is_safe = is_malicious == 0;
+        result->score = score;
+        if (class_id >= 0 && class_id < URL_VERDICT_MAX_CLASSES && (uint32_t)class_id < header->n_classes) {
+            copy_table_string(result->prediction, sizeof(result->prediction),
+                              table + URL_VERDICT_CLASS_NAMES_OFFSET + class_id * URL_VERDICT_CLASS_NAME_BYTES,
+                              URL_VERDICT_CLASS_NAME_BYTES);
+        }
+        if (explanation < URL_VERDICT_MAX_EXPLANATIONS && explanation < header->n_explanations) {
+            copy_table_string(result->explanation, sizeof(result->explanation),
+                              table + URL_VERDICT_EXPLANATIONS_OFFSET + explanation * URL_VERDICT_EXPLANATION_BYTES,
+                              URL_VERDICT_EXPLANATION_BYTES);
+        }
+        return 0;
+    }
+    return -1;
+}
+
 // Check if URL is safe by calling Python model
 int check_url_security(const char *url, url_security_result_t *result) {
+    return check_url_security_timeout(url, result, 0);
+}
+
+// Like check_url_security, but gives up after timeout_ms (0 means the usual per-step
+// timeouts only). Returns URL_SECURITY_TIMED_OUT when the deadline passed and -1 when
+// the check failed for any other reason.
+int check_url_security_timeout(const char *url, url_security_result_t *result, int timeout_ms) {
     if (!url || !result) {
         return -1;
     }
+    long long limit = timeout_ms > 0 ? now_ms() + timeout_ms : LLONG_MAX;
     
     // Initialize result structure
     memset(result, 0, sizeof(url_security_result_t));
@@ -61,32 +562,29 @@ int check_url_security(const char *url, url_security_result_t *result) {
         return -1;
     }
     
-    // Build command with virtual environment activation
-    char cmd[MAX_CMD_LENGTH];
-    snprintf(cmd, sizeof(cmd), "cd ../url-security-middleware && ./venv/bin/python3 url_checker.py \"%s\"", url);
-    
-    // Execute command and capture output
-    FILE *pipe = popen(cmd, "r");
-    if (!pipe) {
-        strcpy(result->error, "Failed to execute URL checker");
+    // The daemon protocol is newline-delimited
+    if (strpbrk(url, "\r\n")) {
+        strcpy(result->error, "Invalid URL");
         return -1;
     }
     
-    char buffer[1024];
-    char output[2048] = "";
-    size_t total_len = 0;
+    // Repeat URLs: one probe of the table the checker shares with us
+    if (lookup_shared_verdict(url, result) == 0) {
+        log_url_check(url, result);
+        return 0;
+    }
     
-    // Read output
-    while (fgets(buffer, sizeof(buffer), pipe) != NULL) {
-        size_t len = strlen(buffer);
-        if (total_len + len < sizeof(output)) {
-            strcat(output, buffer);
-            total_len += len;
+    char output[MAX_CHECKER_OUTPUT] = "";
+    if (query_checker_daemon(url, output, sizeof(output), limit) != 0 &&
+        run_checker_subprocess(url, output, sizeof(output), limit) != 0) {
+        if (now_ms() >= limit) {
+            strcpy(result->error, "URL checker timed out");
+            return URL_SECURITY_TIMED_OUT;
         }
+        strcpy(result->error, "Failed to execute URL checker");
+        return -1;
     }
     
-    int status = pclose(pipe);
-    
     // Parse output using simple extraction
     char result_buffer[64];
     char prediction_buffer[64];
@@ -100,16 +598,20 @@ int check_url_security(const char *url, url_security_result_t *result) {
     int explanation_found = extract_value(output, "EXPLANATION", explanation_buffer, sizeof(explanation_buffer));
     int error_found = extract_value(output, "ERROR", error_buffer, sizeof(error_buffer));
     
+#ifdef URL_SECURITY_DEBUG
     printf("[DEBUG] Raw output: %s\n", output);
     printf("[DEBUG] Parsed values - result: %s, prediction: %s, score: %s\n", 
            result_found ? result_buffer : "NULL", 
            prediction_found ? prediction_buffer : "NULL", 
            score_found ? score_buffer : "NULL");
+#endif
     
     if (result_found && strlen(result_buffer) > 0) {
         int result_value = atoi(result_buffer);
         result->is_safe = (result_value == 0);
+#ifdef URL_SECURITY_DEBUG
         printf("[DEBUG] Result value: %s -> %d, is_safe: %d\n", result_buffer, result_value, result->is_safe);
+#endif
     }
     
     if (prediction_found && strlen(prediction_buffer) > 0) {
@@ -134,31 +636,224 @@ int check_url_security(const char *url, url_security_result_t *result) {
     return 0;
 }
 
+// Security log: client threads format a line and copy it into a ring buffer; one
+// logger thread drains the buffer with a single writev() per batch and rotates the
+// file by size. A full buffer drops lines (counted) rather than stall a request.
+static struct {
+    char data[URL_SECURITY_LOG_BUFFER_BYTES];
+    size_t head;               // Total bytes ever appended (index = head % size)
+    size_t tail;               // Total bytes ever written to the file
+    unsigned long dropped;     // Lines lost to a full buffer since the last report
+    int jsonl;                 // URL_SECURITY_LOG_FORMAT=jsonl
+    int running;               // The logger thread was started
+    int stopping;
+    int fd;
+    off_t size;                // Bytes in the current file
+    pthread_t thread;
+    pthread_mutex_t mutex;
+    pthread_cond_t wake;       // Logger: data waiting or stopping
+    pthread_cond_t drained;    // Flushers: tail caught up
+} security_log = { .fd = -1, .mutex = PTHREAD_MUTEX_INITIALIZER,
+                   .wake = PTHREAD_COND_INITIALIZER, .drained = PTHREAD_COND_INITIALIZER };
+static pthread_once_t security_log_once = PTHREAD_ONCE_INIT;
+
+static void open_security_log(void) {
+    mkdir(URL_SECURITY_LOG_DIR, 0755);
+    security_log.fd = open(URL_SECURITY_LOG_PATH, O_WRONLY | O_CREAT | O_APPEND | O_CLOEXEC, 0644);
+    struct stat st;
+    security_log.size = security_log.fd >= 0 && fstat(security_log.fd, &st) == 0 ? st.st_size : 0;
+}
+
+// url_security.log -> .1 -> .2 ... up to URL_SECURITY_LOG_KEEP old files
+static void rotate_security_log(void) {
+    char from[256], to[256];
+    if (security_log.fd >= 0) close(security_log.fd);
+    for (int i = URL_SECURITY_LOG_KEEP - 1; i >= 1; i--) {
+        snprintf(from, sizeof(from), "%s.%d", URL_SECURITY_LOG_PATH, i);
+        snprintf(to, sizeof(to), "%s.%d", URL_SECURITY_LOG_PATH, i + 1);
+        rename(from, to);
+    }
+    snprintf(to, sizeof(to), "%s.1", URL_SECURITY_LOG_PATH);
+    rename(URL_SECURITY_LOG_PATH, to);
+    open_security_log();
+}
+
+// Write the len bytes at tail (the logger thread's batch)
+static void write_security_log(size_t len) {
+    if (security_log.fd < 0) open_security_log();  // e.g. logs/ was removed; retried each batch
+    if (security_log.fd < 0) return;
+    if (security_log.size > 0 && security_log.size + (off_t)len > URL_SECURITY_LOG_MAX_BYTES) {
+        rotate_security_log();
+        if (security_log.fd < 0) return;
+    }
+    // The ring may wrap, so a batch is at most two pieces
+    size_t start = security_log.tail % URL_SECURITY_LOG_BUFFER_BYTES;
+    size_t first = len < URL_SECURITY_LOG_BUFFER_BYTES - start ? len : URL_SECURITY_LOG_BUFFER_BYTES - start;
+    struct iovec iov[2] = { { security_log.data + start, first }, { security_log.data, len - first } };
+    struct iovec *v = iov;
+    int count = len > first ? 2 : 1;
+    while (count > 0) {
+        ssize_t n = writev(security_log.fd, v, count);
+        if (n < 0 && errno == EINTR) continue;
+        if (n <= 0) return;  // Disk full or similar: the batch is lost
+        security_log.size += n;
+        for (; count > 0 && (size_t)n >= v->iov_len; v++, count--) n -= v->iov_len;
+        if (count > 0) {
+            v->iov_base = (char *)v->iov_base + n;
+            v->iov_len -= n;
+        }
+    }
+}
+
+static void format_timestamp(char *buf, size_t size) {
+    time_t now = time(NULL);
+    struct tm tm;
+    localtime_r(&now, &tm);
+    strftime(buf, size, "%Y-%m-%d %H:%M:%S", &tm);
+}
+
+static void *security_log_thread(void *arg) {
+    (void)arg;
+    pthread_mutex_lock(&security_log.mutex);
+    while (1) {
+        while (security_log.head == security_log.tail && !security_log.dropped && !security_log.stopping) {
+            pthread_cond_wait(&security_log.wake, &security_log.mutex);
+        }
+        if (security_log.head == security_log.tail && !security_log.dropped) break;  // Stopping, all written
+
+        // Let a burst accumulate so it goes out in one write
+        if (!security_log.stopping && security_log.head - security_log.tail < URL_SECURITY_LOG_BUFFER_BYTES / 2) {
+            struct timespec until;
+            clock_gettime(CLOCK_REALTIME, &until);
+            until.tv_nsec += URL_SECURITY_LOG_FLUSH_MS * 1000000L;
+            until.tv_sec += until.tv_nsec / 1000000000L;
+            until.tv_nsec %= 1000000000L;
+            pthread_cond_timedwait(&security_log.wake, &security_log.mutex, &until);
+        }
+        size_t len = security_log.head - security_log.tail;
+        unsigned long dropped = security_log.dropped;
+        security_log.dropped = 0;
+        pthread_mutex_unlock(&security_log.mutex);
+
+        // Producers only append after head, so [tail, head) is ours until tail moves
+        if (len) write_security_log(len);
+        if (dropped) {
+            char note[160], timestamp[64];
+            format_timestamp(timestamp, sizeof(timestamp));
+            int n = security_log.jsonl ?
+                snprintf(note, sizeof(note), "{\"timestamp\":\"%s\",\"dropped\":%lu}\n", timestamp, dropped) :
+                snprintf(note, sizeof(note), "[%s] LOGGER: dropped %lu entries (buffer full)\n", timestamp, dropped);
+            if (security_log.fd >= 0 && write(security_log.fd, note, n) == n) security_log.size += n;
+        }
+
+        pthread_mutex_lock(&security_log.mutex);
+        security_log.tail += len;
+        pthread_cond_broadcast(&security_log.drained);
+    }
+    pthread_cond_broadcast(&security_log.drained);
+    pthread_mutex_unlock(&security_log.mutex);
+    return NULL;
+}
+
+// Write out everything logged so far; also runs at exit
+void url_security_log_flush(void) {
+    pthread_mutex_lock(&security_log.mutex);
+    size_t target = security_log.head;
+    pthread_cond_signal(&security_log.wake);
+    while (security_log.running && security_log.tail < target && !security_log.stopping) {
+        pthread_cond_wait(&security_log.drained, &security_log.mutex);
+    }
+    pthread_mutex_unlock(&security_log.mutex);
+}
+
+static void stop_security_log(void) {
+    pthread_mutex_lock(&security_log.mutex);
+    security_log.stopping = 1;
+    pthread_cond_signal(&security_log.wake);
+    pthread_mutex_unlock(&security_log.mutex);
+    pthread_join(security_log.thread, NULL);
+}
+
+static void start_security_log(void) {
+    const char *format = getenv("URL_SECURITY_LOG_FORMAT");
+    security_log.jsonl = format && strcmp(format, "jsonl") == 0;
+    open_security_log();
+    if (pthread_create(&security_log.thread, NULL, security_log_thread, NULL) == 0) {
+        security_log.running = 1;
+        atexit(stop_security_log);
+    }
+}
+
+// Append s to out as a JSON string body; returns the new length (stops at size)
+static size_t json_escape(char *out, size_t len, size_t size, const char *s) {
+    for (const unsigned char *p = (const unsigned char *)s; *p && len + 7 < size; p++) {
+        if (*p == '"' || *p == '\\') {
+            out[len++] = '\\';
+            out[len++] = *p;
+        } else if (*p < 0x20) {
+            len += snprintf(out + len, size - len, "\\u%04x", *p);
+        } else {
+            out[len++] = *p;
+        }
+    }
+    return len;
+}
+
 // Log URL security check result
 void log_url_check(const char *url, const url_security_result_t *result) {
     if (!url || !result) return;
+    pthread_once(&security_log_once, start_security_log);
     
-    // Create logs directory if it doesn't exist
-    mkdir("logs", 0755);
-    
-    FILE *log_file = fopen("logs/url_security.log", "a");
-    if (!log_file) return;
-    
-    time_t now = time(NULL);
     char timestamp[64];
-    strftime(timestamp, sizeof(timestamp), "%Y-%m-%d %H:%M:%S", localtime(&now));
+    format_timestamp(timestamp, sizeof(timestamp));
     
-    fprintf(log_file, "[%s] URL: %s | Safe: %s | Prediction: %s | Score: %.3f | Explanation: %s\n",
-            timestamp, url, 
-            result->is_safe ? "YES" : "NO",
-            result->prediction,
-            result->score,
-            result->explanation[0] ? result->explanation : "None");
+    // Format outside the lock; only the copy into the ring is serialised
+    char line[MAX_URL_LENGTH + 1024];
+    size_t len;
+    if (security_log.jsonl) {
+        len = snprintf(line, sizeof(line), "{\"timestamp\":\"%s\",\"url\":\"", timestamp);
+        len = json_escape(line, len, sizeof(line) - 512, url);
+        len += snprintf(line + len, sizeof(line) - len, "\",\"safe\":%s,\"prediction\":\"",
+                        result->is_safe ? "true" : "false");
+        len = json_escape(line, len, sizeof(line) - 384, result->prediction);
+        len += snprintf(line + len, sizeof(line) - len, "\",\"score\":%.3f,\"explanation\":", result->score);
+        if (result->explanation[0]) {
+            line[len++] = '"';
+            len = json_escape(line, len, sizeof(line) - 8, result->explanation);
+            len += snprintf(line + len, sizeof(line) - len, "\"}\n");
+        } else {
+            len += snprintf(line + len, sizeof(line) - len, "null}\n");
+        }
+    } else {
+        int n = snprintf(line, sizeof(line), "[%s] URL: %s | Safe: %s | Prediction: %s | Score: %.3f | Explanation: %s\n",
+                         timestamp, url, 
+                         result->is_safe ? "YES" : "NO",
+                         result->prediction,
+                         result->score,
+                         result->explanation[0] ? result->explanation : "None");
+        len = (size_t)n < sizeof(line) ? (size_t)n : sizeof(line) - 1;
+        line[len - 1] = '\n';  // Keep a truncated line terminated
+    }
     
-    fclose(log_file);
+    pthread_mutex_lock(&security_log.mutex);
+    size_t used = security_log.head - security_log.tail;
+    if (!security_log.running) {
+        // No logger thread: write it ourselves, as before
+        if (security_log.fd >= 0 && write(security_log.fd, line, len) == (ssize_t)len) security_log.size += len;
+    } else if (used + len > URL_SECURITY_LOG_BUFFER_BYTES) {
+        security_log.dropped++;
+    } else {
+        size_t start = security_log.head % URL_SECURITY_LOG_BUFFER_BYTES;
+        size_t first = len < URL_SECURITY_LOG_BUFFER_BYTES - start ? len : URL_SECURITY_LOG_BUFFER_BYTES - start;
+        memcpy(security_log.data + start, line, first);
+        memcpy(security_log.data, line + first, len - first);
+        int was_empty = used == 0;
+        security_log.head += len;
+        if (was_empty) pthread_cond_signal(&security_log.wake);
+    }
+    pthread_mutex_unlock(&security_log.mutex);
 }
 
-// Generate HTML block page
 char* get_block_page_html(const char *reason) {
     static char html[4096];
     
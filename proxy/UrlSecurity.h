@@ -7,6 +7,7 @@
 #include <unistd.h>
 #include <sys/wait.h>
 #include <sys/stat.h>
+#include <stdint.h>
 
 // Structure to hold URL security check result
 typedef struct {
@@ -19,12 +20,71 @@ typedef struct {
 
 // Function prototypes
 int check_url_security(const char *url, url_security_result_t *result);
+int check_url_security_timeout(const char *url, url_security_result_t *result, int timeout_ms);
+#define URL_SECURITY_TIMED_OUT (-2)  // check_url_security_timeout: no verdict before the deadline
 void log_url_check(const char *url, const url_security_result_t *result);
+void url_security_log_flush(void);
 char* get_block_page_html(const char *reason);
 
 // Configuration
 #define URL_CHECKER_PATH "../url-security-middleware/url_checker.py"
+#define URL_CHECKER_RUNTIME_SUBDIR "url-checker"     // Daemon socket in $XDG_RUNTIME_DIR/<this>, else /tmp/<this>-<uid>
+#define URL_CHECKER_SOCKET_NAME "url_checker.sock"   // (a 0700 directory); must match runtime_dir.py and url_checker.py
+#define URL_CHECKER_STARTUP_TIMEOUT_SEC 60           // Time allowed for the daemon to load the model
+#define URL_CHECKER_RESTART_INTERVAL_MS 10000        // Relaunch a daemon that died at most this often
+#define URL_CHECKER_POOL_SIZE 8                      // Daemon connections shared by all client threads
+#define URL_CHECKER_CALL_TIMEOUT_MS 5000             // Whole daemon check: waiting for a connection, send and reply
+#define URL_CHECKER_BACKOFF_MIN_MS 100               // After a failed connect, no new attempt for this long,
+#define URL_CHECKER_BACKOFF_MAX_MS 5000              // doubling per failure up to this
+#define URL_SECURITY_LOG_DIR "logs"
+#define URL_SECURITY_LOG_PATH "logs/url_security.log"     // Parsed by url-security-middleware/proxy_log.py
+#define URL_SECURITY_LOG_BUFFER_BYTES (1 << 20)            // Ring buffer between client threads and the logger thread
+#define URL_SECURITY_LOG_FLUSH_MS 100                      // Logger waits this long for a batch to fill
+#define URL_SECURITY_LOG_MAX_BYTES (10 * 1024 * 1024)      // Rotate url_security.log past this size,
+#define URL_SECURITY_LOG_KEEP 5                            // keeping url_security.log.1 .. .5
+
+// Shared verdict table (url-security-middleware/shared_verdicts.py). The checker
+// writes verdicts into this memory-mapped file; check_url_security() probes it
+// lock-free before asking the daemon. Layout constants must match shared_verdicts.py.
+#define URL_VERDICT_TABLE_PATH "/dev/shm/url_checker_verdicts"
+#define URL_VERDICT_TABLE_MAGIC 0x31545655u          // "UVT1"
+#define URL_VERDICT_TABLE_VERSION 2
+#define URL_VERDICT_HEADER_SIZE 4096
+#define URL_VERDICT_CLASS_NAMES_OFFSET 64
+#define URL_VERDICT_CLASS_NAME_BYTES 32
+#define URL_VERDICT_MAX_CLASSES 16
+#define URL_VERDICT_EXPLANATIONS_OFFSET 576
+#define URL_VERDICT_EXPLANATION_BYTES 128
+#define URL_VERDICT_MAX_EXPLANATIONS 16
+#define URL_VERDICT_PROBE_LIMIT 8
+#define URL_VERDICT_RETRY_MS 1000                    // How often to retry mapping a missing table
+
+// Table header, at offset 0
+typedef struct {
+    uint32_t magic;
+    uint32_t version;
+    uint32_t capacity;     // Entries; a power of two
+    uint32_t entry_size;   // sizeof(url_verdict_entry_t)
+    uint32_t n_classes;
+    uint32_t n_explanations;
+    uint8_t hash_key[16];              // SipHash-2-4 key for url_verdict_entry_t.key, random per table
+    uint8_t artifact_fingerprint[16];  // Model the verdicts came from (checked by the writer only)
+} url_verdict_header_t;
+
+// One slot, 32 bytes, at URL_VERDICT_HEADER_SIZE + slot * 32
+typedef struct {
+    uint32_t seq;          // Seqlock counter: odd while the checker is rewriting the slot
+    uint8_t result;        // 0 benign, 1 anything else
+    int8_t class_id;       // Index into the header class names
+    uint8_t explanation;   // Index into the header explanations
+    uint8_t pad;
+    uint64_t key;          // SipHash-2-4 of the URL with ASCII letters lowercased; 0 = empty
+    int64_t expires_ms;    // Unix time in ms
+    float score;
+    uint32_t pad2;
+} url_verdict_entry_t;
+
 #define MAX_URL_LENGTH 2048
-#define MAX_CMD_LENGTH 4096
+#define MAX_CHECKER_OUTPUT 2048
 
 #endif // URL_SECURITY_H
@@ -1,10 +1,76 @@
 #include "UrlSecurity.h"
 #include <stdio.h>
+#include <pthread.h>
+#include <time.h>
+
+// Throughput benchmark: many threads calling check_url_security at once, the
+// way EntryClient.c's per-connection threads do. Start the classifier first
+// (url-security-middleware/stub_checker.py measures the proxy side alone).
+typedef struct {
+    int id;
+    int checks;
+    int failures;
+    int blocked;
+} bench_thread_t;
+
+static void *bench_worker(void *arg) {
+    bench_thread_t *t = (bench_thread_t *)arg;
+    char url[256];
+    for (int i = 0; i < t->checks; i++) {
+        snprintf(url, sizeof(url), "http://site%d-%d.example/%s", t->id, i, i % 10 == 0 ? "evil-login" : "index.html");
+        url_security_result_t result;
+        if (check_url_security(url, &result) != 0) {
+            t->failures++;
+        } else if (!result.is_safe) {
+            t->blocked++;
+        }
+    }
+    return NULL;
+}
+
+static int run_bench(int threads, int checks_per_thread) {
+    pthread_t tids[threads];
+    bench_thread_t state[threads];
+    struct timespec start, end;
+
+    // One check first so daemon startup is not part of the measurement
+    url_security_result_t warm;
+    check_url_security("http://warmup.example/", &warm);
+
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    for (int i = 0; i < threads; i++) {
+        state[i] = (bench_thread_t){ .id = i, .checks = checks_per_thread };
+        pthread_create(&tids[i], NULL, bench_worker, &state[i]);
+    }
+    int failures = 0, blocked = 0;
+    for (int i = 0; i < threads; i++) {
+        pthread_join(tids[i], NULL);
+        failures += state[i].failures;
+        blocked += state[i].blocked;
+    }
+    clock_gettime(CLOCK_MONOTONIC, &end);
+
+    double seconds = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
+    int total = threads * checks_per_thread;
+    printf("%d threads x %d checks: %.2f s, %.0f checks/s, %d blocked, %d failed\n",
+           threads, checks_per_thread, seconds, total / seconds, blocked, failures);
+    return failures ? 1 : 0;
+}
+
+int main(int argc, char **argv) {
+    if (argc >= 2 && strcmp(argv[1], "--bench") == 0) {
+        int threads = argc > 2 ? atoi(argv[2]) : 16;
+        int checks = argc > 3 ? atoi(argv[3]) : 500;
+        if (threads < 1 || checks < 1) {
+            fprintf(stderr, "Usage: %s --bench [threads] [checks_per_thread]\n", argv[0]);
+            return 1;
+        }
+        return run_bench(threads, checks);
+    }
 
-int main() {
     printf("Testing URL Security Integration\n");
     printf("================================\n\n");
-    
+
     // Test URLs
     const char *test_urls[] = {
         "https://www.google.com",
@@ -12,15 +78,15 @@ int main() {
         "https://secure-login.ph1sh.xyz/index.php?id=123",
         "http://malware-download.biz/<script>alert(1)</script>"
     };
-    
+
     int num_tests = sizeof(test_urls) / sizeof(test_urls[0]);
-    
+
     for (int i = 0; i < num_tests; i++) {
         printf("Test %d: %s\n", i + 1, test_urls[i]);
-        
+
         url_security_result_t result;
         int ret = check_url_security(test_urls[i], &result);
-        
+
         if (ret == 0) {
             printf("  Result: %s\n", result.is_safe ? "SAFE" : "MALICIOUS");
             printf("  Prediction: %s\n", result.prediction);
@@ -33,6 +99,6 @@ int main() {
         }
         printf("\n");
     }
-    
+
     return 0;
 }
@@ -0,0 +1,80 @@
+# allowlist.py
+
+import tldextract
+
+
+def normalize_host(host: str) -> str:
+    """Lowercase a host and strip userinfo, port, IPv6 brackets and a trailing dot"""
+    host = host.strip().lower()
+    host = host.rpartition("@")[2]
+    if host.startswith("["):
+        host = host[1:].partition("]")[0]
+    elif host.count(":") == 1:
+        host = host.partition(":")[0]
+    return host.rstrip(".")
+
+
+class Allowlist:
+    """Set-based allowlist of trusted hosts.
+
+    Entries are matched in three ways, each an O(1) set lookup:
+
+    - ``example.com`` matches that exact host;
+    - if the entry is itself a registrable domain (per the public suffix
+      list, private suffixes included), it also matches every host under
+      it, so ``google.com`` covers ``mail.google.com``;
+    - ``*.example.org`` matches any subdomain of ``example.org``.
+
+    Private public suffixes are honoured, so an entry ``github.io`` does not
+    allowlist ``anything.github.io``.
+    """
+
+    def __init__(self, entries=()):
+        # Bundled suffix list snapshot only: never fetch it over the network
+        self._extract = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None, include_psl_private_domains=True)
+        self.hosts = set()
+        self.domains = set()
+        self.wildcards = set()
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def load(cls, path: str):
+        """Load one entry per line; blank lines and # comments are ignored"""
+        with open(path, "r", encoding="utf-8") as f:
+            entries = [line.split("#", 1)[0].strip() for line in f]
+        return cls(entry for entry in entries if entry)
+
+    def _registrable(self, host: str) -> str:
+        return self._extract(host).top_domain_under_public_suffix
+
+    def add(self, entry: str):
+        entry = entry.strip().lower()
+        if entry.startswith("*."):
+            self.wildcards.add(normalize_host(entry[2:]))
+            return
+        host = normalize_host(entry)
+        self.hosts.add(host)
+        if self._registrable(host) == host:
+            self.domains.add(host)
+
+    def __len__(self):
+        return len(self.hosts) + len(self.wildcards)
+
+    def __contains__(self, host: str) -> bool:
+        """True if host (a hostname or netloc) is allowlisted"""
+        host = normalize_host(host)
+        if not host:
+            return False
+        if host in self.hosts:
+            return True
+
+        if self.wildcards:
+            labels = host.split(".")
+            for i in range(1, len(labels)):
+                if ".".join(labels[i:]) in self.wildcards:
+                    return True
+
+        if self.domains and "." in host:
+            return self._registrable(host) in self.domains
+        return False
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Compare inference backends: load time, single-URL latency, batch throughput and memory.
+
+Each backend runs in its own subprocess so import cost and peak RSS are
+measured in isolation. Run export_model.py first.
+
+Usage: python3 bench_backends.py [iterations]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+MAX_LEN = 200
+BATCH_SIZE = 64
+
+def run_child(name, iterations):
+    """Benchmark one backend in this process and print a JSON line"""
+    start = time.perf_counter()
+    import numpy as np
+    from char_tokenizer import CharTokenizer
+    from inference_backends import load_backend
+    from url_generator import URLGenerator
+    backend = load_backend(name, MAX_LEN)
+    load_s = time.perf_counter() - start
+
+    gen = URLGenerator(seed=3)
+    padded = CharTokenizer.load_json("saved_models/char_vocab.json", MAX_LEN).encode_batch(
+        [gen.generate_invalid_url() for _ in range(BATCH_SIZE)])
+    backend.predict(padded[:1])
+    backend.predict(padded)
+
+    latencies = []
+    for i in range(iterations):
+        row = padded[i % BATCH_SIZE:i % BATCH_SIZE + 1]
+        t = time.perf_counter()
+        backend.predict(row)
+        latencies.append((time.perf_counter() - t) * 1000)
+
+    batches = max(1, iterations // 10)
+    t = time.perf_counter()
+    for _ in range(batches):
+        backend.predict(padded)
+    throughput = batches * BATCH_SIZE / (time.perf_counter() - t)
+
+    print(json.dumps({
+        "backend": name,
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "urls_per_s": throughput,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+
+    print(f"{'backend':<11} {'load s':>7} {'p50 ms':>8} {'p99 ms':>8} {'URLs/s':>9} {'RSS MB':>8}")
+    for name in ("tensorflow", "tflite", "onnx"):
+        proc = subprocess.run([sys.executable, __file__, "--child", name, str(iterations)],
+                              capture_output=True, text=True, env=env)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            error = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+            print(f"{name:<11} failed: {error}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{name:<11} {r['load_s']:>7.2f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['urls_per_s']:>9.0f} {r['max_rss_mb']:>8.0f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 200)
+    else:
+        main()
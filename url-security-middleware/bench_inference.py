@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Per-URL inference latency: model.predict vs the compiled tf.function path.
+
+Usage: python3 bench_inference.py [iterations]
+"""
+
+import sys
+import time
+import numpy as np
+
+import predict_url as pu
+
+def bench(mode, padded, iterations):
+    """Time single-row forward passes; returns latencies in ms"""
+    # Warm up (tracing / graph building is not part of steady-state latency)
+    for _ in range(5):
+        pu.session.forward(padded[:1], mode=mode)
+
+    latencies = []
+    for i in range(iterations):
+        row = padded[i % len(padded):i % len(padded) + 1]
+        start = time.perf_counter()
+        pu.session.forward(row, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if pu.INFERENCE_BACKEND != "tensorflow":
+        sys.exit("bench_inference.py compares TensorFlow paths; unset URL_INFERENCE_BACKEND")
+    padded = pu.session.load().char_tokenizer.encode_batch(pu.urls)
+
+    # Both paths must agree before their speed is worth comparing
+    reference = pu.session.forward(padded, mode="predict")
+    compiled = pu.session.forward(padded, mode="compiled")
+    print(f"Max abs difference between paths: {np.abs(reference - compiled).max():.2e}")
+
+    print(f"\n{'mode':<10} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for mode in ("predict", "compiled"):
+        lat = bench(mode, padded, iterations)
+        print(f"{mode:<10} {lat.mean():>9.3f} {np.percentile(lat, 50):>9.3f} {np.percentile(lat, 99):>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Cost of timing one pipeline stage: two perf_counter() calls and a Histogram.observe().
+
+Usage: python3 bench_metrics.py [iterations]
+"""
+
+import sys
+import time
+
+from metrics import Histogram
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    timer = Histogram("bench_seconds", "Bench")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        timer.observe(time.perf_counter() - t0)
+    per_call = (time.perf_counter() - start) / iterations
+    print(f"perf_counter x2 + observe: {per_call * 1e9:.0f} ns per timed stage ({iterations:,} iterations)")
+
+if __name__ == "__main__":
+    main()
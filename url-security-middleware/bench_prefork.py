@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Measure what pre-forking buys: memory per worker and throughput as workers are added.
+
+For each worker count, prefork.py is started twice: once loading the model
+in the parent before forking (shared) and once with --no-preload, where
+every worker loads its own copy like ``uvicorn --workers``. Memory is read
+from /proc/<pid>/smaps_rollup:
+
+  PSS      each page's size divided by the processes sharing it; the sum over
+           all processes is the service's real footprint
+  private  pages only this worker has (what one more worker costs)
+
+Throughput comes from client processes posting fresh generated URLs to
+/check-urls over keep-alive connections. The servers run in a temporary
+directory, so url_logs.db here is not touched. Linux only.
+
+Usage: python3 bench_prefork.py [max_workers] [seconds]
+"""
+
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PORT = 8791
+CLIENTS = 8           # Concurrent client processes (same for every run)
+URLS_PER_REQUEST = 16
+STARTUP_TIMEOUT = 300
+
+
+def smaps(pid) -> dict:
+    """PSS and private memory of one process, in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"pss": values.get("Pss", 0.0), "private": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0)}
+
+
+def start_server(workers, preload, workdir):
+    cmd = [sys.executable, os.path.join(BASE_DIR, "prefork.py"), "--workers", str(workers), "--port", str(PORT)]
+    if not preload:
+        cmd.append("--no-preload")
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3", URL_LOG_DURABILITY="buffered")
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    pids = []
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while len(pids) < workers:
+        line = proc.stdout.readline()
+        if not line or time.monotonic() > deadline:
+            proc.kill()
+            raise RuntimeError("prefork.py did not start")
+        if line.startswith("Worker ") and line.rstrip().endswith("ready"):
+            pids.append(int(line.split("pid ")[1].split(")")[0]))
+    return proc, pids
+
+
+def client(seed, seconds, results):
+    from url_generator import URLGenerator
+    gen = URLGenerator(seed=seed)
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=60)
+    requests_done = errors = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        body = json.dumps({"urls": [gen.generate_valid_url() for _ in range(URLS_PER_REQUEST)]})
+        try:
+            conn.request("POST", "/check-urls", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                requests_done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=60)
+    results.put((requests_done, errors))
+
+
+def load(seconds):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client, args=(seed, seconds, results)) for seed in range(CLIENTS)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    done = sum(r for r, _ in totals)
+    return done * URLS_PER_REQUEST / elapsed, sum(e for _, e in totals)
+
+
+def run(workers, preload, seconds):
+    with tempfile.TemporaryDirectory() as workdir:
+        proc, pids = start_server(workers, preload, workdir)
+        try:
+            # Read memory after the load so every worker has run the model
+            urls_per_s, errors = load(seconds)
+            parent = smaps(proc.pid)
+            children = [smaps(pid) for pid in pids]
+        finally:
+            proc.terminate()
+            proc.wait(timeout=60)
+    return {
+        "total_pss": parent["pss"] + sum(c["pss"] for c in children),
+        "private": sum(c["private"] for c in children) / len(children),
+        "urls_per_s": urls_per_s,
+        "errors": errors,
+    }
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    counts = sorted({1, max_workers} | {n for n in (2, 4, 8, 16) if n < max_workers})
+    print(f"{os.cpu_count()} CPUs, {CLIENTS} client processes, {URLS_PER_REQUEST} URLs per request, {seconds:.0f}s per run")
+    print(f"{'workers':>7} {'model':<10} {'total PSS MB':>12} {'private MB/worker':>17} {'URLs/s':>8} {'errors':>6}")
+    totals = {}
+    for preload in (True, False):
+        mode = "shared" if preload else "per-worker"
+        for n in counts:
+            r = run(n, preload, seconds)
+            totals[mode, n] = r["total_pss"]
+            print(f"{n:>7} {mode:<10} {r['total_pss']:>12.0f} {r['private']:>17.0f} {r['urls_per_s']:>8.0f} {r['errors']:>6}")
+    if len(counts) > 1:
+        span = counts[-1] - counts[0]
+        for mode in ("shared", "per-worker"):
+            extra = (totals[mode, counts[-1]] - totals[mode, counts[0]]) / span
+            print(f"Each extra worker ({mode} model): {extra:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# binary_protocol.py
+"""
+Length-prefixed binary protocol for the URL checker daemon (url_checker.py --serve-binary).
+
+Every frame, in either direction, is a little-endian u32 byte length followed
+by that many payload bytes. Payloads start with a u32 request id chosen by
+the client and a u8 opcode, so a client may pipeline any number of requests
+on one connection and match responses by id.
+
+Requests:
+    OP_CHECK    id, op, URL as UTF-8 (at most MAX_URL_BYTES)
+    OP_CLASSES  id, op (no body)
+
+Responses:
+    OP_CHECK    id, op, class_id i8, flags u8, explanation u8, score f32
+                -> always VERDICT_FRAME_SIZE (16) bytes on the wire, score 4-byte aligned
+    OP_CLASSES  id, op, class names as UTF-8 joined by "\\n" (class_id indexes this list)
+
+flags: FLAG_MALICIOUS (RESULT 1), FLAG_ERROR (check failed; class_id is -1 and the
+URL should be treated like the text protocol's "SUCCESS: false"). explanation
+indexes verdicts.EXPLANATIONS.
+"""
+
+import os
+import socket
+import struct
+import threading
+
+from verdicts import EXPLANATIONS
+from runtime_dir import runtime_dir
+
+DEFAULT_BINARY_SOCKET_PATH = os.path.join(runtime_dir(), "url_checker_bin.sock")
+
+OP_CHECK = 0
+OP_CLASSES = 1
+
+FLAG_MALICIOUS = 0x01
+FLAG_ERROR = 0x02
+
+MAX_URL_BYTES = 8192
+
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<IB")             # request_id, op
+VERDICT = struct.Struct("<IBbBBf")        # request_id, op, class_id, flags, explanation, score
+VERDICT_FRAME_SIZE = LENGTH.size + VERDICT.size  # 16 bytes
+
+
+class ProtocolError(Exception):
+    """Malformed frame; the connection cannot be resynchronised and must be closed"""
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return LENGTH.pack(len(payload)) + payload
+
+
+def encode_check(request_id: int, url: str) -> bytes:
+    data = url.encode("utf-8")
+    # The server drops the whole connection on an oversized frame, so refuse it here
+    if len(data) > MAX_URL_BYTES:
+        raise ValueError(f"URL is {len(data)} bytes; the binary protocol allows at most {MAX_URL_BYTES}")
+    return encode_frame(HEADER.pack(request_id, OP_CHECK) + data)
+
+
+def encode_classes_request(request_id: int) -> bytes:
+    return encode_frame(HEADER.pack(request_id, OP_CLASSES))
+
+
+def encode_verdict(request_id: int, class_id: int, flags: int, explanation: int, score: float) -> bytes:
+    return LENGTH.pack(VERDICT.size) + VERDICT.pack(request_id, OP_CHECK, class_id, flags, explanation, score)
+
+
+def encode_classes(request_id: int, class_names) -> bytes:
+    return encode_frame(HEADER.pack(request_id, OP_CLASSES) + "\n".join(class_names).encode("utf-8"))
+
+
+class FrameReader:
+    """Accumulate received bytes and split them into complete frame payloads"""
+
+    def __init__(self, max_frame: int = HEADER.size + MAX_URL_BYTES):
+        self.max_frame = max_frame
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """Add bytes; return every payload that is now complete"""
+        self._buffer += data
+        frames = []
+        offset = 0
+        while len(self._buffer) - offset >= LENGTH.size:
+            (length,) = LENGTH.unpack_from(self._buffer, offset)
+            if length < HEADER.size or length > self.max_frame:
+                raise ProtocolError(f"Bad frame length {length}")
+            end = offset + LENGTH.size + length
+            if end > len(self._buffer):
+                break
+            frames.append(bytes(self._buffer[offset + LENGTH.size:end]))
+            offset = end
+        del self._buffer[:offset]
+        return frames
+
+
+class BinaryClient:
+    """Reference client: one connection, pipelined requests.
+
+    ``check(url)`` and ``check_many(urls)`` return the same dicts as
+    predict_url (prediction, score, result, explanation). ``check_many``
+    writes every request before reading any response, so the server can
+    score them as one batch.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_BINARY_SOCKET_PATH, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._reader = FrameReader(max_frame=1 << 20)
+        self._pending = []
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.class_names = None
+
+    def connect(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._sock = sock
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        # Anything half-read belongs to the old connection
+        self._reader = FrameReader(max_frame=1 << 20)
+        self._pending = []
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _new_id(self):
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        return self._next_id
+
+    def _read_responses(self, wanted: set) -> dict:
+        """Read until a response has arrived for every id in wanted"""
+        responses = {}
+        while wanted - responses.keys():
+            if not self._pending:
+                data = self._sock.recv(65536)
+                if not data:
+                    raise ConnectionError("URL checker closed the connection")
+                self._pending = self._reader.feed(data)
+                continue
+            payload = self._pending.pop(0)
+            request_id, op = HEADER.unpack_from(payload)
+            responses[request_id] = (op, payload)
+        return responses
+
+    def _fetch_classes(self):
+        request_id = self._new_id()
+        self._sock.sendall(encode_classes_request(request_id))
+        op, payload = self._read_responses({request_id})[request_id]
+        self.class_names = payload[HEADER.size:].decode("utf-8").split("\n")
+
+    def _to_dict(self, payload: bytes) -> dict:
+        _, _, class_id, flags, explanation, score = VERDICT.unpack(payload)
+        if flags & FLAG_ERROR:
+            return {"prediction": "error", "score": 0, "result": 0, "explanation": None, "error": True}
+        prediction = self.class_names[class_id]
+        return {
+            "prediction": prediction,
+            "score": int(score) if prediction in ("benign", "not_a_url") else round(score, 2),
+            "result": 1 if flags & FLAG_MALICIOUS else 0,
+            "explanation": EXPLANATIONS[explanation] if explanation < len(EXPLANATIONS) else None,
+        }
+
+    def check_many(self, urls) -> list:
+        with self._lock:
+            try:
+                self.connect()
+                if self.class_names is None:
+                    self._fetch_classes()
+                ids = [self._new_id() for _ in urls]
+                requests = b"".join(encode_check(i, url) for i, url in zip(ids, urls))
+                self._sock.sendall(requests)
+                responses = self._read_responses(set(ids))
+            except (OSError, ProtocolError):
+                # Reconnect on the next call rather than reuse a connection in an unknown state
+                self.close()
+                raise
+        return [self._to_dict(responses[i][1]) for i in ids]
+
+    def check(self, url: str) -> dict:
+        return self.check_many([url])[0]
@@ -0,0 +1,136 @@
+# char_tokenizer.py
+
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class CharTokenizer:
+    """Vectorized encoder for the char-level Keras tokenizer saved by train_model.py.
+
+    The vocabulary is compiled once into a 256-entry lookup table (plus a dict
+    for code points above U+00FF). ``encode_batch`` then produces exactly what
+    ``pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=max_len)``
+    would: unknown characters are dropped, and sequences are pre-truncated and
+    pre-padded with zeros.
+    """
+
+    def __init__(self, word_index: dict, max_len: int, num_words: int = None, lower: bool = True, oov_index: int = None):
+        self.max_len = max_len
+        self.lower = lower
+        self.word_index = dict(word_index)
+        self.num_words = num_words
+        self.oov_index = oov_index
+
+        # 0 never appears in word_index, so it doubles as "drop this character"
+        self.unknown = oov_index or 0
+        self.lut = np.full(256, self.unknown, dtype=np.int32)
+        self.wide = {}
+        for char, index in word_index.items():
+            if len(char) != 1:
+                continue
+            if num_words and index >= num_words:
+                index = self.unknown
+            code_point = ord(char)
+            if code_point < 256:
+                self.lut[code_point] = index
+            else:
+                self.wide[code_point] = index
+
+    @classmethod
+    def from_keras(cls, tokenizer, max_len: int):
+        """Compile a fitted keras Tokenizer(char_level=True)"""
+        if not tokenizer.char_level:
+            raise ValueError("CharTokenizer only supports char-level tokenizers")
+        oov_index = tokenizer.word_index.get(tokenizer.oov_token) if tokenizer.oov_token else None
+        return cls(tokenizer.word_index, max_len, num_words=tokenizer.num_words, lower=tokenizer.lower, oov_index=oov_index)
+
+    @classmethod
+    def load(cls, path: str, max_len: int):
+        """Compile a pickled keras tokenizer (e.g. saved_models/tokenizer.pkl)"""
+        with open(path, "rb") as f:
+            return cls.from_keras(pickle.load(f), max_len)
+
+    def save(self, path: str, source_path: str = None):
+        """Write the vocabulary as JSON so it can be loaded without Keras.
+
+        If source_path (the tokenizer pickle) is given, its hash is recorded and
+        ``load_json`` refuses the file once the pickle changes.
+        """
+        data = {
+            "word_index": self.word_index,
+            "num_words": self.num_words,
+            "lower": self.lower,
+            "oov_index": self.oov_index,
+            "source_sha256": _sha256(source_path) if source_path else None,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load_json(cls, path: str, max_len: int, source_path: str = None):
+        """Load a vocabulary written by ``save``; returns None if it is stale"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if source_path and os.path.exists(source_path) and data.get("source_sha256") != _sha256(source_path):
+            return None
+        return cls(data["word_index"], max_len, num_words=data["num_words"], lower=data["lower"], oov_index=data["oov_index"])
+
+    def _lookup(self, text: str) -> np.ndarray:
+        """Map every character of text to its token index (0 = dropped)"""
+        try:
+            return self.lut[np.frombuffer(text.encode("latin-1"), dtype=np.uint8)]
+        except UnicodeEncodeError:
+            pass
+
+        code_points = np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype="<u4")
+        codes = self.lut[np.minimum(code_points, 255)]
+        wide = code_points > 255
+        if wide.any():
+            unique, inverse = np.unique(code_points[wide], return_inverse=True)
+            mapped = np.array([self.wide.get(int(cp), self.unknown) for cp in unique], dtype=np.int32)
+            codes[wide] = mapped[inverse]
+        return codes
+
+    def encode_batch(self, texts, out: np.ndarray = None) -> np.ndarray:
+        """Encode texts into an int32 [len(texts), max_len] array.
+
+        ``out`` may be a preallocated int32 array with at least len(texts) rows;
+        its first len(texts) rows are overwritten and returned.
+        """
+        n = len(texts)
+        if out is None:
+            out = np.zeros((n, self.max_len), dtype=np.int32)
+        else:
+            out = out[:n]
+            out.fill(0)
+        if n == 0:
+            return out
+
+        if self.lower:
+            texts = [text.lower() for text in texts]
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=n)
+
+        codes = self._lookup("".join(texts))
+        keep = codes != 0
+        rows = np.repeat(np.arange(n), lengths)[keep]
+        codes = codes[keep]
+
+        # Right-align each row's surviving tokens; anything left of column 0
+        # is what pad_sequences' truncating="pre" would cut off.
+        ends = np.cumsum(np.bincount(rows, minlength=n))
+        cols = self.max_len - ends[rows] + np.arange(codes.size)
+        visible = cols >= 0
+        out[rows[visible], cols[visible]] = codes[visible]
+        return out
+
+    def encode(self, text: str) -> np.ndarray:
+        """Encode a single text into an int32 [max_len] array"""
+        return self.encode_batch([text])[0]
@@ -1,33 +1,231 @@
-from sqlalchemy import create_engine, Column, String, Float, Integer, DateTime, JSON, Text
-from sqlalchemy.orm import declarative_base, sessionmaker
-from datetime import datetime
+from sqlalchemy import (create_engine, event, insert, Column, String, Float, Integer, SmallInteger, BigInteger, Text,
+                        ForeignKey, Index, TypeDecorator, literal, select, tuple_)
+from sqlalchemy.orm import contains_eager, declarative_base, relationship, sessionmaker
+from datetime import datetime, timedelta
+from hashlib import blake2b
 import json
+import os
 
-DATABASE_URL = "sqlite:///./url_logs.db"
+# 🗄️ Override to keep tests and benchmarks away from the real log database
+DATABASE_URL = os.environ.get("URL_LOG_DATABASE_URL", "sqlite:///./url_logs.db")
+
+# ⚙️ Applied to every new SQLite connection. WAL lets /logs readers run while the log writer commits;
+# synchronous=NORMAL only fsyncs at checkpoints (a power cut can lose the last commits, never corrupt the file).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,       # 64 MB page cache (negative = KiB)
+    "mmap_size": 268435456,     # Read up to 256 MB through mmap
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,       # ms to wait for the write lock instead of failing
+}
+
+# Bumped whenever migrate() learns a new step
+SCHEMA_VERSION = 2
+
+# 🏷️ Stored as url_logs.category_code (index into this tuple)
+CATEGORIES = ("SAFE", "DANGEROUS")
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+
+EPOCH = datetime(1970, 1, 1)
 
 Base = declarative_base()
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(bind=engine)
 
+@event.listens_for(engine, "connect")
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def url_hash(url: str) -> int:
+    """Signed 64-bit hash of a URL; the key of the urls table"""
+    return int.from_bytes(blake2b(url.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+class Microseconds(TypeDecorator):
+    """Naive UTC datetime stored as an integer count of microseconds since the epoch"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return (value - EPOCH) // timedelta(microseconds=1)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return EPOCH + timedelta(microseconds=value)
+
+class URLEntry(Base):
+    """Each distinct URL, stored once"""
+    __tablename__ = "urls"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)  # url_hash(url)
+    url = Column(String, nullable=False)
+
+class ReasonSet(Base):
+    """Each distinct list of reasons, stored once as JSON"""
+    __tablename__ = "reason_sets"
+
+    id = Column(Integer, primary_key=True)
+    reasons = Column(Text, nullable=False, unique=True)
+
 class URLLog(Base):
+    """One scan: fixed-width references into urls and reason_sets"""
     __tablename__ = "url_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
-    url = Column(String, nullable=False)
+    id = Column(Integer, primary_key=True)
+    url_id = Column(BigInteger, ForeignKey("urls.id"), nullable=False)
     score = Column(Float, nullable=False)
-    category = Column(String, nullable=False)
-    reasons = Column(Text)  # Store as JSON string
-    timestamp = Column(DateTime, default=datetime.utcnow)
-
-    def set_reasons(self, reasons_list):
-        """Set reasons as JSON string"""
-        self.reasons = json.dumps(reasons_list)
-    
+    category_code = Column(SmallInteger, nullable=False)
+    reason_set_id = Column(Integer, ForeignKey("reason_sets.id"))
+    timestamp = Column(Microseconds, default=datetime.utcnow, nullable=False, index=True)
+
+    url_entry = relationship(URLEntry, lazy="joined", innerjoin=True)
+    reason_set = relationship(ReasonSet, lazy="joined")
+
+    __table_args__ = (
+        Index("ix_url_logs_category_timestamp", "category_code", "timestamp"),
+        Index("ix_url_logs_url_timestamp", "url_id", "timestamp"),
+    )
+
+    @property
+    def url(self):
+        return self.url_entry.url
+
+    @property
+    def category(self):
+        return CATEGORIES[self.category_code]
+
     def get_reasons(self):
         """Get reasons as list"""
-        if self.reasons:
-            return json.loads(self.reasons)
+        if self.reason_set is not None:
+            return json.loads(self.reason_set.reasons)
         return []
 
-# Create table if it doesn't exist
-Base.metadata.create_all(bind=engine)
+def insert_logs(db, rows):
+    """Bulk-insert log rows given as dicts with url, score, category, reasons (list) and timestamp.
+
+    URLs and reason lists are interned first; ``db`` may be a Session or a
+    Connection and the caller commits. An "id" key, if present, is kept.
+    """
+    if not rows:
+        return
+    urls = {}
+    reason_texts = set()
+    for row in rows:
+        urls.setdefault(row["url"], url_hash(row["url"]))
+        reason_texts.add(json.dumps(row["reasons"]))
+
+    # With 64-bit keys a collision is vanishingly unlikely; if one happens the first URL seen keeps the slot
+    db.execute(insert(URLEntry.__table__).prefix_with("OR IGNORE"), [{"id": h, "url": u} for u, h in urls.items()])
+    db.execute(insert(ReasonSet.__table__).prefix_with("OR IGNORE"), [{"reasons": text} for text in reason_texts])
+    reason_ids = dict(db.execute(select(ReasonSet.reasons, ReasonSet.id).where(ReasonSet.reasons.in_(reason_texts))).all())
+
+    log_rows = []
+    for row in rows:
+        category = row["category"]
+        if category not in CATEGORY_CODES:
+            raise ValueError(f"Unknown category: {category} (expected one of {', '.join(CATEGORIES)})")
+        log_row = {
+            "url_id": urls[row["url"]],
+            "score": row["score"],
+            "category_code": CATEGORY_CODES[category],
+            "reason_set_id": reason_ids[json.dumps(row["reasons"])],
+            "timestamp": row.get("timestamp") or datetime.utcnow(),
+        }
+        if "id" in row:
+            log_row["id"] = row["id"]
+        log_rows.append(log_row)
+    db.execute(insert(URLLog.__table__), log_rows)
+
+def logs_query(category=None, since=None, until=None, url=None, url_prefix=None, before=None):
+    """SELECT for URLLog rows, newest first, ordered by (timestamp, id).
+
+    ``before`` is a (timestamp, id) keyset cursor: only rows strictly older
+    than it are returned, so paging never rescans earlier pages. ``since`` is
+    inclusive and ``until`` exclusive. ``url`` is an exact match answered from
+    the (url_id, timestamp) index and checked against the stored URL, so a
+    hash collision never returns another URL's rows; ``url_prefix`` is a
+    case-sensitive range match over the distinct URLs.
+    """
+    stmt = select(URLLog)
+    if category:
+        stmt = stmt.where(URLLog.category_code == CATEGORY_CODES.get(category, -1))
+    if since is not None:
+        stmt = stmt.where(URLLog.timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(URLLog.timestamp < until)
+    if url:
+        # The join checks the stored URL and also loads it, instead of a second eager join
+        stmt = stmt.join(URLLog.url_entry).options(contains_eager(URLLog.url_entry))
+        stmt = stmt.where(URLLog.url_id == url_hash(url), URLEntry.url == url)
+    if url_prefix:
+        matching = select(URLEntry.id).where(URLEntry.url >= url_prefix, URLEntry.url < url_prefix + "\U0010ffff")
+        stmt = stmt.where(URLLog.url_id.in_(matching))
+    if before is not None:
+        timestamp, log_id = before
+        stmt = stmt.where(tuple_(URLLog.timestamp, URLLog.id) < tuple_(literal(timestamp, URLLog.timestamp.type), log_id))
+    return stmt.order_by(URLLog.timestamp.desc(), URLLog.id.desc())
+
+def _parse_legacy_timestamp(value):
+    if value is None:
+        return EPOCH
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def migrate(bind=engine, batch_size=50000):
+    """Bring a database created by an older version up to SCHEMA_VERSION.
+
+    Databases from before version 2 keep full URL and reason strings on
+    every url_logs row. Their rows are copied in batches into the interned
+    layout, keeping the same ids, and the old table is then dropped. Safe to
+    run on every start: a current database is detected via PRAGMA
+    user_version and left alone.
+    """
+    with bind.connect() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        if version >= SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(url_logs)")}
+        if "url" in columns:
+            # Move the text layout aside; its indexes go with it but would clash by name
+            conn.exec_driver_sql("ALTER TABLE url_logs RENAME TO url_logs_text")
+            for (name,) in conn.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'url_logs_text' AND sql IS NOT NULL").fetchall():
+                conn.exec_driver_sql(f'DROP INDEX "{name}"')
+            conn.commit()
+        Base.metadata.create_all(conn)
+        conn.commit()
+
+        if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'url_logs_text'").first():
+            last_id = conn.exec_driver_sql("SELECT coalesce(max(id), 0) FROM url_logs").scalar()
+            while True:
+                legacy = conn.exec_driver_sql(
+                    "SELECT id, url, score, category, reasons, timestamp FROM url_logs_text WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+                if not legacy:
+                    break
+                insert_logs(conn, [
+                    {"id": row_id, "url": url, "score": score, "category": category,
+                     "reasons": json.loads(reasons) if reasons else [], "timestamp": _parse_legacy_timestamp(timestamp)}
+                    for row_id, url, score, category, reasons, timestamp in legacy
+                ])
+                conn.commit()
+                last_id = legacy[-1][0]
+            conn.exec_driver_sql("DROP TABLE url_logs_text")
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+
+def init_db(bind=engine):
+    """Create tables if they don't exist, then upgrade older databases in place.
+
+    Called once at startup (the API lifespan, the prefork master) rather than
+    on import, so importing this module never touches the database file.
+    """
+    Base.metadata.create_all(bind=bind)
+    migrate(bind)
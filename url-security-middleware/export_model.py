@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Export the trained CNN-LSTM model to lightweight runtimes.
+
+Writes next to the Keras model in saved_models/:
+  url_cnn_lstm_model.tflite   TensorFlow Lite (static batch of 1)
+  url_cnn_lstm_model.onnx     ONNX (dynamic batch, needs tf2onnx to export)
+  char_vocab.json             tokenizer vocabulary, loadable without Keras
+
+Usage: python3 export_model.py [--format tflite|onnx|all]
+"""
+
+import argparse
+import os
+import tempfile
+
+import tensorflow as tf
+
+from char_tokenizer import CharTokenizer
+from inference_backends import BACKEND_MODEL_PATHS
+
+MAX_LEN = 200  # Must match training
+TOKENIZER_PATH = r"saved_models/tokenizer.pkl"
+CHAR_VOCAB_PATH = r"saved_models/char_vocab.json"
+
+def export_tflite(model, path):
+    # Keras 3 LSTMs only lower to the fused TFLite kernel with a static batch size
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        model.export(saved_model_dir, format="tf_saved_model",
+                     input_signature=[tf.TensorSpec(shape=(1, MAX_LEN), dtype=tf.int32)], verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+        with open(path, "wb") as f:
+            f.write(converter.convert())
+
+def export_onnx(model, path):
+    model.export(path, format="onnx",
+                 input_signature=[tf.TensorSpec(shape=(None, MAX_LEN), dtype=tf.int32)], verbose=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the URL model for TFLite / ONNX Runtime")
+    parser.add_argument("--format", choices=["tflite", "onnx", "all"], default="all")
+    args = parser.parse_args()
+
+    print("💾 Exporting tokenizer vocabulary...")
+    CharTokenizer.load(TOKENIZER_PATH, MAX_LEN).save(CHAR_VOCAB_PATH, source_path=TOKENIZER_PATH)
+    print(f"  {CHAR_VOCAB_PATH}")
+
+    model = tf.keras.models.load_model(BACKEND_MODEL_PATHS["tensorflow"])
+    exporters = {"tflite": export_tflite, "onnx": export_onnx}
+    formats = exporters if args.format == "all" else [args.format]
+    for fmt in formats:
+        path = BACKEND_MODEL_PATHS[fmt]
+        print(f"💾 Exporting {fmt} model...")
+        exporters[fmt](model, path)
+        print(f"  {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    print("\n✅ Export complete. Run test_backends.py to check parity.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# inference_backends.py
+
+import threading
+import time
+import numpy as np
+
+BACKENDS = ("tensorflow", "tflite", "onnx")
+
+# Backends whose loaded model keeps working in a fork()ed child. TensorFlow's runtime
+# threads do not survive fork, so a forked worker must load its own TensorFlow model.
+FORK_SAFE_BACKENDS = ("tflite", "onnx")
+
+# Default artifact for each backend; tflite/onnx files are produced by export_model.py
+BACKEND_MODEL_PATHS = {
+    "tensorflow": r"saved_models/url_cnn_lstm_model.keras",
+    "tflite": r"saved_models/url_cnn_lstm_model.tflite",
+    "onnx": r"saved_models/url_cnn_lstm_model.onnx",
+}
+
+
+class TensorFlowBackend:
+    """Full TensorFlow/Keras runtime.
+
+    mode="compiled" calls a tf.function traced once with input signature
+    (None, max_len); mode="predict" goes through model.predict.
+    """
+
+    name = "tensorflow"
+
+    def __init__(self, model_path: str, max_len: int, mode: str = "compiled"):
+        start = time.perf_counter()
+        import tensorflow as tf
+        self.import_seconds = time.perf_counter() - start
+
+        self._tf = tf
+        self.mode = mode
+        self.model = tf.keras.models.load_model(model_path)
+        # Traced once for any batch size; skips predict()'s data adapter, callbacks and step loop
+        self._compiled_forward = tf.function(
+            lambda x: self.model(x, training=False),
+            input_signature=[tf.TensorSpec(shape=(None, max_len), dtype=tf.int32)],
+        )
+
+    def predict(self, padded: np.ndarray, mode: str = None) -> np.ndarray:
+        mode = mode or self.mode
+        if mode == "predict":
+            return self.model.predict(padded, verbose=0, batch_size=len(padded))
+        if mode == "compiled":
+            return self._compiled_forward(self._tf.constant(padded, dtype=self._tf.int32)).numpy()
+        raise ValueError(f"Unknown inference mode: {mode}")
+
+
+class TFLiteBackend:
+    """TensorFlow Lite interpreter (ai-edge-litert, tflite-runtime, or tf.lite as a last resort).
+
+    The exported model has a static batch of 1 (the LSTM only lowers to the
+    fused TFLite kernel with static shapes), so batches are run row by row.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path: str, max_len: int, num_threads: int = None):
+        start = time.perf_counter()
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+        self.import_seconds = time.perf_counter() - start
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]["index"]
+        output = self.interpreter.get_output_details()[0]
+        self._output = output["index"]
+        self._n_classes = int(output["shape"][-1])
+        # The interpreter holds mutable input/output tensors
+        self._lock = threading.Lock()
+
+    def predict(self, padded: np.ndarray) -> np.ndarray:
+        rows = []
+        with self._lock:
+            for row in padded:
+                self.interpreter.set_tensor(self._input, row[np.newaxis].astype(np.int32, copy=False))
+                self.interpreter.invoke()
+                rows.append(self.interpreter.get_tensor(self._output)[0].copy())
+        return np.stack(rows) if rows else np.zeros((0, self._n_classes), dtype=np.float32)
+
+
+class OnnxBackend:
+    """ONNX Runtime CPU session with a dynamic batch dimension"""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, max_len: int, num_threads: int = None):
+        start = time.perf_counter()
+        import onnxruntime as ort
+        self.import_seconds = time.perf_counter() - start
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0].name
+
+    def predict(self, padded: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self._input: padded.astype(np.int32, copy=False)})[0]
+
+
+def load_backend(name: str, max_len: int, model_path: str = None):
+    """Create the named backend; model_path defaults to BACKEND_MODEL_PATHS[name]"""
+    classes = {
+        "tensorflow": TensorFlowBackend,
+        "tflite": TFLiteBackend,
+        "onnx": OnnxBackend,
+    }
+    if name not in classes:
+        raise ValueError(f"Unknown inference backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return classes[name](model_path or BACKEND_MODEL_PATHS[name], max_len)
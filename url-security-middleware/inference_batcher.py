@@ -0,0 +1,113 @@
+# inference_batcher.py
+
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into one batched call.
+
+    Callers block in ``__call__`` while a single worker thread collects
+    requests for up to ``max_wait_ms`` (or until ``max_batch_size`` items are
+    queued), runs ``batch_fn`` once on the whole batch and hands every caller
+    its own result. ``batch_fn`` takes a list of items and must return a
+    sequence of results in the same order.
+
+    With an ``executor``, each batch runs on it instead, so the worker can
+    collect the next batch while earlier ones are still running.
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int = 64, max_wait_ms: float = 2.0, name: str = "micro-batcher",
+                 executor=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self.executor = executor
+
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._worker = None
+
+        # Counters (read without locking; approximate under concurrency)
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item) -> Future:
+        """Queue an item and return a Future for its result"""
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items) -> list:
+        """Queue several items at once; they are run in order, max_batch_size at a time"""
+        futures = [Future() for _ in items]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+            self._pending.extend(zip(items, futures))
+            self._cond.notify()
+        return futures
+
+    def __call__(self, item, timeout: float = None):
+        return self.submit(item).result(timeout)
+
+    def close(self):
+        """Stop accepting items; already queued items are still processed"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._worker is not None:
+            self._worker.join()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            # The window opens when the first item arrives, so no caller waits
+            # longer than max_wait for its batch to start.
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if self.executor is None:
+                self._run_batch(batch)
+            else:
+                self.executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        except BaseException as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(items)
+        for future, result in zip(futures, results):
+            future.set_result(result)
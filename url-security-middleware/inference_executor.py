@@ -0,0 +1,168 @@
+# inference_executor.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class ExecutorFull(Exception):
+    """Raised by BoundedExecutor.submit and AdmissionLimit.admit when every slot is taken"""
+
+
+class ExecutorClosed(Exception):
+    """Raised by BoundedExecutor.submit after shutdown() and AdmissionLimit.admit after close()"""
+
+
+class AdmissionLimit:
+    """Hard cap on items (e.g. URLs) accepted but not yet answered, without a thread per call.
+
+    ``admit(n)`` holds n of the ``max_pending`` slots for the duration of a
+    ``with`` block. When they are not free it raises ExecutorFull at once
+    (ExecutorClosed after ``close()``) instead of queueing, so callers can
+    shed load. Meant for work that waits on something else, such as the
+    micro-batcher, where BoundedExecutor would cap the batch size at its
+    thread count. A request larger than max_pending is admitted only when
+    nothing else is pending.
+    """
+
+    def __init__(self, max_pending: int = 512, name: str = "inference"):
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.max_pending = max_pending
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+
+        # Counters
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @contextmanager
+    def admit(self, n: int = 1):
+        """Hold n slots for the body of the with block; raises ExecutorFull when they are taken"""
+        with self._lock:
+            if self._closed:
+                raise ExecutorClosed(f"{self.name} is shut down")
+            if self._pending and self._pending + n > self.max_pending:
+                self.rejected += 1
+                raise ExecutorFull(f"{self.name} is full ({self._pending} items pending)")
+            self._pending += n
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pending -= n
+                self.completed += n
+
+    def close(self):
+        """Reject new items; already admitted ones finish normally"""
+        with self._lock:
+            self._closed = True
+
+    def stats(self) -> dict:
+        return {
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class BoundedExecutor:
+    """Thread pool with a hard cap on running plus queued work.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more
+    wait for a thread. Anything beyond that is rejected immediately with
+    ExecutorFull instead of queueing without bound, so callers can shed load
+    while latency is still low. ``wait_timer``, if given, observes how long
+    each call waited for a thread (anything with an ``observe(seconds)``).
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, name: str = "inference", wait_timer=None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_queue = max(0, max_queue)
+        self.name = name
+        self.wait_timer = wait_timer
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._closed = False
+
+        # Counters
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls accepted but still waiting for a thread"""
+        return self._in_flight - self._running
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _call(self, submitted_at, fn, args, kwargs):
+        if self.wait_timer is not None:
+            self.wait_timer.observe(time.perf_counter() - submitted_at)
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Schedule fn(*args, **kwargs); raises ExecutorFull when the queue is full"""
+        with self._lock:
+            if self._closed:
+                raise ExecutorClosed(f"{self.name} executor is shut down")
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorFull(f"{self.name} executor is full ({self._in_flight} calls in flight)")
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(self._call, time.perf_counter(), fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) on the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """Reject new calls; with wait=True, block until accepted calls finish"""
+        with self._lock:
+            self._closed = True
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
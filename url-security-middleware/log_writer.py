@@ -0,0 +1,179 @@
+# log_writer.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from metrics import stage
+
+_DB_WRITE_SECONDS = stage("db_write")
+
+DURABILITY_MODES = ("buffered", "commit")
+
+_STOP = object()
+
+
+class LogWriter:
+    """Write log rows from a background thread in bulk inserts.
+
+    ``log()`` puts a row on a bounded in-memory queue and returns at once;
+    the writer thread inserts whatever has accumulated in one transaction
+    every ``batch_size`` rows or ``flush_interval_ms`` milliseconds,
+    whichever comes first. When the queue is full the row is dropped and
+    counted in ``dropped`` rather than stalling the request.
+
+    Durability modes:
+      "buffered" - log() returns before the row is committed; a crash loses
+                   at most the rows still queued.
+      "commit"   - the Future returned by log() resolves only once the row's
+                   batch is committed, so callers can wait on it (group commit).
+    """
+
+    def __init__(self, session_factory, insert_rows, batch_size: int = 256, flush_interval_ms: float = 200.0,
+                 max_queue: int = 10000, durability: str = "buffered"):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability} (expected one of {', '.join(DURABILITY_MODES)})")
+        self.session_factory = session_factory
+        self.insert_rows = insert_rows  # insert_rows(session, list_of_row_dicts); the writer commits
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.durability = durability
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()  # Guards _thread and _closed; log() enqueues under it
+        self._closed = False
+
+        # Counters (dropped is updated without locking; approximate under concurrency)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        with self._lock:
+            self._start()
+        return self
+
+    def _start(self):
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="url-log-writer", daemon=True)
+            self._thread.start()
+
+    def log(self, url: str, score: float, category: str, reasons) -> Future:
+        """Queue one log row; returns a Future that resolves to True once written, False if dropped"""
+        future = Future()
+        row = {
+            "url": url,
+            "score": score,
+            "category": category,
+            "reasons": list(reasons),
+            "timestamp": datetime.utcnow(),
+        }
+        # Checked and queued under the lock, so no row can land behind close()'s stop marker
+        with self._lock:
+            if self._closed:
+                queued = False
+            else:
+                self._start()
+                try:
+                    self._queue.put_nowait((row, future))
+                    queued = True
+                except queue.Full:
+                    queued = False
+        if not queued:
+            self.dropped += 1
+            future.set_result(False)
+            return future
+        if self.durability == "buffered":
+            future.set_result(True)
+        return future
+
+    def log_results(self, results) -> list:
+        """log() every validate_url result; returns their Futures"""
+        return [self.log(r["url"], r["score"], r["category"], r["reasons"]) for r in results]
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _next_batch(self):
+        """Block for the first row, then collect until batch_size rows or the flush interval passes"""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            self.insert_rows(db, [row for row, _ in batch])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.failed += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            db.close()
+        _DB_WRITE_SECONDS.observe(time.perf_counter() - start)
+        self.written += len(batch)
+        self.flushes += 1
+        for _, future in batch:
+            if not future.done():
+                future.set_result(True)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+        # Rows queued after the stop marker are still written
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for i in range(0, len(leftover), self.batch_size):
+            self._write(leftover[i:i + self.batch_size])
+
+    def close(self, timeout: float = None):
+        """Stop accepting rows and flush everything already queued"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        # Blocks only if the queue is full, until the writer makes room
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "durability": self.durability,
+            "queue_depth": self.queue_depth,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
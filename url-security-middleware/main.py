@@ -1,10 +1,119 @@
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel, HttpUrl
+import asyncio
+import base64
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Literal, Optional
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, HttpUrl, TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
-from url_validator import validate_url
-from database import SessionLocal, URLLog
+from url_validator import validate_urls_async
+from database import SessionLocal, URLLog, init_db, insert_logs, logs_query
+from predict_url import warmup, enable_shared_verdicts, BATCH_MAX_SIZE
+from inference_executor import AdmissionLimit, ExecutorFull, ExecutorClosed
+from log_writer import LogWriter
+from metrics import registry, stage, Histogram, CONTENT_TYPE
 
-app = FastAPI(title="URL Security Analyzer API")
+# 📦 Largest batch accepted by /check-urls (larger requests get 413)
+MAX_BATCH_URLS = 100
+
+# 📜 /logs page size (default and maximum) and rows fetched per round trip when streaming NDJSON
+LOGS_PAGE_SIZE = 100
+LOGS_MAX_PAGE_SIZE = 1000
+LOGS_STREAM_CHUNK = 500
+
+# 🚦 Admission control: handlers await the micro-batcher directly (no thread per request), so batches
+# fill up to BATCH_MAX_SIZE. At most INFERENCE_MAX_PENDING URLs may be waiting for a verdict; requests
+# beyond that are rejected immediately (429 when full, 503 while shutting down).
+INFERENCE_MAX_PENDING = int(os.environ.get("URL_INFERENCE_MAX_PENDING", str(8 * BATCH_MAX_SIZE)))
+RETRY_AFTER_SECONDS = 1
+
+inference = AdmissionLimit(max_pending=INFERENCE_MAX_PENDING, name="inference")
+
+# 🗃️ Scan logs are written by a background thread in bulk inserts of up to LOG_BATCH_SIZE rows,
+# at least every LOG_FLUSH_MS. LOG_DURABILITY="commit" makes requests wait for their rows to commit;
+# "buffered" returns immediately. Rows beyond LOG_QUEUE_SIZE are dropped and counted.
+LOG_BATCH_SIZE = int(os.environ.get("URL_LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_MS = float(os.environ.get("URL_LOG_FLUSH_MS", "200"))
+LOG_QUEUE_SIZE = int(os.environ.get("URL_LOG_QUEUE_SIZE", "10000"))
+LOG_DURABILITY = os.environ.get("URL_LOG_DURABILITY", "buffered")
+
+log_writer = LogWriter(SessionLocal, insert_logs, batch_size=LOG_BATCH_SIZE, flush_interval_ms=LOG_FLUSH_MS,
+                       max_queue=LOG_QUEUE_SIZE, durability=LOG_DURABILITY)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model once at startup instead of on the first request
+    print(warmup().startup_report())
+    # Opt-in here (url_checker.py --serve publishes by default): share verdicts with a local proxy
+    if "URL_SHARED_VERDICTS" in os.environ:
+        enable_shared_verdicts()
+    init_db()
+    log_writer.start()
+    yield
+    inference.close()
+    # Flush queued log rows before the process exits
+    log_writer.close()
+
+app = FastAPI(title="URL Security Analyzer API", lifespan=lifespan)
+
+# 📊 Whole-request latency per endpoint, measured around the ASGI app so it includes request validation
+REQUEST_SECONDS = registry.register(Histogram(
+    "url_checker_request_seconds", "HTTP request latency by endpoint", labelnames=("path",)))
+_VALIDATE_SECONDS = stage("validate")
+
+class RequestTimer:
+    """Pure ASGI middleware (no per-request task or body buffering like BaseHTTPMiddleware)"""
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.timers = {path: REQUEST_SECONDS.labels(path) for path in paths}
+
+    async def __call__(self, scope, receive, send):
+        timer = self.timers.get(scope["path"]) if scope["type"] == "http" else None
+        if timer is None:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            timer.observe(time.perf_counter() - start)
+
+app.add_middleware(RequestTimer, paths=("/check-url", "/check-urls", "/logs"))
+
+def _collect_service_metrics():
+    return [
+        ("url_checker_inference_pending_urls", "gauge", "URLs admitted and waiting for a verdict", [({}, inference.pending)]),
+        ("url_checker_inference_rejected_total", "counter", "Checks rejected with 429 because too many URLs were pending",
+         [({}, inference.rejected)]),
+        ("url_checker_log_queue_depth", "gauge", "Log rows waiting for the background writer", [({}, log_writer.queue_depth)]),
+        ("url_checker_log_rows_written_total", "counter", "Log rows committed", [({}, log_writer.written)]),
+        ("url_checker_log_rows_dropped_total", "counter", "Log rows dropped because the queue was full", [({}, log_writer.dropped)]),
+        ("url_checker_log_rows_failed_total", "counter", "Log rows whose insert failed", [({}, log_writer.failed)]),
+    ]
+
+registry.add_collector(_collect_service_metrics)
+
+@app.exception_handler(ExecutorFull)
+async def inference_full_handler(request: Request, exc: ExecutorFull):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many URL checks in progress; retry shortly."},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+@app.exception_handler(ExecutorClosed)
+async def inference_closed_handler(request: Request, exc: ExecutorClosed):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "URL checker is shutting down."},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+_http_url = TypeAdapter(HttpUrl)
 
 # Pydantic models
 class URLRequest(BaseModel):
@@ -17,6 +126,20 @@ class URLResponse(BaseModel):
     reasons: list[str]
     status: str
 
+class URLBatchRequest(BaseModel):
+    urls: list[str]
+
+class URLVerdict(BaseModel):
+    url: str
+    status: str  # "allowed", "blocked" or "invalid"
+    score: Optional[float] = None
+    category: Optional[str] = None
+    reasons: list[str] = []
+
+class URLBatchResponse(BaseModel):
+    results: list[URLVerdict]
+    logged: bool
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -25,19 +148,23 @@ def get_db():
     finally:
         db.close()
 
+async def save_logs(results) -> bool:
+    """Queue scan results for the log writer. Returns False if any row was dropped or,
+    with LOG_DURABILITY="commit", failed to commit."""
+    futures = log_writer.log_results(results)
+    try:
+        written = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+    except Exception:
+        return False
+    return all(written)
+
 @app.post("/check-url", response_model=URLResponse)
-def check_url(request: URLRequest, db: Session = Depends(get_db)):
-    result = validate_url(request.url)
+async def check_url(request: URLRequest):
+    with inference.admit():
+        result = (await validate_urls_async([request.url]))[0]
 
     # Log to database
-    log_entry = URLLog(
-        url=result["url"],
-        score=result["score"],
-        category=result["category"]
-    )
-    log_entry.set_reasons(result["reasons"])
-    db.add(log_entry)
-    db.commit()
+    await save_logs([result])
 
     if result["category"] != "SAFE":
         raise HTTPException(
@@ -58,19 +185,132 @@ def check_url(request: URLRequest, db: Session = Depends(get_db)):
         "status": "URL is safe and allowed."
     }
 
+@app.post("/check-urls", response_model=URLBatchResponse)
+async def check_urls(request: URLBatchRequest):
+    """Check up to MAX_BATCH_URLS URLs in one batched inference pass.
+
+    Always answers 200 with one verdict per input URL, in input order.
+    Dangerous URLs are "blocked" rather than failing the request. Entries
+    that are not valid http(s) URLs are "invalid", get no score and are not
+    logged. Scored URLs go to the background log writer; logged=false means
+    some rows were dropped (queue full) or, in "commit" durability mode,
+    failed to commit. The verdicts are returned either way. If
+    inference itself fails, the whole request fails with 503 and nothing is
+    logged; when too many URLs are already pending it is rejected with 429.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=422, detail="urls must contain at least one URL.")
+    if len(request.urls) > MAX_BATCH_URLS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many URLs in one request ({len(request.urls)}); the limit is {MAX_BATCH_URLS}."
+        )
+
+    verdicts = [None] * len(request.urls)
+    valid_indices, valid_urls = [], []
+    start = time.perf_counter()
+    for i, raw_url in enumerate(request.urls):
+        try:
+            valid_urls.append(str(_http_url.validate_python(raw_url)))
+            valid_indices.append(i)
+        except ValidationError as e:
+            verdicts[i] = {"url": raw_url, "status": "invalid", "reasons": [e.errors()[0]["msg"]]}
+    _VALIDATE_SECONDS.observe(time.perf_counter() - start)
+
+    try:
+        results = []
+        if valid_urls:
+            with inference.admit(len(valid_urls)):
+                results = await validate_urls_async(valid_urls)
+    except (ExecutorFull, ExecutorClosed):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"URL classification failed: {e}")
+
+    for i, result in zip(valid_indices, results):
+        verdicts[i] = dict(result, status="allowed" if result["category"] == "SAFE" else "blocked")
+
+    # Log to database
+    logged = await save_logs(results) if results else True
+
+    return {"results": verdicts, "logged": logged}
+
+def encode_cursor(log: URLLog) -> str:
+    return base64.urlsafe_b64encode(f"{log.timestamp.isoformat()},{log.id}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(",")
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+def to_utc(value: Optional[datetime]):
+    """Timestamps are stored as naive UTC"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def log_to_dict(log: URLLog):
+    return {
+        "id": log.id,
+        "url": log.url,
+        "score": log.score,
+        "category": log.category,
+        "reasons": log.get_reasons(),
+        "timestamp": log.timestamp
+    }
+
+def stream_logs(stmt, limit: Optional[int]):
+    """Yield NDJSON lines while the cursor advances; uses its own session since it outlives the request"""
+    db = SessionLocal()
+    try:
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        for log in db.scalars(stmt.execution_options(yield_per=LOGS_STREAM_CHUNK)):
+            row = log_to_dict(log)
+            row["timestamp"] = log.timestamp.isoformat()
+            yield json.dumps(row) + "\n"
+    finally:
+        db.close()
+
 @app.get("/logs", summary="View scanned URL history")
-def get_logs(db: Session = Depends(get_db)):
-    logs = db.query(URLLog).order_by(URLLog.timestamp.desc()).all()
-    return [
-        {
-            "url": log.url,
-            "score": log.score,
-            "category": log.category,
-            "reasons": log.get_reasons(),
-            "timestamp": log.timestamp
-        }
-        for log in logs
-    ]
+def get_logs(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description=f"Rows per page (default {LOGS_PAGE_SIZE}, max {LOGS_MAX_PAGE_SIZE}); unlimited when streaming"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    category: Optional[str] = Query(None, description="SAFE or DANGEROUS"),
+    since: Optional[datetime] = Query(None, description="Only rows at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only rows before this time"),
+    url: Optional[str] = Query(None, description="Only this exact URL"),
+    url_prefix: Optional[str] = Query(None, description="Only URLs starting with this (case-sensitive)"),
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_db)
+):
+    """Newest logs first, paginated by keyset on (timestamp, id).
+
+    JSON mode returns one page; when more rows exist the X-Next-Cursor
+    header holds the cursor for the next one. format=ndjson streams every
+    matching row (up to ``limit``) as one JSON object per line.
+    """
+    before = decode_cursor(cursor) if cursor else None
+    stmt = logs_query(category=category, since=to_utc(since), until=to_utc(until), url=url,
+                      url_prefix=url_prefix, before=before)
+
+    if format == "ndjson":
+        return StreamingResponse(stream_logs(stmt, limit), media_type="application/x-ndjson")
+
+    limit = min(limit or LOGS_PAGE_SIZE, LOGS_MAX_PAGE_SIZE)
+    # One extra row tells us whether there is a next page
+    logs = db.scalars(stmt.limit(limit + 1)).all()
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1])
+    return [log_to_dict(log) for log in logs]
+
+@app.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,236 @@
+# model_session.py
+
+import hashlib
+import importlib
+import os
+import pickle
+import sys
+import threading
+import time
+import numpy as np
+
+from inference_backends import load_backend, FORK_SAFE_BACKENDS
+from char_tokenizer import CharTokenizer
+from verdicts import VerdictDecoder
+from metrics import stage
+
+_TOKENIZE_SECONDS = stage("tokenize")
+_INFERENCE_SECONDS = stage("inference")
+
+RELOAD_CHECK_INTERVAL = 5.0  # Seconds between checks of the artifact files for a retrained model
+
+
+def artifact_fingerprint(paths) -> bytes:
+    """16 bytes that change whenever one of the artifact files changes"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        try:
+            st = os.stat(path)
+            digest.update(f"{path}\0{st.st_mtime_ns}\0{st.st_size}\0".encode())
+        except OSError:
+            digest.update(f"{path}\0missing\0".encode())
+    return digest.digest()
+
+
+class ModelSession:
+    """Lazily loaded model, tokenizer and label encoder.
+
+    Nothing heavy (TensorFlow, ONNX Runtime, scikit-learn) is imported until
+    ``load()`` or the first inference, so allowlist/cache-only callers never
+    pay for it. ``warmup()`` loads everything and runs one forward pass so
+    the first real request is not the one that traces the graph.
+    ``startup_times`` records seconds spent in each phase.
+
+    Once loaded, the session notices changed artifact files (checked from
+    ``run()`` every RELOAD_CHECK_INTERVAL seconds) and reloads in the
+    background; the old model serves until the new one is warm. Listeners
+    added with ``add_reload_listener()`` run after each swap, which is where
+    caches of the old model's verdicts are dropped. ``fingerprint`` is
+    artifact_fingerprint() of the files the serving model was loaded from.
+    """
+
+    def __init__(self, backend_name: str, model_path: str, tokenizer_path: str, char_vocab_path: str,
+                 label_encoder_path: str, max_len: int, mode: str = None):
+        self.backend_name = backend_name
+        self.model_path = model_path
+        self.tokenizer_path = tokenizer_path
+        self.char_vocab_path = char_vocab_path
+        self.label_encoder_path = label_encoder_path
+        self.max_len = max_len
+        self.mode = mode
+
+        self.backend = None
+        self.char_tokenizer = None
+        self.decoder = None
+        self.startup_times = {}
+        self.fingerprint = None
+        self.generation = 0   # Bumped by every reload
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._reload_listeners = []
+        self._reload_thread = None
+        self._next_reload_check = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self.backend is not None
+
+    @property
+    def artifact_paths(self):
+        return (self.model_path, self.tokenizer_path, self.char_vocab_path, self.label_encoder_path)
+
+    def _timed(self, phase, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.startup_times[phase] = time.perf_counter() - start
+        return result
+
+    def _load_char_tokenizer(self):
+        # The exported JSON vocabulary avoids importing Keras just to unpickle the tokenizer
+        if os.path.exists(self.char_vocab_path):
+            char_tokenizer = CharTokenizer.load_json(self.char_vocab_path, self.max_len, source_path=self.tokenizer_path)
+            if char_tokenizer is not None:
+                return char_tokenizer
+        return CharTokenizer.load(self.tokenizer_path, self.max_len)
+
+    def _load_decoder(self):
+        with open(self.label_encoder_path, "rb") as f:
+            label_encoder = pickle.load(f)
+        return VerdictDecoder(label_encoder.classes_)
+
+    def load_labels(self) -> VerdictDecoder:
+        """Load only the class names (no model runtime); returns the decoder"""
+        if self.decoder is None:
+            with self._lock:
+                if self.decoder is None:
+                    self.decoder = self._timed("label_encoder", self._load_decoder)
+        return self.decoder
+
+    def load(self):
+        """Load every artifact once; safe to call from several threads"""
+        if self.loaded:
+            return self
+        with self._lock:
+            if self.loaded:
+                return self
+            # Taken first, so a file replaced while we load is noticed at the next check
+            fingerprint = artifact_fingerprint(self.artifact_paths)
+            backend = self._timed("backend", self._new_backend)
+            self.startup_times["import_runtime"] = getattr(backend, "import_seconds", 0.0)
+            if self.char_tokenizer is None:
+                self.char_tokenizer = self._timed("tokenizer", self._load_char_tokenizer)
+            if self.decoder is None:
+                self.decoder = self._timed("label_encoder", self._load_decoder)
+            self.fingerprint = fingerprint
+            self._next_reload_check = time.monotonic() + RELOAD_CHECK_INTERVAL
+            # Published last: other threads treat a non-None backend as "fully loaded"
+            self.backend = backend
+        return self
+
+    def _new_backend(self):
+        backend = load_backend(self.backend_name, self.max_len, self.model_path)
+        if self.mode and hasattr(backend, "mode"):
+            backend.mode = self.mode
+        return backend
+
+    def add_reload_listener(self, listener):
+        """Call listener(session) after every reload, once the new model is serving"""
+        self._reload_listeners.append(listener)
+        return listener
+
+    def reload(self):
+        """Load every artifact again, warm the new model up, then swap it in and run the listeners"""
+        with self._reload_lock:
+            fingerprint = artifact_fingerprint(self.artifact_paths)
+            backend = self._new_backend()
+            backend.predict(np.zeros((1, self.max_len), dtype=np.int32))
+            char_tokenizer = self._load_char_tokenizer()
+            decoder = self._load_decoder()
+            with self._lock:
+                self.char_tokenizer, self.decoder, self.backend = char_tokenizer, decoder, backend
+                self.fingerprint = fingerprint
+                self.generation += 1
+                self.reloads += 1
+            for listener in self._reload_listeners:
+                listener(self)
+        return self
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        except Exception as e:
+            # Probably a half-written file: keep serving the current model and retry at the next check
+            print(f"Model reload failed, keeping the current model: {e!r}", file=sys.stderr, flush=True)
+
+    def check_for_update(self):
+        """Start a background reload if the artifact files changed since the serving model was loaded"""
+        now = time.monotonic()
+        if now < self._next_reload_check or self.fingerprint is None:
+            return
+        with self._lock:
+            if now < self._next_reload_check or (self._reload_thread is not None and self._reload_thread.is_alive()):
+                return
+            self._next_reload_check = now + RELOAD_CHECK_INTERVAL
+            if artifact_fingerprint(self.artifact_paths) == self.fingerprint:
+                return
+            self._reload_thread = threading.Thread(target=self._reload_in_background, name="model-reload", daemon=True)
+            self._reload_thread.start()
+
+    def warmup(self):
+        """Load everything and run one forward pass (traces compiled graphs)"""
+        self.load()
+        self._timed("warmup", lambda: self.backend.predict(np.zeros((1, self.max_len), dtype=np.int32)))
+        return self
+
+    def preload(self):
+        """Load everything that can be shared with worker processes forked afterwards.
+
+        Fork-safe backends are fully warmed up. For TensorFlow only the
+        runtime import, tokenizer and labels are loaded here; each worker
+        then loads the model itself on top of the shared runtime.
+        """
+        if self.backend_name in FORK_SAFE_BACKENDS:
+            return self.warmup()
+        with self._lock:
+            if self.char_tokenizer is None:
+                self.char_tokenizer = self._timed("tokenizer", self._load_char_tokenizer)
+        self.load_labels()
+        if self.backend_name == "tensorflow":
+            self._timed("import_runtime", lambda: importlib.import_module("tensorflow"))
+        return self
+
+    def forward(self, padded: np.ndarray, mode: str = None) -> np.ndarray:
+        """Run the model on an int32 [batch, max_len] array and return NumPy probabilities"""
+        self.load()
+        if mode is None:
+            return self.backend.predict(padded)
+        return self.backend.predict(padded, mode=mode)
+
+    def run(self, urls, out: np.ndarray = None) -> np.ndarray:
+        """Tokenize a list of URLs and run one forward pass. Returns one probability row per URL."""
+        self.load()
+        self.check_for_update()
+        start = time.perf_counter()
+        padded = self.char_tokenizer.encode_batch(urls, out=out)
+        tokenized_at = time.perf_counter()
+        _TOKENIZE_SECONDS.observe(tokenized_at - start)
+        probs = self.forward(padded)
+        _INFERENCE_SECONDS.observe(time.perf_counter() - tokenized_at)
+        return probs
+
+    def startup_report(self) -> str:
+        """Human-readable per-phase startup breakdown"""
+        if not self.startup_times:
+            return "Model not loaded yet"
+        times = dict(self.startup_times)
+        import_s = times.pop("import_runtime", 0.0)
+        if "backend" in times:
+            times["backend"] -= import_s
+        phases = [("import_runtime", import_s)] + list(times.items())
+        labels = {"import_runtime": f"import {self.backend_name}", "backend": "load model"}
+        lines = [f"Startup breakdown ({self.backend_name} backend):"]
+        for phase, seconds in phases:
+            lines.append(f"  {labels.get(phase, phase):<20} {seconds * 1000:>9.1f} ms")
+        lines.append(f"  {'total':<20} {sum(s for _, s in phases) * 1000:>9.1f} ms")
+        return "\n".join(lines)
@@ -1,48 +1,81 @@
 # predict_url.py
 
-import tensorflow as tf
-import pickle
+import os
+import threading
+import time
 import numpy as np
-from tensorflow.keras.preprocessing.sequence import pad_sequences
+from concurrent.futures import Future
 from urllib.parse import urlparse
-
-# 🔃 Load model and pre-processing tools
-model = tf.keras.models.load_model(r"saved_models/url_cnn_lstm_model.keras")
-with open(r"saved_models/tokenizer.pkl", "rb") as f:
-    tokenizer = pickle.load(f)
-with open(r"saved_models/label_encoder.pkl", "rb") as f:
-    label_encoder = pickle.load(f)
+from inference_batcher import MicroBatcher
+from inference_backends import BACKEND_MODEL_PATHS
+from model_session import ModelSession
+from verdicts import VERDICT_DTYPE, EXPLANATIONS, EXPLAIN_ALLOWLISTED
+from verdict_cache import VerdictCache
+from shared_verdicts import SharedVerdictTable, DEFAULT_TABLE_PATH
+from allowlist import Allowlist
+from metrics import registry, stage, VERDICTS, ALLOWLIST_HITS
 
 MAX_LEN = 200  # Must match training
 THRESHOLD = 0.80  # Confidence threshold
 
-# ✅ Trusted allowlist of known safe domains
-allowlist = [
-    "www.google.com",
-    "google.com",
-    "www.microsoft.com",
-    "microsoft.com",
-    "github.com",
-    "www.github.com",
-    "www.wikipedia.org",
-    "wikipedia.org",
-    "httpbin.org",
-    "www.httpbin.org",
-    "example.com",
-    "www.example.com",
-    "stackoverflow.com",
-    "www.stackoverflow.com",
-    "reddit.com",
-    "www.reddit.com",
-    "youtube.com",
-    "www.youtube.com",
-    "facebook.com",
-    "www.facebook.com",
-    "twitter.com",
-    "www.twitter.com",
-    "linkedin.com",
-    "www.linkedin.com"
-]
+# ⚙️ Runtime: "tensorflow", "tflite" or "onnx" (run export_model.py first for the latter two)
+INFERENCE_BACKEND = os.environ.get("URL_INFERENCE_BACKEND", "tensorflow")
+
+# ⚡ TensorFlow inference path: "compiled" calls a traced tf.function of the model directly,
+# "predict" goes through model.predict (kept for comparison, see bench_inference.py)
+INFERENCE_MODE = "compiled"
+
+# Artifacts are resolved relative to this file, not the caller's working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, BACKEND_MODEL_PATHS.get(INFERENCE_BACKEND, ""))
+TOKENIZER_PATH = os.path.join(BASE_DIR, "saved_models", "tokenizer.pkl")
+CHAR_VOCAB_PATH = os.path.join(BASE_DIR, "saved_models", "char_vocab.json")
+LABEL_ENCODER_PATH = os.path.join(BASE_DIR, "saved_models", "label_encoder.pkl")
+
+# 🔃 Model and pre-processing tools load on first use (or session.warmup())
+session = ModelSession(
+    backend_name=INFERENCE_BACKEND,
+    model_path=MODEL_PATH,
+    tokenizer_path=TOKENIZER_PATH,
+    char_vocab_path=CHAR_VOCAB_PATH,
+    label_encoder_path=LABEL_ENCODER_PATH,
+    max_len=MAX_LEN,
+    mode=INFERENCE_MODE,
+)
+
+# ⏱️ Micro-batching: concurrent predict_url() calls share one forward pass
+BATCH_MAX_SIZE = 64     # Max URLs per forward pass
+BATCH_WINDOW_MS = 2.0   # Max time the first URL in a batch waits for company
+
+# 🗃️ Verdict cache: repeat URLs skip the model entirely
+VERDICT_CACHE_SIZE = 10000       # Max cached URLs (LRU eviction beyond this)
+VERDICT_CACHE_BENIGN_TTL = 600   # Seconds a benign verdict stays valid
+VERDICT_CACHE_MALICIOUS_TTL = 3600  # Seconds any other verdict stays valid
+
+verdict_cache = VerdictCache(
+    max_size=VERDICT_CACHE_SIZE,
+    benign_ttl=VERDICT_CACHE_BENIGN_TTL,
+    malicious_ttl=VERDICT_CACHE_MALICIOUS_TTL,
+)
+
+@session.add_reload_listener
+def _on_model_reload(session):
+    """The retrained model is serving now: forget the old one's verdicts"""
+    global _allowlisted_record
+    verdict_cache.clear()
+    _allowlisted_record = session.decoder.allowlisted()
+    if shared_verdicts is not None:
+        shared_verdicts.set_model(session.fingerprint, list(session.decoder.class_names))
+
+# 🧠 Shared-memory verdict table read directly by the C proxy (see shared_verdicts.py). Off until
+# enable_shared_verdicts(); url_checker.py --serve turns it on. URL_SHARED_VERDICTS=off disables it.
+SHARED_VERDICTS_PATH = os.environ.get("URL_SHARED_VERDICTS", DEFAULT_TABLE_PATH)
+shared_verdicts = None
+_allowlisted_record = None
+
+# ✅ Trusted allowlist of known safe domains (one entry per line, see allowlist.py)
+ALLOWLIST_PATH = os.path.join(BASE_DIR, "allowlist.txt")
+allowlist = Allowlist.load(ALLOWLIST_PATH)
 
 # 🔍 Input URLs for prediction
 urls = [
@@ -66,71 +99,239 @@ urls = [
     "http://example.com/%3Csvg/onload=alert(1)%3E"
 ]
 
-def predict_url(url: str):
-    """Predict class for a URL or string. Returns top-2 classes and confidences, with explanations for not_a_url/edge_case."""
+ALLOWLISTED_RESULT = {
+    "prediction": "benign",
+    "score": 0,
+    "result": 0,
+    "explanation": EXPLANATIONS[EXPLAIN_ALLOWLISTED]
+}
+
+# 📊 Stage timers, looked up once so the hot path only pays for perf_counter() and an observe()
+_PARSE_SECONDS = stage("parse")
+_ALLOWLIST_SECONDS = stage("allowlist")
+_CACHE_SECONDS = stage("cache")
+_BATCH_SECONDS = stage("batch")
+_DECODE_SECONDS = stage("decode")
+_verdict_counters = {}
+
+def _count_verdict(prediction, n=1):
+    counter = _verdict_counters.get(prediction)
+    if counter is None:
+        counter = _verdict_counters.setdefault(prediction, VERDICTS.labels(prediction))
+    counter.inc(n)
+
+def _collect_metrics():
+    """Gauges read only when /metrics is scraped"""
+    cache = verdict_cache.stats()
+    return [
+        ("url_checker_cache_hits_total", "counter", "Verdict cache hits", [({}, cache["hits"])]),
+        ("url_checker_cache_misses_total", "counter", "Verdict cache misses", [({}, cache["misses"])]),
+        ("url_checker_cache_evictions_total", "counter", "Verdicts evicted from the cache (LRU)", [({}, cache["evictions"])]),
+        ("url_checker_cache_size", "gauge", "Verdicts currently cached", [({}, cache["size"])]),
+        ("url_checker_batches_total", "counter", "Forward passes run by the micro-batcher", [({}, _batcher.batches)]),
+        ("url_checker_batched_urls_total", "counter", "URLs scored by the micro-batcher", [({}, _batcher.items)]),
+        ("url_checker_model_load_seconds", "gauge", "Model startup time by phase",
+         [({"phase": phase}, seconds) for phase, seconds in sorted(session.startup_times.items())]),
+        ("url_checker_model_loaded", "gauge", "1 once the model is loaded", [({}, int(session.loaded))]),
+        ("url_checker_model_reloads_total", "counter", "Retrained models swapped in without a restart", [({}, session.reloads)]),
+    ]
+
+def _collect_shared_metrics():
+    """Shared table counters, once enable_shared_verdicts() has run"""
+    if shared_verdicts is None:
+        return []
+    table = shared_verdicts.stats()
+    return [
+        ("url_checker_shared_verdicts_writes_total", "counter", "Verdicts written to the shared table", [({}, table["writes"])]),
+        ("url_checker_shared_verdicts_evictions_total", "counter", "Live entries replaced because their probe window was full",
+         [({}, table["evictions"])]),
+        ("url_checker_shared_verdicts_stale_total", "counter",
+         "Verdicts not published because the table already holds another model's",
+         [({}, table["fingerprint_mismatches"])]),
+    ]
+
+registry.add_collector(_collect_metrics)
+registry.add_collector(_collect_shared_metrics)
+
+def enable_shared_verdicts(path: str = SHARED_VERDICTS_PATH):
+    """Start publishing verdicts to the shared table at path; returns it (None when path is "off")"""
+    global shared_verdicts, _allowlisted_record
+    if not path or path.lower() == "off":
+        return None
+    # The table is stamped with the fingerprint of the model actually loaded
+    session.load()
+    decoder = session.decoder
+    _allowlisted_record = decoder.allowlisted()
+    shared_verdicts = SharedVerdictTable.open(path, class_names=list(decoder.class_names),
+                                              fingerprint=session.fingerprint)
+    return shared_verdicts
+
+def _share(items, fingerprint=None):
+    """Publish (url, record) pairs to the shared table, if enabled, with the verdict cache's TTLs.
+
+    fingerprint is the model the records came from (default: the one serving now).
+    """
+    if shared_verdicts is not None:
+        shared_verdicts.put_many([
+            (url, record, VERDICT_CACHE_BENIGN_TTL if record["result"] == 0 else VERDICT_CACHE_MALICIOUS_TTL)
+            for url, record in items
+        ], fingerprint or session.fingerprint)
+
+def _remember(items, generation, fingerprint):
+    """Cache and share fresh (url, record) pairs, unless the model was swapped while they were computed"""
+    if generation != session.generation:
+        return
+    for url, record in items:
+        verdict_cache.put(url, record)
+    _share(items, fingerprint)
+
+def warmup():
+    """Load the model now instead of on the first prediction; returns the session"""
+    return session.warmup()
+
+# Only the batcher thread uses this buffer, so it is reused for every batch
+_batch_buffer = np.zeros((BATCH_MAX_SIZE, MAX_LEN), dtype=np.int32)
+
+def _run_batch(items):
+    """Batcher callback: items are (url, is_invalid) pairs; returns one VERDICT_DTYPE record per item."""
+    probs = session.run([url for url, _ in items], out=_batch_buffer)
+    start = time.perf_counter()
+    records = session.decoder.decode(probs, invalid_url=[invalid for _, invalid in items])
+    _DECODE_SECONDS.observe(time.perf_counter() - start)
+    return records
+
+_batcher = MicroBatcher(_run_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_WINDOW_MS, name="predict-url-batcher")
+
+def _parse(url):
+    """Return (url, allowlisted, is_invalid). The model only runs when allowlisted is False."""
     # Convert HttpUrl object to string if needed
     if hasattr(url, '__str__'):
         url = str(url)
 
+    start = time.perf_counter()
     parsed = urlparse(url)
     domain = parsed.netloc.lower()
     scheme = parsed.scheme.lower()
+    parsed_at = time.perf_counter()
+    _PARSE_SECONDS.observe(parsed_at - start)
 
     # ✅ Check against allowlist (only for valid URLs with netloc)
-    if domain in allowlist and domain != "":
-        return {
-            "prediction": "benign",
-            "score": 0,
-            "result": 0,
-            "explanation": "Trusted domain (allowlisted)."
-        }
+    allowlisted = domain != "" and domain in allowlist
+    _ALLOWLIST_SECONDS.observe(time.perf_counter() - parsed_at)
+    if allowlisted:
+        ALLOWLIST_HITS.inc()
+        return url, True, False
 
     # ⚠️ Input validation: check if input is a valid URL
     is_valid_url = bool(domain) and bool(scheme)
-    warning = None
-    if not is_valid_url:
-        warning = "⚠️ Input is not a valid URL. Prediction may not be meaningful."
-
-    # 🔮 Predict using model regardless
-    seq = tokenizer.texts_to_sequences([url])
-    padded = pad_sequences(seq, maxlen=MAX_LEN)
-    prediction = model.predict(padded, verbose=0)[0]
-
-    top2_idx = prediction.argsort()[-2:][::-1]
-    top1, top2 = top2_idx[0], top2_idx[1]
-    class1 = label_encoder.inverse_transform([top1])[0]
-    class2 = label_encoder.inverse_transform([top2])[0]
-    conf1 = float(prediction[top1])
-    conf2 = float(prediction[top2])
-
-    explanation = None
-    if class1 == "not_a_url":
-        explanation = "Input does not appear to be a URL."
-    elif class1 == "edge_case":
-        explanation = "Input is a rare/edge-case URL (e.g., IP, FTP, encoded, or partial)."
-    elif warning:
-        explanation = warning
-    else:
-        explanation = None
-
-    # Assign score based on prediction
-    if class1 == "not_a_url":
-        score = 1
-    elif class1 == "benign":
-        score = 0
-    else:
-        # Malicious/edge/other: score is proportional to confidence, but always at least 0.1
-        score = max(0.1, round(conf1, 2))
-
-    # result: 0 if benign, 1 otherwise
-    result_flag = 0 if class1 == "benign" else 1
-
-    return {
-        "prediction": class1,
-        "score": score,
-        "result": result_flag,
-        "explanation": explanation
-    }
+    return url, False, not is_valid_url
+
+def predict_url(url: str):
+    """Predict class for a URL or string. Returns top-2 classes and confidences, with explanations for not_a_url/edge_case.
+
+    Concurrent callers are coalesced into a single batched forward pass (see BATCH_MAX_SIZE / BATCH_WINDOW_MS).
+    """
+    url, allowlisted, invalid = _parse(url)
+    if allowlisted:
+        _count_verdict("benign")
+        _share([(url, _allowlisted_record)])
+        return dict(ALLOWLISTED_RESULT)
+
+    start = time.perf_counter()
+    record = verdict_cache.get(url)
+    _CACHE_SECONDS.observe(time.perf_counter() - start)
+    if record is None:
+        # 🔮 Predict using model regardless
+        generation, fingerprint = session.generation, session.fingerprint
+        start = time.perf_counter()
+        record = _batcher((url, invalid))
+        _BATCH_SECONDS.observe(time.perf_counter() - start)
+        _remember([(url, record)], generation, fingerprint)
+    result = session.decoder.to_dict(record)
+    _count_verdict(result["prediction"])
+    return result
+
+def predict_batch(urls) -> np.ndarray:
+    """Predict a list of URLs, max BATCH_MAX_SIZE per forward pass.
+
+    The URLs go through the same micro-batcher as predict_url(), so the
+    model only ever runs on the batcher thread. Returns a VERDICT_DTYPE
+    structured array in input order; use session.decoder.to_dict(record)
+    for the predict_url dict of one record.
+    """
+    return submit_batch(urls).result()
+
+def submit_batch(urls) -> Future:
+    """predict_batch without blocking: returns a Future for the records.
+
+    Allowlist and cache lookups happen here; URLs that need the model are
+    queued on the micro-batcher and the Future completes on the batcher
+    thread once the last of them is scored, so async callers can await it
+    without holding a thread per request.
+    """
+    decoder = session.load_labels()
+    records = np.zeros(len(urls), dtype=VERDICT_DTYPE)
+    pending, pending_urls, pending_invalid = [], [], []
+    shared = []
+
+    for i, url in enumerate(urls):
+        url, allowlisted, invalid = _parse(url)
+        if allowlisted:
+            records[i] = decoder.allowlisted()
+            shared.append((url, records[i]))
+            continue
+        start = time.perf_counter()
+        cached = verdict_cache.get(url)
+        _CACHE_SECONDS.observe(time.perf_counter() - start)
+        if cached is not None:
+            records[i] = cached
+            continue
+        pending.append(i)
+        pending_urls.append(url)
+        pending_invalid.append(invalid)
+
+    _share(shared)
+    done = Future()
+    if not pending:
+        _count_records(records, decoder)
+        done.set_result(records)
+        return done
+
+    generation, fingerprint = session.generation, session.fingerprint
+    start = time.perf_counter()
+    futures = _batcher.submit_many(list(zip(pending_urls, pending_invalid)))
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def collect(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            for i, future in zip(pending, futures):
+                records[i] = future.result()
+        except BaseException as e:
+            done.set_exception(e)
+            return
+        _BATCH_SECONDS.observe(time.perf_counter() - start)
+        _remember([(url, records[i]) for i, url in zip(pending, pending_urls)], generation, fingerprint)
+        _count_records(records, decoder)
+        done.set_result(records)
+
+    for future in futures:
+        future.add_done_callback(collect)
+    return done
+
+def _count_records(records, decoder):
+    for class_id, n in enumerate(np.bincount(records["class_id"], minlength=len(decoder.class_names))):
+        if n:
+            _count_verdict(decoder.class_names[class_id], int(n))
+
+def predict_urls(urls):
+    """Like predict_batch, but returns a list of predict_url dicts"""
+    records = predict_batch(urls)
+    return [session.decoder.to_dict(record) for record in records]
 
 # Demo code for testing
 if __name__ == "__main__":
@@ -149,3 +350,4 @@ if __name__ == "__main__":
             # fallback for any tuple output
             print(f"  Prediction      : {result[0]}")
             print(f"  Confidence      : {result[1]:.2f}\n")
+    print(session.startup_report())
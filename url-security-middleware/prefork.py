@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Pre-fork launcher for the REST API (main.py).
+
+The parent process imports the app, loads as much of the model as can be
+shared (see ModelSession.preload), binds the listening socket and only then
+forks the workers. Everything loaded before the fork is shared
+copy-on-write, so an extra worker costs the pages it writes to rather than a
+whole TensorFlow runtime and model as with ``uvicorn --workers``. Every
+worker accept()s on the same inherited socket and the kernel hands each new
+connection to a worker that is waiting for one.
+
+The parent only supervises: a worker that dies is restarted, and SIGINT or
+SIGTERM is passed on to every worker, which drains its requests and flushes
+its log writer before exiting. Each worker keeps its own verdict cache and
+its own /metrics counters.
+
+Usage: python3 prefork.py [--workers N] [--host HOST] [--port PORT] [--no-preload]
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+# 👷 Worker processes (default: one per CPU)
+DEFAULT_WORKERS = int(os.environ.get("URL_SERVER_WORKERS", os.cpu_count() or 1))
+
+LISTEN_BACKLOG = 2048
+RESPAWN_DELAY = 1.0       # Seconds to wait before restarting a worker that died
+STARTUP_FAILURE = 3       # Worker exit code when the app failed to start (not restarted)
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that reports when it starts accepting connections"""
+
+    def __init__(self, config, index):
+        super().__init__(config)
+        self.index = index
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.started:
+            print(f"Worker {self.index} (pid {os.getpid()}) ready", flush=True)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(index, config, sock):
+    """Child process body; never returns"""
+    code = 1
+    try:
+        server = WorkerServer(config, index)
+        server.run(sockets=[sock])
+        code = 0 if server.started else STARTUP_FAILURE
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve main.py from pre-forked workers sharing one model copy")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes (default: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Let every worker load the model itself (like uvicorn --workers); for comparison")
+    parser.add_argument("--log-level", default="warning")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.workers < 1:
+        sys.exit("--workers must be at least 1")
+
+    from main import app
+    from database import engine, init_db
+    from predict_url import session
+
+    if not args.no_preload:
+        print(session.preload().startup_report(), flush=True)
+    # Migrate once here so the workers' lifespans find a current database
+    init_db()
+    # Connections opened by the migration must not be shared between processes
+    engine.dispose()
+
+    sock = bind_socket(args.host, args.port)
+    config = uvicorn.Config(app, lifespan="on", log_level=args.log_level, access_log=False)
+
+    # Objects that exist now are left alone by the workers' garbage collector, so
+    # collections do not write to (and un-share) the pages they live on
+    gc.freeze()
+
+    workers = {}  # pid -> worker index
+    stopping = False
+
+    def spawn(index):
+        # Signals stay blocked across fork() so a child never runs the parent's handler
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+            run_worker(index, config, sock)
+        workers[pid] = index
+        signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for index in range(args.workers):
+        spawn(index)
+    print(f"Serving http://{args.host}:{args.port} with {args.workers} workers "
+          f"({'shared' if not args.no_preload else 'per-worker'} model)", flush=True)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = workers.pop(pid, None)
+        if index is None or stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if code == STARTUP_FAILURE:
+            print(f"Worker {index} failed to start; shutting down", file=sys.stderr, flush=True)
+            stop(None, None)
+            continue
+        print(f"Worker {index} (pid {pid}) exited with {code}; restarting", file=sys.stderr, flush=True)
+        time.sleep(RESPAWN_DELAY)
+        if not stopping:
+            spawn(index)
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# proxy_log.py
+"""
+Reader for the proxy's security log (proxy/logs/url_security.log).
+
+The proxy writes one line per checked URL, either the original text format
+
+    [2025-08-12 23:34:28] URL: https://a.example/ | Safe: YES | Prediction: benign | Score: 0.000 | Explanation: None
+
+or, with URL_SECURITY_LOG_FORMAT=jsonl, one JSON object per line with the
+same fields. parse_line() turns either into the same dict:
+
+    {"timestamp": "2025-08-12 23:34:28", "url": ..., "safe": True,
+     "prediction": "benign", "score": 0.0, "explanation": None}
+
+The file is rotated by size (url_security.log -> .1 -> .2 ...).
+LogTail follows it across rotations, reading only the bytes appended since
+the last poll. last_entries() reads the newest lines from the end of the file.
+"""
+
+import json
+import os
+import re
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "proxy", "logs", "url_security.log")
+
+_TEXT_LINE = re.compile(
+    r"\[(?P<timestamp>[^\]]+)\] URL: (?P<url>.*?) \| Safe: (?P<safe>YES|NO) \| Prediction: (?P<prediction>.*?)"
+    r" \| Score: (?P<score>\S+) \| Explanation: (?P<explanation>.*)")
+
+READ_BLOCK = 65536
+
+
+def parse_line(line):
+    """One log line as a dict, or None for lines that are not check results (e.g. dropped-line notes)"""
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return None  # A line cut short by a crash
+        return entry if "url" in entry else None
+    match = _TEXT_LINE.fullmatch(line)
+    if match is None:
+        return None
+    explanation = match["explanation"]
+    return {
+        "timestamp": match["timestamp"],
+        "url": match["url"],
+        "safe": match["safe"] == "YES",
+        "prediction": match["prediction"],
+        "score": float(match["score"]),
+        "explanation": None if explanation == "None" else explanation,
+    }
+
+
+def _parse_lines(data: bytes):
+    entries = []
+    for raw in data.decode("utf-8", errors="replace").splitlines():
+        entry = parse_line(raw)
+        if entry is not None:
+            entries.append(entry)
+    return entries
+
+
+def last_entries(path: str = DEFAULT_LOG_PATH, n: int = 20):
+    """The newest n entries, oldest first, reading backwards from the end of the file"""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return []
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        data = b""
+        # n entries need at least n + 1 newlines (the first line read may be partial)
+        while end > 0 and data.count(b"\n") <= n:
+            start = max(0, end - READ_BLOCK)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+        if end > 0:
+            data = data[data.index(b"\n") + 1:]
+    return _parse_lines(data)[-n:]
+
+
+class LogTail:
+    """Follow the log like tail -F: poll() returns the entries appended since the last call.
+
+    A new file (rotation) is noticed by its inode; the rest of the old file
+    is read first, from url_security.log.1, so no entries are skipped.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, from_start: bool = False):
+        self.path = path
+        self._inode = None
+        self._offset = 0
+        self._partial = b""
+        if not from_start:
+            try:
+                st = os.stat(path)
+                self._inode, self._offset = st.st_ino, st.st_size
+            except FileNotFoundError:
+                pass
+
+    def _read_from(self, path, offset):
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        return data, offset + len(data)
+
+    def poll(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        data = b""
+        if self._inode is not None and st.st_ino != self._inode:
+            # Rotated: finish the old file, now at .1, then start the new one from the top
+            try:
+                if os.stat(self.path + ".1").st_ino == self._inode:
+                    data, _ = self._read_from(self.path + ".1", self._offset)
+            except FileNotFoundError:
+                pass
+            self._offset = 0
+        elif st.st_size < self._offset:
+            self._offset = 0  # Truncated in place
+        self._inode = st.st_ino
+        new, self._offset = self._read_from(self.path, self._offset)
+        data = self._partial + data + new
+        # Keep an unterminated last line for the next poll; the logger may be mid-write
+        complete, _, self._partial = data.rpartition(b"\n")
+        return _parse_lines(complete)
@@ -0,0 +1,51 @@
+# runtime_dir.py
+"""
+Private per-user directory for the checker's Unix domain sockets.
+
+A socket in /tmp can be bound by any user first, and whatever sits at a
+fixed /tmp path could be someone else's. The sockets live in
+$XDG_RUNTIME_DIR/url-checker instead, or /tmp/url-checker-<uid> without
+it: a 0700 directory owned by this user, so only this user can bind,
+replace or connect to them. proxy/UrlSecurity.c derives the same path
+(checker_socket_path()) and also checks the daemon's uid on connect.
+"""
+
+import os
+import stat
+
+RUNTIME_SUBDIR = "url-checker"   # Must match URL_CHECKER_RUNTIME_SUBDIR in proxy/UrlSecurity.h
+
+
+def runtime_dir() -> str:
+    """Directory the sockets go in by default (not created here)"""
+    base = os.environ.get("XDG_RUNTIME_DIR", "")
+    if base.startswith("/"):
+        return os.path.join(base, RUNTIME_SUBDIR)
+    return f"/tmp/{RUNTIME_SUBDIR}-{os.geteuid()}"
+
+
+def ensure_private_dir(path: str):
+    """Create path as a 0700 directory, or check that the existing one is ours and private"""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.geteuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by this user with mode 0700")
+
+
+def claim_socket_path(path: str):
+    """Make path free for bind(): remove our own stale socket, refuse anything else.
+
+    The default runtime directory is created (0700) if needed.
+    """
+    if os.path.dirname(os.path.abspath(path)) == runtime_dir():
+        ensure_private_dir(runtime_dir())
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.geteuid():
+        raise PermissionError(f"{path} exists and is not a socket owned by this user; not removing it")
+    os.unlink(path)
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Bulk URL scanner for access-log exports and threat-feed dumps.
+
+Streams URLs from a txt (one per line), CSV (``--column``, default "url")
+or JSONL file, optionally gzipped, shards them into batches across worker
+processes that each hold one model, and writes verdicts incrementally as
+JSONL or Parquet. Progress is checkpointed next to the output, so an
+interrupted scan continues where it stopped with ``--resume``.
+
+Usage:
+    python3 scan_urls.py malicious_phish.csv -o verdicts.jsonl
+    python3 scan_urls.py access.log.gz -o verdicts.parquet --workers 4
+    python3 scan_urls.py access.log.gz -o verdicts.parquet --workers 4 --resume
+"""
+
+import argparse
+import collections
+import csv
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from verdicts import EXPLANATIONS
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_ROWS_PER_PART = 500_000  # Parquet rows per part file (also the resume granularity)
+CHECKPOINT_INTERVAL = 1.0        # Seconds between checkpoint/progress updates
+
+PART_NAME = re.compile(r"part-(\d{5})\.parquet(\.tmp)?")
+
+# ---------------------------------------------------------------- input
+
+def detect_format(path):
+    """txt, csv or jsonl from the file name (a trailing .gz is ignored)"""
+    name = path[:-3] if path.endswith(".gz") else path
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "txt"
+
+class UrlReader:
+    """Iterate the URLs in a file without loading it into memory.
+
+    Blank lines, CSV rows without the column and JSON lines that fail to
+    parse are skipped. ``position`` is the number of (compressed) bytes
+    consumed so far, for the progress readout.
+    """
+
+    def __init__(self, path, input_format=None, column="url"):
+        self.path = path
+        self.input_format = input_format or detect_format(path)
+        self.column = column
+        self.size = os.path.getsize(path)
+        self._raw = open(path, "rb")
+        stream = gzip.GzipFile(fileobj=self._raw) if path.endswith(".gz") else self._raw
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+        self.skipped = 0
+
+    @property
+    def position(self):
+        return self._raw.tell()
+
+    def __iter__(self):
+        if self.input_format == "csv":
+            for row in csv.DictReader(self._text):
+                url = (row.get(self.column) or "").strip()
+                if url:
+                    yield url
+                else:
+                    self.skipped += 1
+        elif self.input_format == "jsonl":
+            for line in self._text:
+                if not line.strip():
+                    continue
+                try:
+                    url = json.loads(line).get(self.column)
+                except (ValueError, AttributeError):
+                    url = None
+                if isinstance(url, str) and url.strip():
+                    yield url.strip()
+                else:
+                    self.skipped += 1
+        else:
+            for line in self._text:
+                url = line.strip()
+                if url:
+                    yield url
+
+    def close(self):
+        self._text.close()
+        self._raw.close()
+
+def read_batches(urls, batch_size, skip=0):
+    """Group URLs into lists of batch_size, dropping the first ``skip`` URLs"""
+    batch = []
+    for i, url in enumerate(urls):
+        if i < skip:
+            continue
+        batch.append(url)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# ---------------------------------------------------------------- workers
+
+def _init_worker(backend):
+    """Runs once per worker process: pick the backend and load the model"""
+    if backend:
+        os.environ["URL_INFERENCE_BACKEND"] = backend
+    global predict_batch
+    from predict_url import predict_batch, warmup
+    warmup()
+
+def _scan_batch(urls):
+    return predict_batch(urls)
+
+def _start_pool(workers, backend):
+    # Workers are spawned, not forked, so none of them inherits a half-initialised runtime
+    context = multiprocessing.get_context("spawn")
+    return context.Pool(workers, initializer=_init_worker, initargs=(backend,))
+
+def _load_decoder():
+    from predict_url import session
+    return session.load_labels()
+
+# ---------------------------------------------------------------- output
+
+class JsonlWriter:
+    """Appends one JSON object per URL; resumes by truncating to the last checkpoint"""
+
+    def __init__(self, path, decoder, state=None):
+        self.path = path
+        self.decoder = decoder
+        if state:
+            self._file = open(path, "r+b")
+            self._file.truncate(state["offset"])
+            self._file.seek(state["offset"])
+        else:
+            self._file = open(path, "wb")
+
+    def write(self, first_row, urls, records):
+        lines = []
+        for i, (url, record) in enumerate(zip(urls, records)):
+            row = {"row": first_row + i, "url": url}
+            row.update(self.decoder.to_dict(record))
+            lines.append(json.dumps(row, ensure_ascii=False))
+        self._file.write(("\n".join(lines) + "\n").encode("utf-8"))
+        return len(urls)  # Rows that are safe to checkpoint once flushed
+
+    def checkpoint(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {"offset": self._file.tell()}
+
+    def close(self):
+        state = self.checkpoint()
+        self._file.close()
+        return state
+
+class ParquetWriter:
+    """Writes a directory of part-NNNNN.parquet files of up to rows_per_part rows.
+
+    Parts are written to a temporary name and renamed when complete, so a
+    checkpoint only ever points at finished files.
+    """
+
+    def __init__(self, path, decoder, state=None, rows_per_part=DEFAULT_ROWS_PER_PART):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("ERROR: Parquet output needs pyarrow (pip install pyarrow)")
+        self._pa, self._pq = pa, pq
+        self.path = path
+        self.decoder = decoder
+        self.rows_per_part = rows_per_part
+        self.parts = state["parts"] if state else 0
+        os.makedirs(path, exist_ok=True)
+        # Drop parts (or temp files) written after the last checkpoint; leave anything else alone
+        for name in os.listdir(path):
+            match = PART_NAME.fullmatch(name)
+            if match and (match[2] or int(match[1]) >= self.parts):
+                os.unlink(os.path.join(path, name))
+        self._buffer = []
+        self._buffered_rows = 0
+
+    def _columns(self, first_row, urls, records):
+        class_names = self.decoder.class_names
+        explanations = np.asarray(EXPLANATIONS, dtype=object)
+        return {
+            "row": np.arange(first_row, first_row + len(urls), dtype=np.int64),
+            "url": urls,
+            "prediction": class_names[records["class_id"]].tolist(),
+            "score": records["score"],
+            "result": records["result"],
+            "explanation": explanations[records["explanation"]].tolist(),
+        }
+
+    def _flush_part(self):
+        table = self._pa.concat_tables(self._buffer)
+        final = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        self._pq.write_table(table, final + ".tmp")
+        os.replace(final + ".tmp", final)
+        self.parts += 1
+        flushed = self._buffered_rows
+        self._buffer, self._buffered_rows = [], 0
+        return flushed
+
+    def write(self, first_row, urls, records):
+        self._buffer.append(self._pa.table(self._columns(first_row, urls, records)))
+        self._buffered_rows += len(urls)
+        if self._buffered_rows >= self.rows_per_part:
+            return self._flush_part()
+        return 0
+
+    def checkpoint(self):
+        return {"parts": self.parts}
+
+    def close(self):
+        if self._buffered_rows:
+            self._flush_part()
+        return self.checkpoint()
+
+# ---------------------------------------------------------------- driver
+
+def progress_path(output):
+    return output.rstrip("/") + ".progress"
+
+def load_progress(output, input_path):
+    """Return the saved checkpoint for this output, or None to start over"""
+    try:
+        with open(progress_path(output)) as f:
+            progress = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if progress.get("input") != os.path.abspath(input_path):
+        sys.exit(f"ERROR: {progress_path(output)} belongs to a scan of {progress.get('input')}")
+    return progress
+
+def output_intact(output, output_format, state):
+    """Whether the output still holds everything the checkpoint says was written"""
+    if output_format == "parquet":
+        return all(os.path.exists(os.path.join(output, f"part-{i:05d}.parquet")) for i in range(state["parts"]))
+    try:
+        return os.path.getsize(output) >= state["offset"]
+    except OSError:
+        return False
+
+def save_progress(output, progress):
+    tmp = progress_path(output) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp, progress_path(output))
+
+def format_progress(done, skipped_on_resume, malicious, elapsed, reader):
+    rate = (done - skipped_on_resume) / elapsed if elapsed > 0 else 0.0
+    pct = f"{100.0 * reader.position / reader.size:5.1f}% " if reader.size else ""
+    share = f"{100.0 * malicious / done:.1f}%" if done else "-"
+    return f"\r  {pct}{done:>12,} URLs  {rate:>9,.0f} URL/s  malicious {share}  "
+
+def scan(input_path, output, output_format=None, input_format=None, column="url", workers=None,
+         batch_size=DEFAULT_BATCH_SIZE, backend=None, resume=False, rows_per_part=DEFAULT_ROWS_PER_PART):
+    """Scan every URL in input_path and write verdicts to output. Returns the number of URLs written."""
+    decoder = _load_decoder()
+
+    output_format = output_format or ("parquet" if output.endswith(".parquet") else "jsonl")
+    workers = workers or os.cpu_count() or 1
+
+    progress = load_progress(output, input_path) if resume else None
+    if progress and progress.get("format") != output_format:
+        sys.exit(f"ERROR: {output} was started as {progress.get('format')}, not {output_format}")
+    if progress and not output_intact(output, output_format, progress["writer"]):
+        print(f"{output} is missing or shorter than its checkpoint; starting over", file=sys.stderr)
+        progress = None
+    state = progress["writer"] if progress else None
+    done = progress["rows"] if progress else 0
+
+    if output_format == "parquet":
+        writer = ParquetWriter(output, decoder, state, rows_per_part=rows_per_part)
+    else:
+        writer = JsonlWriter(output, decoder, state)
+    reader = UrlReader(input_path, input_format, column)
+    if done:
+        print(f"Resuming after {done:,} URLs", file=sys.stderr)
+
+    pool = _start_pool(workers, backend)
+    # Bounded window of in-flight batches: Pool.imap would read the whole input ahead
+    in_flight = collections.deque()
+    max_in_flight = workers * 2
+
+    resumed_from = done
+    submitted = done  # URLs read so far (row number of the next batch)
+    durable = done    # URLs whose output is covered by the writer checkpoint
+    malicious = durable_malicious = progress.get("malicious", 0) if progress else 0
+    unflushed = collections.deque()  # (rows, malicious) per batch written but not yet durable
+    start = last_update = time.monotonic()
+
+    def checkpoint(writer_state=None):
+        save_progress(output, {"input": os.path.abspath(input_path), "format": output_format,
+                               "rows": durable, "malicious": durable_malicious,
+                               "writer": writer_state or writer.checkpoint()})
+
+    def drain_one():
+        nonlocal done, durable, malicious, durable_malicious, last_update
+        first_row, urls, pending = in_flight.popleft()
+        records = pending.get()
+        batch_malicious = int(np.count_nonzero(records["result"]))
+        unflushed.append((len(urls), batch_malicious))
+        flushed = writer.write(first_row, urls, records)
+        durable += flushed
+        # Writers make whole batches durable, oldest first
+        while flushed > 0:
+            rows, rows_malicious = unflushed.popleft()
+            flushed -= rows
+            durable_malicious += rows_malicious
+        done += len(urls)
+        malicious += batch_malicious
+        now = time.monotonic()
+        if now - last_update >= CHECKPOINT_INTERVAL:
+            last_update = now
+            checkpoint()
+            print(format_progress(done, resumed_from, malicious, now - start, reader), end="", file=sys.stderr, flush=True)
+
+    try:
+        for batch in read_batches(reader, batch_size, skip=done):
+            in_flight.append((submitted, batch, pool.apply_async(_scan_batch, (batch,))))
+            submitted += len(batch)
+            while len(in_flight) >= max_in_flight:
+                drain_one()
+        while in_flight:
+            drain_one()
+    except KeyboardInterrupt:
+        pool.terminate()
+        reader.close()
+        checkpoint()
+        print(f"\nInterrupted after {durable:,} URLs; rerun with --resume to continue", file=sys.stderr)
+        sys.exit(130)
+
+    pool.close()
+    pool.join()
+    durable, durable_malicious = done, malicious
+    checkpoint(writer.close())
+    elapsed = time.monotonic() - start
+    print(format_progress(done, resumed_from, malicious, elapsed, reader), file=sys.stderr)
+    reader.close()
+    print(f"Scanned {done - resumed_from:,} URLs in {elapsed:.1f}s ({reader.skipped:,} input rows skipped) -> {output}",
+          file=sys.stderr)
+    return done
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan a file of URLs in bulk")
+    parser.add_argument("input", help="txt, csv or jsonl file, optionally .gz")
+    parser.add_argument("-o", "--output", required=True, help="verdicts.jsonl or a verdicts.parquet directory")
+    parser.add_argument("--output-format", choices=("jsonl", "parquet"), help="default: from the output name")
+    parser.add_argument("--input-format", choices=("txt", "csv", "jsonl"), help="default: from the input name")
+    parser.add_argument("--column", default="url", help="CSV column / JSON key holding the URL (default: url)")
+    parser.add_argument("--workers", type=int, help="worker processes, one model each (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="URLs per forward pass")
+    parser.add_argument("--backend", help="tensorflow, tflite or onnx (default: URL_INFERENCE_BACKEND)")
+    parser.add_argument("--rows-per-part", type=int, default=DEFAULT_ROWS_PER_PART, help="Parquet rows per part file")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted scan of the same input")
+    args = parser.parse_args()
+
+    scan(args.input, args.output, output_format=args.output_format, input_format=args.input_format,
+         column=args.column, workers=args.workers, batch_size=args.batch_size, backend=args.backend,
+         resume=args.resume, rows_per_part=args.rows_per_part)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+# shared_verdicts.py
+"""
+Memory-mapped verdict table shared with the C proxy (proxy/UrlSecurity.c).
+
+The Python side writes verdicts as it computes them. The proxy maps the
+same file read-only and answers repeat URLs with one probe of its own
+memory, without a round trip to the classifier.
+
+Layout (little-endian; must match url_verdict_entry_t and the
+URL_VERDICT_* defines in proxy/UrlSecurity.h):
+
+    0      header: magic, version, capacity, entry size, class and explanation counts,
+           hash key (16 random bytes), fingerprint of the model the entries came from (16 bytes)
+    64     class names, MAX_CLASSES x CLASS_NAME_BYTES (NUL padded UTF-8)
+    576    explanations, MAX_EXPLANATIONS x EXPLANATION_BYTES
+    4096   capacity x ENTRY_DTYPE (32 bytes each)
+
+Entries are keyed by url_key(url, key), SipHash-2-4 of the URL with ASCII
+letters lowercased under the table's random key, so nobody without read
+access to the table can make two URLs collide on purpose (0 marks an empty
+slot). A key lives in one of
+the PROBE_LIMIT slots after key & (capacity - 1) (linear probing). Slots are
+overwritten but never emptied, so a lookup stops at the first empty slot.
+When all of a key's slots are taken, the one expiring soonest is replaced.
+
+Readers never lock. Each entry has a seqlock counter: a writer makes it
+odd, writes the fields, then makes it even again, with a memory barrier
+(_fence) after the first and before the last step. A reader that sees an
+odd counter, or a different one after reading, treats the slot as a miss.
+Writers, possibly in several processes, serialise on flock() of the file.
+
+The file must belong to the user running the checker and must not be
+writable by anyone else; the proxy checks the same before trusting it.
+The header names the model (ModelSession.fingerprint) whose verdicts the
+table holds. open() and set_model() with another fingerprint expire every
+entry and record the new one; writers pass the fingerprint of the model
+that produced their verdicts, and put_many() drops them when it is not the
+table's. So a process still serving the old model while another (or its
+own reload) has moved the table on cannot publish stale verdicts.
+"""
+
+import fcntl
+import mmap
+import os
+import stat
+import struct
+import threading
+import time
+
+import numpy as np
+
+from verdicts import EXPLANATIONS
+
+# Must match URL_VERDICT_TABLE_PATH in proxy/UrlSecurity.h
+DEFAULT_TABLE_PATH = "/dev/shm/url_checker_verdicts"
+DEFAULT_CAPACITY = 65536  # Entries; a power of two (2 MB of entries)
+
+MAGIC = 0x31545655        # "UVT1"
+VERSION = 2
+PROBE_LIMIT = 8
+HEADER_SIZE = 4096
+# magic, version, capacity, entry_size, n_classes, n_explanations, hash key, model fingerprint
+HEADER = struct.Struct("<IIIIII16s16s")
+NO_FINGERPRINT = bytes(16)
+CLASS_NAMES_OFFSET = 64
+MAX_CLASSES = 16
+CLASS_NAME_BYTES = 32
+EXPLANATIONS_OFFSET = CLASS_NAMES_OFFSET + MAX_CLASSES * CLASS_NAME_BYTES
+MAX_EXPLANATIONS = 16
+EXPLANATION_BYTES = 128
+
+ENTRY_DTYPE = np.dtype([
+    ("seq", "<u4"),          # Seqlock counter: odd while a write is in progress
+    ("result", "u1"),        # 0 benign, 1 anything else
+    ("class_id", "i1"),      # Index into the class names in the header
+    ("explanation", "u1"),   # Index into the explanations in the header
+    ("_pad", "u1"),
+    ("key", "<u8"),          # url_key(url); 0 = empty slot
+    ("expires_ms", "<i8"),   # Unix time in ms (wall clock, comparable across processes)
+    ("score", "<f4"),
+    ("_pad2", "<u4"),
+])
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _sipround(v0, v1, v2, v3):
+    v0 = (v0 + v1) & _MASK64
+    v1 = ((v1 << 13) | (v1 >> 51)) & _MASK64 ^ v0
+    v0 = ((v0 << 32) | (v0 >> 32)) & _MASK64
+    v2 = (v2 + v3) & _MASK64
+    v3 = ((v3 << 16) | (v3 >> 48)) & _MASK64 ^ v2
+    v0 = (v0 + v3) & _MASK64
+    v3 = ((v3 << 21) | (v3 >> 43)) & _MASK64 ^ v0
+    v2 = (v2 + v1) & _MASK64
+    v1 = ((v1 << 17) | (v1 >> 47)) & _MASK64 ^ v2
+    v2 = ((v2 << 32) | (v2 >> 32)) & _MASK64
+    return v0, v1, v2, v3
+
+
+def siphash24(key: bytes, data: bytes) -> int:
+    """SipHash-2-4 of data under a 16-byte key (same as siphash24() in proxy/UrlSecurity.c)"""
+    k0, k1 = struct.unpack("<QQ", key)
+    v0, v1 = k0 ^ 0x736f6d6570736575, k1 ^ 0x646f72616e646f6d
+    v2, v3 = k0 ^ 0x6c7967656e657261, k1 ^ 0x7465646279746573
+    whole = len(data) & ~7
+    for m in struct.unpack_from(f"<{whole // 8}Q", data):
+        v3 ^= m
+        v0, v1, v2, v3 = _sipround(*_sipround(v0, v1, v2, v3))
+        v0 ^= m
+    m = ((len(data) & 0xFF) << 56) | int.from_bytes(data[whole:], "little")
+    v3 ^= m
+    v0, v1, v2, v3 = _sipround(*_sipround(v0, v1, v2, v3))
+    v0 ^= m
+    v2 ^= 0xFF
+    for _ in range(4):
+        v0, v1, v2, v3 = _sipround(v0, v1, v2, v3)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def url_key(url: str, key: bytes) -> int:
+    """Slot key of a URL: SipHash-2-4 of its UTF-8 bytes with ASCII letters lowercased; never 0"""
+    return siphash24(key, url.encode("utf-8").lower()) or 1
+
+
+_FENCE_LOCK = threading.Lock()
+
+
+def _fence():
+    """Full memory barrier: POSIX requires lock operations to synchronize memory,
+    so stores before this call are visible to other CPUs before stores after it"""
+    _FENCE_LOCK.acquire()
+    _FENCE_LOCK.release()
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class SharedVerdictTable:
+    """One process's handle on the shared table; open() creates the file on first use"""
+
+    def __init__(self, path: str, fd: int, mm: mmap.mmap, capacity: int):
+        self.path = path
+        self._fd = fd
+        self._mmap = mm
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.entries = np.frombuffer(mm, dtype=ENTRY_DTYPE, count=capacity, offset=HEADER_SIZE)
+        header = HEADER.unpack_from(mm)
+        self.class_names = self._read_strings(CLASS_NAMES_OFFSET, CLASS_NAME_BYTES, header[4])
+        self._key = header[6]
+        self._lock = threading.Lock()
+
+        # Counters (written under the lock; read without it)
+        self.writes = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.fingerprint_mismatches = 0
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_TABLE_PATH, capacity: int = DEFAULT_CAPACITY, class_names=(),
+             explanations=EXPLANATIONS, fingerprint: bytes = None):
+        """Map the table at path, creating and initialising it if it does not exist yet.
+
+        An existing table keeps its capacity and hash key; one holding verdicts of
+        a model other than fingerprint (if given) is expired first. A file with
+        another layout, owned by another user or writable by group or others
+        raises ValueError.
+        """
+        if capacity < PROBE_LIMIT or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two of at least PROBE_LIMIT")
+        if len(class_names) > MAX_CLASSES or len(explanations) > MAX_EXPLANATIONS:
+            raise ValueError("too many class names or explanations for the table header")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o644)
+        try:
+            st = os.fstat(fd)
+            if not stat.S_ISREG(st.st_mode) or st.st_uid != os.geteuid() or st.st_mode & 0o022:
+                raise ValueError(f"{path} must be a regular file owned by this user and not writable by others")
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                size = st.st_size
+                if size == 0:
+                    os.ftruncate(fd, HEADER_SIZE + capacity * ENTRY_DTYPE.itemsize)
+                    size = os.fstat(fd).st_size
+                mm = mmap.mmap(fd, size)
+                magic, version, existing_capacity, entry_size, _, _, key, _ = HEADER.unpack_from(mm)
+                if magic == 0:
+                    HEADER.pack_into(mm, 0, MAGIC, VERSION, capacity, ENTRY_DTYPE.itemsize, 0, 0,
+                                     os.urandom(16), fingerprint or NO_FINGERPRINT)
+                elif (magic, version, entry_size) != (MAGIC, VERSION, ENTRY_DTYPE.itemsize) or \
+                        size != HEADER_SIZE + existing_capacity * ENTRY_DTYPE.itemsize:
+                    mm.close()
+                    raise ValueError(f"{path} is not a version {VERSION} verdict table")
+                capacity = HEADER.unpack_from(mm)[2]
+                if class_names and fingerprint is None:
+                    cls._write_header_strings(mm, class_names, explanations)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(fd)
+            raise
+        table = cls(path, fd, mm, capacity)
+        if fingerprint is not None:
+            table.set_model(fingerprint, class_names, explanations)
+        return table
+
+    @staticmethod
+    def _write_header_strings(mm, class_names, explanations):
+        for offset, width, strings in ((CLASS_NAMES_OFFSET, CLASS_NAME_BYTES, class_names),
+                                       (EXPLANATIONS_OFFSET, EXPLANATION_BYTES, explanations)):
+            for i, text in enumerate(strings):
+                raw = (text or "").encode("utf-8")[:width - 1]
+                mm[offset + i * width:offset + (i + 1) * width] = raw.ljust(width, b"\0")
+        header = list(HEADER.unpack_from(mm))
+        header[4:6] = len(class_names), len(explanations)
+        HEADER.pack_into(mm, 0, *header)
+
+    def _read_strings(self, offset, width, count):
+        return [self._mmap[offset + i * width:offset + (i + 1) * width].split(b"\0", 1)[0].decode("utf-8")
+                for i in range(count)]
+
+    def _slot_for(self, key: int) -> int:
+        """Slot to write key into (caller holds the locks)"""
+        keys = self.entries["key"]
+        expires = self.entries["expires_ms"]
+        victim, victim_expires = None, None
+        for probe in range(PROBE_LIMIT):
+            slot = (key + probe) & self._mask
+            slot_key = int(keys[slot])
+            if slot_key == key or slot_key == 0:
+                return slot
+            if victim is None or expires[slot] < victim_expires:
+                victim, victim_expires = slot, expires[slot]
+        self.evictions += 1
+        return victim
+
+    def _write(self, key, result, class_id, explanation, score, expires_ms):
+        slot = self._slot_for(key)
+        entry = self.entries[slot:slot + 1]
+        seq = int(entry["seq"][0])
+        entry["seq"] = seq + 1
+        _fence()  # Readers must see the odd counter before any field changes
+        entry["key"] = key
+        entry["result"] = result
+        entry["class_id"] = class_id
+        entry["explanation"] = explanation
+        entry["score"] = score
+        entry["expires_ms"] = expires_ms
+        _fence()  # ... and every field before the counter is even again
+        entry["seq"] = seq + 2
+        self.writes += 1
+
+    def _header_fingerprint(self) -> bytes:
+        return HEADER.unpack_from(self._mmap)[7]
+
+    def put_many(self, items, fingerprint: bytes = None):
+        """Write (url, record, ttl_seconds) items; record is a VERDICT_DTYPE record or anything with
+        result/class_id/explanation/score fields.
+
+        fingerprint names the model the records came from; if the table now holds
+        another model's verdicts the items are dropped (and counted) instead.
+        """
+        now = _now_ms()
+        rows = [(url_key(url, self._key), int(record["result"]), int(record["class_id"]), int(record["explanation"]),
+                 float(record["score"]), now + int(ttl * 1000)) for url, record, ttl in items]
+        if not rows:
+            return
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if fingerprint is not None and fingerprint != self._header_fingerprint():
+                    self.fingerprint_mismatches += len(rows)
+                    return
+                for row in rows:
+                    self._write(*row)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def put(self, url: str, record, ttl: float, fingerprint: bytes = None):
+        self.put_many([(url, record, ttl)], fingerprint)
+
+    def get(self, url: str):
+        """Lock-free lookup, as the proxy does it; returns an ENTRY_DTYPE record copy or None"""
+        key = url_key(url, self._key)
+        for probe in range(PROBE_LIMIT):
+            slot = (key + probe) & self._mask
+            before = int(self.entries["seq"][slot])
+            _fence()
+            entry = self.entries[slot].copy()
+            _fence()
+            if before & 1 or int(self.entries["seq"][slot]) != before:
+                return None  # Being rewritten: a miss, the caller asks the model
+            if entry["key"] == 0:
+                return None
+            if entry["key"] == key:
+                return entry if entry["expires_ms"] > _now_ms() else None
+        return None
+
+    def _expire_all(self):
+        """Expire every entry (caller holds the locks). Keys stay so probe chains stay intact."""
+        for slot in np.flatnonzero(self.entries["expires_ms"]):
+            seq = int(self.entries["seq"][slot])
+            self.entries["seq"][slot] = seq + 1
+            _fence()
+            self.entries["expires_ms"][slot] = 0
+            _fence()
+            self.entries["seq"][slot] = seq + 2
+        self.invalidations += 1
+
+    def clear(self):
+        """Expire every entry"""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._expire_all()
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def set_model(self, fingerprint: bytes, class_names=(), explanations=EXPLANATIONS):
+        """Record the model now serving (after a reload). A different fingerprint than the
+        table's expires every entry first; class_names, if given, replace the header's."""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if fingerprint != self._header_fingerprint():
+                    self._expire_all()
+                    header = list(HEADER.unpack_from(self._mmap))
+                    header[7] = fingerprint
+                    HEADER.pack_into(self._mmap, 0, *header)
+                if class_names:
+                    self._write_header_strings(self._mmap, class_names, explanations)
+                    self.class_names = list(class_names)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._mmap is not None:
+            del self.entries
+            self._mmap.close()
+            os.close(self._fd)
+            self._mmap = None
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "used": int(np.count_nonzero(self.entries["key"])),
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "fingerprint_mismatches": self.fingerprint_mismatches,
+        }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Stub URL classifier for testing and benchmarking the proxy without TensorFlow.
+
+Speaks the same line protocol as ``url_checker.py --serve`` on the same
+default socket: one URL per line in, one KEY: value block ending in an
+empty line out. It loads no model and imports nothing outside the standard
+library but runtime_dir.py. A URL is "phishing" when it contains one of MALICIOUS_MARKERS and
+"benign" otherwise, so results are predictable. --delay-ms adds a fixed
+per-URL sleep to stand in for model latency.
+
+Usage: python3 stub_checker.py [--socket PATH] [--delay-ms N]
+"""
+
+import argparse
+import os
+import socketserver
+import threading
+import time
+
+from runtime_dir import runtime_dir, claim_socket_path
+
+# Must match checker_socket_path() in proxy/UrlSecurity.c (and DEFAULT_SOCKET_PATH in url_checker.py)
+DEFAULT_SOCKET_PATH = os.path.join(runtime_dir(), "url_checker.sock")
+
+MALICIOUS_MARKERS = ("phish", "malware", "evil", "free-bitcoin")
+
+
+def classify(url):
+    """Deterministic verdict in the KEY: value format of url_checker.format_result"""
+    malicious = any(marker in url.lower() for marker in MALICIOUS_MARKERS)
+    return [
+        f"URL: {url}",
+        f"PREDICTION: {'phishing' if malicious else 'benign'}",
+        f"SCORE: {0.99 if malicious else 0}",
+        f"RESULT: {1 if malicious else 0}",
+        "EXPLANATION: Stub classifier (no model loaded).",
+        "SUCCESS: true",
+    ]
+
+
+class StubRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw_line in self.rfile:
+            url = raw_line.decode("utf-8", errors="replace").strip()
+            if not url:
+                continue
+            if self.server.delay:
+                time.sleep(self.server.delay)
+            with self.server.lock:
+                self.server.checks += 1
+            try:
+                self.wfile.write(("\n".join(classify(url)) + "\n\n").encode("utf-8"))
+            except (BrokenPipeError, ConnectionResetError):
+                break
+
+
+class StubServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, delay):
+        super().__init__(socket_path, StubRequestHandler)
+        self.delay = delay
+        self.checks = 0
+        self.lock = threading.Lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub URL classifier (no model) for proxy tests")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Sleep per URL to emulate inference time")
+    args = parser.parse_args()
+
+    claim_socket_path(args.socket)
+    server = StubServer(args.socket, args.delay_ms / 1000.0)
+    print(f"Stub URL checker listening on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            claim_socket_path(args.socket)
+        except OSError:
+            pass
+        print(f"Answered {server.checks} checks", flush=True)
+
+
+if __name__ == "__main__":
+    main()
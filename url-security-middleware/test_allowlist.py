@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import time
+from allowlist import Allowlist
+
+# Test the Allowlist without loading the model
+def test_matching():
+    """Exact hosts, registrable domains, wildcards, ports and userinfo"""
+    allowlist = Allowlist(["google.com", "www.example.org", "*.corp.example.net", "github.io"])
+    allowed = ["google.com", "mail.google.com", "GOOGLE.COM:443", "user@www.google.com", "www.example.org",
+               "a.corp.example.net", "x.y.corp.example.net", "google.com."]
+    blocked = ["", "google.com.evil.ru", "evilgoogle.com", "example.org", "corp.example.net",
+               "pages.github.io", "github.com@evil.ru"]
+    for host in allowed:
+        assert host in allowlist, f"{host} should be allowlisted"
+    for host in blocked:
+        assert host not in allowlist, f"{host} should not be allowlisted"
+    print(f"{len(allowed)} allowed and {len(blocked)} blocked hosts matched as expected")
+
+def test_file_and_scale():
+    """The shipped allowlist loads, and lookups stay flat with many entries"""
+    shipped = Allowlist.load("allowlist.txt")
+    assert "www.github.com" in shipped and "github.com:443" in shipped
+
+    big = Allowlist(f"site{i}.com" for i in range(50000))
+    start = time.perf_counter()
+    for i in range(10000):
+        assert f"www.site{i}.com" in big
+        assert f"www.other{i}.com" not in big
+    per_lookup = (time.perf_counter() - start) / 20000 * 1e6
+    print(f"50k entries: {per_lookup:.1f} us per lookup")
+
+if __name__ == "__main__":
+    print("Testing Allowlist...")
+    test_matching()
+    print("-" * 50)
+    test_file_and_scale()
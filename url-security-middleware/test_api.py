@@ -1,17 +1,18 @@
 #!/usr/bin/env python3
 
-import requests
-import json
+from url_client import URLCheckerClient
 
 # Test the API endpoints
 base_url = "http://localhost:8000"
+client = URLCheckerClient(base_url, timeout=30)
 
 def test_logs():
     """Test the logs endpoint"""
     try:
-        response = requests.get(f"{base_url}/logs")
-        print(f"Logs endpoint status: {response.status_code}")
-        print(f"Response: {response.text}")
+        rows, next_cursor = client.logs(limit=5)
+        print(f"Logs returned: {len(rows)} rows")
+        print(f"Response: {rows}")
+        print(f"Next cursor: {next_cursor}")
     except Exception as e:
         print(f"Error testing logs: {e}")
 
@@ -19,14 +20,38 @@ def test_check_url():
     """Test the check-url endpoint"""
     try:
         data = {"url": "https://www.google.com"}
-        response = requests.post(f"{base_url}/check-url", json=data)
+        # The single-URL endpoint answers 403 for dangerous URLs, so call it directly on the pooled session
+        response = client.session.post(f"{base_url}/check-url", json=data, timeout=client.timeout)
         print(f"Check URL endpoint status: {response.status_code}")
         print(f"Response: {response.text}")
     except Exception as e:
         print(f"Error testing check-url: {e}")
 
+def test_check_urls():
+    """Test the batch check-urls endpoint"""
+    try:
+        verdicts = client.check_many(["https://www.google.com", "http://free-bitcoin.ru/get-rich-now", "not a url"])
+        for verdict in verdicts:
+            print(f"Verdict: {verdict}")
+    except Exception as e:
+        print(f"Error testing check-urls: {e}")
+
+def test_client_check():
+    """Test single checks through the client (coalesced and cached)"""
+    try:
+        print(f"Verdict: {client.check('https://www.github.com', timeout=5)}")
+        print(f"Cached: {client.check('https://www.github.com', timeout=5)}")
+        print(f"Client stats: {client.stats()}")
+    except Exception as e:
+        print(f"Error testing client check: {e}")
+
 if __name__ == "__main__":
     print("Testing API endpoints...")
     test_logs()
     print("-" * 50)
-    test_check_url() 
\ No newline at end of file
+    test_check_url()
+    print("-" * 50)
+    test_check_urls()
+    print("-" * 50)
+    test_client_check()
+    client.close()
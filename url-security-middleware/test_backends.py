@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Parity check: every exported backend must agree with the Keras model.
+
+Run export_model.py first; backends whose artifact or runtime is missing are skipped.
+"""
+
+import os
+import numpy as np
+
+from char_tokenizer import CharTokenizer
+from inference_backends import BACKENDS, BACKEND_MODEL_PATHS, load_backend
+from url_generator import URLGenerator
+
+MAX_LEN = 200
+TOLERANCE = 1e-4
+
+def build_corpus(n=500):
+    gen = URLGenerator(seed=11)
+    return [gen.generate_valid_url() if i % 2 else gen.generate_invalid_url() for i in range(n)]
+
+def test_backends_agree():
+    """Probabilities agree within TOLERANCE and top-1 classes are identical"""
+    padded = CharTokenizer.load("saved_models/tokenizer.pkl", MAX_LEN).encode_batch(build_corpus())
+    reference = load_backend("tensorflow", MAX_LEN).predict(padded)
+
+    for name in BACKENDS[1:]:
+        if not os.path.exists(BACKEND_MODEL_PATHS[name]):
+            print(f"{name}: skipped (no {BACKEND_MODEL_PATHS[name]}, run export_model.py)")
+            continue
+        try:
+            backend = load_backend(name, MAX_LEN)
+        except ImportError as e:
+            print(f"{name}: skipped ({e})")
+            continue
+
+        output = backend.predict(padded)
+        max_diff = float(np.abs(output - reference).max())
+        assert max_diff <= TOLERANCE, f"{name} differs from tensorflow by {max_diff}"
+        assert np.array_equal(output.argmax(axis=1), reference.argmax(axis=1))
+        print(f"{name}: {len(padded)} URLs, max abs difference {max_diff:.2e}")
+
+if __name__ == "__main__":
+    print("Testing inference backend parity...")
+    test_backends_agree()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from inference_batcher import MicroBatcher
+
+# Test the MicroBatcher without loading the model
+def test_each_caller_gets_own_result():
+    """Concurrent callers are batched together but receive their own result"""
+    batch_sizes = []
+
+    def double(items):
+        batch_sizes.append(len(items))
+        time.sleep(0.01)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=16, max_wait_ms=5)
+    results = {}
+
+    def call(i):
+        results[i] = batcher(i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert results == {i: i * 2 for i in range(40)}
+    assert max(batch_sizes) <= 16
+    assert len(batch_sizes) < 40, "calls were not coalesced"
+    print(f"40 calls served in {len(batch_sizes)} batches: {batch_sizes}")
+
+def test_submit_many_splits_batches():
+    """submit_many queues items in order and runs them at most max_batch_size at a time"""
+    batch_sizes = []
+
+    def double(items):
+        batch_sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=16, max_wait_ms=5)
+    futures = batcher.submit_many(range(40))
+    assert [future.result() for future in futures] == [i * 2 for i in range(40)]
+    batcher.close()
+    assert batch_sizes == [16, 16, 8]
+    print(f"40 queued items served in batches of {batch_sizes}")
+
+def test_errors_reach_every_caller():
+    """An exception in the batch function is raised in every waiting caller"""
+    def fail(items):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(fail, max_wait_ms=1)
+    try:
+        batcher("https://example.com")
+    except RuntimeError as e:
+        print(f"Caller saw error: {e}")
+    else:
+        raise AssertionError("expected RuntimeError")
+    finally:
+        batcher.close()
+
+if __name__ == "__main__":
+    print("Testing MicroBatcher...")
+    test_each_caller_gets_own_result()
+    print("-" * 50)
+    test_submit_many_splits_batches()
+    print("-" * 50)
+    test_errors_reach_every_caller()
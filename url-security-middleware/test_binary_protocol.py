@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import struct
+import numpy as np
+import binary_protocol as bp
+from verdicts import VERDICT_DTYPE
+
+# Test the frame codec without loading the model or opening a socket
+def test_frames_split_across_reads():
+    """Frames fed one byte at a time come out whole and in order"""
+    urls = ["https://example.com", "http://bad.example/login?x=1", "ünïcode.example/päth"]
+    stream = b"".join(bp.encode_check(i, url) for i, url in enumerate(urls, 1))
+    reader = bp.FrameReader()
+    frames = []
+    for i in range(len(stream)):
+        frames.extend(reader.feed(stream[i:i + 1]))
+    assert len(frames) == len(urls)
+    for expected_id, (url, payload) in enumerate(zip(urls, frames), 1):
+        request_id, op = bp.HEADER.unpack_from(payload)
+        assert (request_id, op) == (expected_id, bp.OP_CHECK)
+        assert payload[bp.HEADER.size:].decode("utf-8") == url
+    print(f"{len(frames)} frames reassembled from {len(stream)} single-byte reads")
+
+def test_verdict_frame_layout():
+    """Verdict frames are a fixed 16 bytes with the score 4-byte aligned"""
+    frame = bp.encode_verdict(7, 5, bp.FLAG_MALICIOUS, 0, 0.87)
+    assert len(frame) == bp.VERDICT_FRAME_SIZE == 16
+    length, request_id, op, class_id, flags, explanation = struct.unpack_from("<IIBbBB", frame)
+    assert (length, request_id, op, class_id, flags) == (12, 7, bp.OP_CHECK, 5, bp.FLAG_MALICIOUS)
+    assert abs(struct.unpack_from("<f", frame, 12)[0] - 0.87) < 1e-6
+    print(f"Verdict frame: {frame.hex()}")
+
+def test_bad_length_rejected():
+    """Oversized or truncated-header frames are protocol errors"""
+    for length in (0, bp.HEADER.size - 1, bp.HEADER.size + bp.MAX_URL_BYTES + 1):
+        try:
+            bp.FrameReader().feed(bp.LENGTH.pack(length) + b"\0" * 8)
+        except bp.ProtocolError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError(f"length {length} accepted")
+
+def test_client_rejects_long_urls():
+    """URLs over MAX_URL_BYTES fail on the client instead of costing the connection"""
+    assert len(bp.encode_check(1, "a" * bp.MAX_URL_BYTES)) == bp.LENGTH.size + bp.HEADER.size + bp.MAX_URL_BYTES
+    for url in ("a" * (bp.MAX_URL_BYTES + 1), "ü" * (bp.MAX_URL_BYTES // 2 + 1)):
+        try:
+            bp.encode_check(1, url)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError(f"{len(url)}-character URL accepted")
+
+def test_client_decodes_verdicts():
+    """BinaryClient turns verdict payloads into predict_url-style dicts"""
+    client = bp.BinaryClient()
+    client.class_names = ["benign", "defacement", "edge_case", "malware", "not_a_url", "phishing"]
+    benign = client._to_dict(bp.encode_verdict(1, 0, 0, 0, 0.0)[bp.LENGTH.size:])
+    phishing = client._to_dict(bp.encode_verdict(2, 5, bp.FLAG_MALICIOUS, 0, 0.93)[bp.LENGTH.size:])
+    failed = client._to_dict(bp.encode_verdict(3, -1, bp.FLAG_ERROR, 0, 0.0)[bp.LENGTH.size:])
+    assert benign["prediction"] == "benign" and benign["result"] == 0 and benign["score"] == 0
+    assert phishing["prediction"] == "phishing" and phishing["result"] == 1 and phishing["score"] == 0.93
+    assert failed["error"] and failed["result"] == 0
+    print(f"Decoded: {benign}, {phishing}")
+
+def test_duplicate_ids_answered_in_order():
+    """Pipelined checks that reuse a request id each get their own verdict, in frame order"""
+    import url_checker
+
+    def fake_predict_batch(urls):
+        records = np.zeros(len(urls), dtype=VERDICT_DTYPE)
+        records["class_id"] = [5 if "phish" in url else 0 for url in urls]
+        records["result"] = records["class_id"] != 0
+        return records
+
+    saved = url_checker.predict_batch
+    url_checker.predict_batch = fake_predict_batch
+    try:
+        stream = b"".join(bp.encode_check(1, url) for url in ("http://phish.example/", "https://ok.example/"))
+        reply = url_checker.answer_frames(bp.FrameReader().feed(stream))
+    finally:
+        url_checker.predict_batch = saved
+    frames = bp.FrameReader().feed(reply)
+    assert [struct.unpack_from("<IBb", frame) for frame in frames] == [(1, bp.OP_CHECK, 5), (1, bp.OP_CHECK, 0)]
+    print("Two checks with id 1: phishing, then benign")
+
+if __name__ == "__main__":
+    print("Testing binary protocol...")
+    test_frames_split_across_reads()
+    print("-" * 50)
+    test_verdict_frame_layout()
+    print("-" * 50)
+    test_bad_length_rejected()
+    print("-" * 50)
+    test_client_rejects_long_urls()
+    print("-" * 50)
+    test_client_decodes_verdicts()
+    print("-" * 50)
+    test_duplicate_ids_answered_in_order()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import pickle
+import random
+import string
+import numpy as np
+from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+from char_tokenizer import CharTokenizer
+from url_generator import URLGenerator
+
+MAX_LEN = 200
+
+with open("saved_models/tokenizer.pkl", "rb") as f:
+    tokenizer = pickle.load(f)
+
+def build_corpus(n=2000):
+    """Generated URLs plus the awkward cases: empty, long, unicode, unknown chars"""
+    gen = URLGenerator(seed=7)
+    rng = random.Random(7)
+    corpus = ["", "A", "HTTPS://WWW.GOOGLE.COM", "x" * 500, "http://ünïcödé.example/é–è", "İstanbul.com", "\x00\t\n", "🙂 emoji.com/🙂"]
+    for _ in range(n):
+        choice = rng.random()
+        if choice < 0.4:
+            corpus.append(gen.generate_valid_url())
+        elif choice < 0.8:
+            corpus.append(gen.generate_invalid_url())
+        else:
+            corpus.append("".join(rng.choices(string.printable + "éü€Ωж", k=rng.randint(0, 400))))
+    return corpus
+
+def test_matches_keras():
+    """encode_batch must be bit-identical to texts_to_sequences + pad_sequences"""
+    corpus = build_corpus()
+    expected = pad_sequences(tokenizer.texts_to_sequences(corpus), maxlen=MAX_LEN)
+    actual = CharTokenizer.from_keras(tokenizer, MAX_LEN).encode_batch(corpus)
+    assert actual.dtype == np.int32 and actual.shape == expected.shape
+    assert np.array_equal(actual, expected)
+    print(f"{len(corpus)} samples identical to Keras")
+
+def test_preallocated_buffer():
+    """A reused buffer is fully overwritten, including rows from a longer previous batch"""
+    encoder = CharTokenizer.from_keras(tokenizer, MAX_LEN)
+    buffer = np.zeros((8, MAX_LEN), dtype=np.int32)
+    encoder.encode_batch(["x" * 300] * 8, out=buffer)
+    result = encoder.encode_batch(["https://a.io", ""], out=buffer)
+    expected = pad_sequences(tokenizer.texts_to_sequences(["https://a.io", ""]), maxlen=MAX_LEN)
+    assert np.array_equal(result, expected)
+    print("Preallocated buffer reused correctly")
+
+if __name__ == "__main__":
+    print("Testing CharTokenizer...")
+    test_matches_keras()
+    print("-" * 50)
+    test_preallocated_buffer()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+from database import Base, insert_logs, migrate, logs_query, url_hash, SCHEMA_VERSION
+
+OLD_SCHEMA = """
+CREATE TABLE url_logs (
+    id INTEGER NOT NULL, url VARCHAR NOT NULL, score FLOAT NOT NULL,
+    category VARCHAR NOT NULL, reasons JSON, timestamp DATETIME, PRIMARY KEY (id)
+);
+CREATE INDEX ix_url_logs_id ON url_logs (id);
+"""
+
+# Test the schema migration on a throwaway database with the original schema
+def test_migrates_old_database():
+    """Rows move into the interned layout with the same ids, and reruns are no-ops"""
+    path = tempfile.mktemp(suffix=".db")
+    try:
+        conn = sqlite3.connect(path)
+        conn.executescript(OLD_SCHEMA)
+        conn.executemany("INSERT INTO url_logs (url, score, category, reasons, timestamp) VALUES (?, ?, ?, ?, ?)",
+                         [(f"https://example{i % 2}.com/", 0.5, "SAFE" if i % 2 else "DANGEROUS",
+                           '["Predicted as PHISHING by CNN-LSTM model"]', f"2025-01-01 00:00:0{i}.123456") for i in range(5)])
+        conn.commit()
+
+        engine = create_engine(f"sqlite:///{path}")
+        migrate(engine, batch_size=2)
+        migrate(engine)
+
+        assert conn.execute("SELECT count(*) FROM urls").fetchone()[0] == 2
+        assert conn.execute("SELECT count(*) FROM reason_sets").fetchone()[0] == 1
+        assert all(h == url_hash(url) for h, url in conn.execute("SELECT id, url FROM urls"))
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"ix_url_logs_timestamp", "ix_url_logs_url_timestamp", "ix_url_logs_category_timestamp"} <= indexes
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+        with sessionmaker(bind=engine)() as db:
+            logs = db.scalars(logs_query(url="https://example1.com/")).all()
+            assert [log.id for log in logs] == [4, 2]
+            assert logs[0].category == "SAFE" and logs[0].timestamp.microsecond == 123456
+            assert logs[0].get_reasons() == ["Predicted as PHISHING by CNN-LSTM model"]
+        print(f"Migrated 5 rows; indexes: {sorted(indexes)}")
+        conn.close()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+def test_import_leaves_database_alone():
+    """Importing database opens nothing; init_db() creates the file in WAL mode"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "url_logs.db")
+        env = dict(os.environ, URL_LOG_DATABASE_URL=f"sqlite:///{path}")
+        here = os.path.dirname(os.path.abspath(__file__))
+        subprocess.run([sys.executable, "-c", "import database"], cwd=here, env=env, check=True)
+        assert not os.path.exists(path)
+
+        subprocess.run([sys.executable, "-c", "import database; database.init_db()"], cwd=here, env=env, check=True)
+        conn = sqlite3.connect(path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.close()
+        print(f"init_db() created {os.path.basename(path)}")
+
+def test_url_filter_survives_hash_collision():
+    """Filtering by URL never returns rows of another URL with the same hash"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rows = [{"url": url, "score": 0.9, "category": "DANGEROUS", "reasons": []}
+            for url in ("https://a.example/", "https://b.example/")]
+    saved = database.url_hash
+    database.url_hash = lambda url: 42  # Every URL collides
+    try:
+        with sessionmaker(bind=engine)() as db:
+            insert_logs(db, rows)
+            db.commit()
+            # The first URL keeps the slot in the urls table
+            assert db.scalars(logs_query(url="https://b.example/")).all() == []
+    finally:
+        database.url_hash = saved
+    print("Colliding URL returned no foreign rows")
+
+if __name__ == "__main__":
+    print("Testing database migration...")
+    test_migrates_old_database()
+    print("-" * 50)
+    test_import_leaves_database_alone()
+    print("-" * 50)
+    test_url_filter_survives_hash_collision()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import asyncio
+import threading
+from inference_executor import AdmissionLimit, BoundedExecutor, ExecutorFull, ExecutorClosed
+
+# Test the BoundedExecutor without loading the model
+def test_rejects_when_full():
+    """Calls beyond max_workers + max_queue are rejected immediately"""
+    release = threading.Event()
+    executor = BoundedExecutor(max_workers=2, max_queue=1)
+    futures = [executor.submit(release.wait) for _ in range(3)]
+    try:
+        executor.submit(release.wait)
+        raise AssertionError("expected ExecutorFull")
+    except ExecutorFull:
+        pass
+    assert executor.in_flight == 3 and executor.rejected == 1
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    executor.shutdown()
+    assert executor.in_flight == 0 and executor.completed == 3
+    print(f"Stats: {executor.stats()}")
+
+def test_async_run_and_shutdown():
+    """run() awaits the result without blocking the loop; shutdown rejects new calls"""
+    executor = BoundedExecutor(max_workers=2, max_queue=0)
+
+    async def main():
+        return await asyncio.gather(*(executor.run(pow, i, 2) for i in range(2)))
+
+    assert asyncio.run(main()) == [0, 1]
+    executor.shutdown()
+    try:
+        executor.submit(pow, 2, 2)
+        raise AssertionError("expected ExecutorClosed")
+    except ExecutorClosed:
+        print("Shut down executor rejects new calls")
+
+def test_admission_counts_items():
+    """AdmissionLimit bounds pending items, not calls, and frees them when the block ends"""
+    limit = AdmissionLimit(max_pending=10)
+    with limit.admit(6):
+        with limit.admit(4):
+            assert limit.pending == 10
+            try:
+                with limit.admit(1):
+                    pass
+                raise AssertionError("expected ExecutorFull")
+            except ExecutorFull:
+                pass
+    assert limit.pending == 0 and limit.completed == 10 and limit.rejected == 1
+    with limit.admit(100):  # Oversized, but nothing else is pending
+        assert limit.pending == 100
+    limit.close()
+    try:
+        with limit.admit():
+            pass
+        raise AssertionError("expected ExecutorClosed")
+    except ExecutorClosed:
+        print(f"Stats: {limit.stats()}")
+
+if __name__ == "__main__":
+    print("Testing BoundedExecutor...")
+    test_rejects_when_full()
+    print("-" * 50)
+    test_async_run_and_shutdown()
+    print("-" * 50)
+    test_admission_counts_items()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database import Base, URLLog, insert_logs
+from log_writer import LogWriter
+
+RESULT = {"url": "https://example.com/", "score": 0.0, "category": "SAFE", "reasons": ["Predicted as BENIGN by CNN-LSTM model"]}
+
+def make_db():
+    path = tempfile.mktemp(suffix=".db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return path, sessionmaker(bind=engine)
+
+def count_rows(Session):
+    with Session() as db:
+        return db.query(URLLog).count()
+
+# Test the LogWriter against a throwaway SQLite file
+def test_batches_and_close_flushes():
+    """Rows are inserted in batches and close() flushes the remainder"""
+    path, Session = make_db()
+    try:
+        writer = LogWriter(Session, insert_logs, batch_size=100, flush_interval_ms=10000)
+        for _ in range(250):
+            writer.log_results([RESULT])
+        time.sleep(0.2)
+        assert count_rows(Session) == 200  # Two full batches; 50 rows wait for the interval
+        writer.close()
+        assert count_rows(Session) == 250 and writer.flushes == 3
+        with Session() as db:
+            assert db.query(URLLog).first().get_reasons() == RESULT["reasons"]
+        print(f"Stats: {writer.stats()}")
+    finally:
+        os.unlink(path)
+
+def test_commit_mode_and_drops():
+    """In commit mode futures resolve after the flush; a full queue drops rows"""
+    path, Session = make_db()
+    try:
+        writer = LogWriter(Session, insert_logs, flush_interval_ms=20, durability="commit")
+        futures = writer.log_results([RESULT] * 3)
+        assert all(f.result(timeout=5) for f in futures)
+        assert count_rows(Session) == 3
+        writer.close()
+
+        writer = LogWriter(Session, insert_logs, max_queue=2)
+        writer._thread = object()  # Keep the writer thread from draining the queue
+        results = [f.result() for f in writer.log_results([RESULT] * 5)]
+        assert results == [True, True, False, False, False] and writer.dropped == 3
+        print(f"Dropped {writer.dropped} rows when the queue was full")
+    finally:
+        os.unlink(path)
+
+def test_close_races_with_log():
+    """A row queued while close() runs is still written; its commit-mode future never hangs"""
+    path, Session = make_db()
+    try:
+        writer = LogWriter(Session, insert_logs, flush_interval_ms=1, durability="commit")
+        writer.start()
+        put_nowait = writer._queue.put_nowait
+
+        def close_then_put(item):
+            # close() runs between log()'s closed check and its enqueue
+            closer = threading.Thread(target=writer.close)
+            closer.start()
+            closer.join(0.2)
+            put_nowait(item)
+
+        writer._queue.put_nowait = close_then_put
+        future = writer.log(**RESULT)
+        assert future.result(timeout=5) is True and count_rows(Session) == 1
+        assert writer.log(**RESULT).result(timeout=1) is False
+        print(f"Row logged during close() was written; later rows dropped ({writer.dropped})")
+    finally:
+        os.unlink(path)
+
+if __name__ == "__main__":
+    print("Testing LogWriter...")
+    test_batches_and_close_flushes()
+    print("-" * 50)
+    test_commit_mode_and_drops()
+    print("-" * 50)
+    test_close_races_with_log()
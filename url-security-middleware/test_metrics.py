@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+from metrics import Registry, Counter, Histogram
+
+# Test the metrics registry without loading the model
+def test_render_prometheus_text():
+    """Histograms are cumulative with +Inf, counters keep their labels, collectors are included"""
+    registry = Registry()
+    latency = registry.register(Histogram("demo_seconds", "Demo latency", labelnames=("stage",), buckets=(0.1, 1.0)))
+    verdicts = registry.register(Counter("demo_verdicts_total", "Demo verdicts", labelnames=("prediction",)))
+    registry.add_collector(lambda: [("demo_queue_depth", "gauge", "Demo queue", [({}, 3)])])
+
+    tokenize = latency.labels("tokenize")
+    for value in (0.05, 0.5, 5.0):
+        tokenize.observe(value)
+    verdicts.labels("phishing").inc(2)
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{stage="tokenize",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="tokenize",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="tokenize",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="tokenize"} 3' in text
+    assert 'demo_verdicts_total{prediction="phishing"} 2' in text
+    assert "# TYPE demo_queue_depth gauge\ndemo_queue_depth 3" in text
+    print(text)
+
+def test_observe_buckets():
+    """Each observation lands in the first bucket whose bound is >= the value; sum and count add up"""
+    timer = Histogram("bench_seconds", "Bench", buckets=(0.001, 0.01))
+    values = [0.0005, 0.001, 0.002, 0.01, 0.5] * 1000
+    for value in values:
+        timer.observe(value)
+    text = "\n".join(timer.render())
+    assert 'bench_seconds_bucket{le="0.001"} 2000' in text
+    assert 'bench_seconds_bucket{le="0.01"} 4000' in text
+    assert 'bench_seconds_count 5000' in text
+    assert abs(timer._unlabelled.sum - sum(values)) < 1e-9
+    print(text)
+
+if __name__ == "__main__":
+    print("Testing metrics...")
+    test_render_prometheus_text()
+    print("-" * 50)
+    test_observe_buckets()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import time
+import numpy as np
+import model_session
+from model_session import ModelSession
+from verdicts import VerdictDecoder
+
+CLASS_NAMES = ["benign", "phishing"]
+
+class FakeBackend:
+    """Scores every URL with the version number written in the model file"""
+
+    def __init__(self, path):
+        with open(path) as f:
+            text = f.read()
+        if not text:
+            raise ValueError("half-written model")
+        self.version = int(text)
+
+    def predict(self, padded):
+        return np.full((len(padded), 2), self.version, dtype=np.float32)
+
+class FakeTokenizer:
+    def encode_batch(self, urls, out=None):
+        return np.zeros((len(urls), 4), dtype=np.int32)
+
+class FakeSession(ModelSession):
+    """ModelSession over a one-line model file, without a real model runtime"""
+
+    def _new_backend(self):
+        return FakeBackend(self.model_path)
+
+    def _load_char_tokenizer(self):
+        return FakeTokenizer()
+
+    def _load_decoder(self):
+        return VerdictDecoder(CLASS_NAMES)
+
+def write_model(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    # Coarse filesystem clocks could otherwise hide a rewrite within the same tick
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+
+def make_session(tmp, version="1"):
+    model = os.path.join(tmp, "model")
+    write_model(model, version)
+    paths = [os.path.join(tmp, name) for name in ("tokenizer", "vocab", "labels")]
+    return FakeSession("fake", model, *paths, max_len=4), model
+
+def wait_for_reload(session):
+    session.check_for_update()
+    if session._reload_thread is not None:
+        session._reload_thread.join(5)
+
+# Test hot reloading with a fake model
+def test_reload_runs_listeners_after_swap():
+    """reload() swaps the new model in first, then tells the listeners"""
+    with tempfile.TemporaryDirectory() as tmp:
+        session, model = make_session(tmp)
+        assert session.run(["https://a.com"])[0, 0] == 1
+        seen = []
+        session.add_reload_listener(lambda s: seen.append((s.generation, float(s.run(["https://a.com"])[0, 0]))))
+        old_fingerprint = session.fingerprint
+        write_model(model, "2")
+        session.reload()
+        assert seen == [(1, 2.0)] and session.reloads == 1
+        assert session.fingerprint != old_fingerprint
+        print(f"Listeners saw generation {seen[0][0]} serving version {seen[0][1]:.0f}")
+
+def test_background_reload_on_file_change():
+    """run() notices a rewritten model file and reloads it in the background"""
+    saved = model_session.RELOAD_CHECK_INTERVAL
+    model_session.RELOAD_CHECK_INTERVAL = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            session, model = make_session(tmp)
+            session.load()
+            wait_for_reload(session)
+            assert session.reloads == 0
+            write_model(model, "3")
+            wait_for_reload(session)
+            assert session.reloads == 1 and session.run(["https://a.com"])[0, 0] == 3
+            print(f"Reloaded in the background: generation {session.generation}")
+    finally:
+        model_session.RELOAD_CHECK_INTERVAL = saved
+
+def test_failed_reload_keeps_serving():
+    """A reload that fails keeps the current model and does not run the listeners"""
+    saved = model_session.RELOAD_CHECK_INTERVAL
+    model_session.RELOAD_CHECK_INTERVAL = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            session, model = make_session(tmp)
+            session.load()
+            seen = []
+            session.add_reload_listener(seen.append)
+            write_model(model, "")
+            wait_for_reload(session)
+            assert seen == [] and session.generation == 0 and session.run(["https://a.com"])[0, 0] == 1
+            write_model(model, "4")
+            wait_for_reload(session)
+            assert seen == [session] and session.run(["https://a.com"])[0, 0] == 4
+            print("Failed reload kept version 1; the next check loaded version 4")
+    finally:
+        model_session.RELOAD_CHECK_INTERVAL = saved
+
+if __name__ == "__main__":
+    print("Testing model hot reload...")
+    test_reload_runs_listeners_after_swap()
+    print("-" * 50)
+    test_background_reload_on_file_change()
+    print("-" * 50)
+    test_failed_reload_keeps_serving()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import tempfile
+from proxy_log import parse_line, last_entries, LogTail
+
+TEXT_LINE = ("[2025-08-12 23:34:28] URL: https://www.google.com/ | Safe: YES | Prediction: benign | Score: 0.000 | "
+             "Explanation: Trusted domain (allowlisted).")
+JSON_LINE = json.dumps({"timestamp": "2025-08-12 23:35:00", "url": "http://evil.example/login", "safe": False,
+                        "prediction": "phishing", "score": 0.93, "explanation": None})
+
+def text_line(i):
+    return f"[2025-08-12 23:34:28] URL: http://site{i}.example/ | Safe: YES | Prediction: benign | Score: 0.000 | Explanation: None\n"
+
+# Test parsing the proxy's security log in both formats
+def test_parse_formats():
+    """Text and JSONL lines parse to the same dict shape; other lines are skipped"""
+    text = parse_line(TEXT_LINE)
+    assert text == {"timestamp": "2025-08-12 23:34:28", "url": "https://www.google.com/", "safe": True,
+                    "prediction": "benign", "score": 0.0, "explanation": "Trusted domain (allowlisted)."}
+    entry = parse_line(JSON_LINE)
+    assert set(entry) == set(text) and entry["safe"] is False and entry["explanation"] is None
+    assert parse_line(text_line(1))["explanation"] is None
+    assert parse_line("[2025-08-12 23:34:28] LOGGER: dropped 3 entries (buffer full)") is None
+    assert parse_line('{"timestamp": "2025-08-12 23:34:28", "dropped": 3}') is None
+    assert parse_line('{"timestamp": "2025-08-12 23:3') is None
+    print(f"Parsed: {entry}")
+
+def test_last_entries():
+    """last_entries reads just the tail of a large file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "url_security.log")
+        with open(path, "w") as f:
+            f.writelines(text_line(i) for i in range(5000))
+        entries = last_entries(path, 3)
+        assert [e["url"] for e in entries] == [f"http://site{i}.example/" for i in (4997, 4998, 4999)]
+        assert len(last_entries(path, 10000)) == 5000
+        assert last_entries(os.path.join(tmp, "missing.log")) == []
+        print(f"Newest: {entries[-1]['url']}")
+
+def test_tail_follows_rotation():
+    """LogTail returns only new entries, holds back a partial line and keeps reading across a rotation"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "url_security.log")
+        with open(path, "w") as f:
+            f.write(text_line(0))
+        tail = LogTail(path)
+        assert tail.poll() == []
+
+        with open(path, "a") as f:
+            f.write(text_line(1) + JSON_LINE[:20])
+        assert [e["url"] for e in tail.poll()] == ["http://site1.example/"]
+        with open(path, "a") as f:
+            f.write(JSON_LINE[20:] + "\n")
+        assert [e["url"] for e in tail.poll()] == ["http://evil.example/login"]
+
+        # The proxy renames the full file to .1 and starts a new one
+        with open(path, "a") as f:
+            f.write(text_line(2))
+        os.rename(path, path + ".1")
+        with open(path, "w") as f:
+            f.write(text_line(3))
+        assert [e["url"] for e in tail.poll()] == ["http://site2.example/", "http://site3.example/"]
+        print("Tail followed the rotation")
+
+if __name__ == "__main__":
+    print("Testing proxy log parser...")
+    test_parse_formats()
+    print("-" * 50)
+    test_last_entries()
+    print("-" * 50)
+    test_tail_follows_rotation()
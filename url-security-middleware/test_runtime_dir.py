@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import os
+import socket
+import tempfile
+from runtime_dir import ensure_private_dir, claim_socket_path
+
+# Test the socket path checks without starting a daemon
+def test_claims_only_own_sockets():
+    """A stale socket of ours is removed; a regular file at the path is left alone"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checker.sock")
+        sock = socket.socket(socket.AF_UNIX)
+        sock.bind(path)
+        sock.close()
+        claim_socket_path(path)
+        assert not os.path.exists(path)
+        claim_socket_path(path)  # Nothing there: fine
+
+        with open(path, "w") as f:
+            f.write("not a socket")
+        try:
+            claim_socket_path(path)
+            raise AssertionError("expected PermissionError")
+        except PermissionError as e:
+            assert os.path.exists(path)
+            print(f"Refused: {e}")
+
+def test_private_dir():
+    """The runtime directory is created 0700; one others can enter is refused"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "url-checker")
+        ensure_private_dir(path)
+        ensure_private_dir(path)
+        assert os.stat(path).st_mode & 0o777 == 0o700
+        os.chmod(path, 0o755)
+        try:
+            ensure_private_dir(path)
+            raise AssertionError("expected PermissionError")
+        except PermissionError as e:
+            print(f"Refused: {e}")
+
+if __name__ == "__main__":
+    print("Testing runtime directory checks...")
+    test_claims_only_own_sockets()
+    print("-" * 50)
+    test_private_dir()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+import numpy as np
+import scan_urls
+from verdicts import VerdictDecoder, VERDICT_DTYPE
+
+CLASS_NAMES = ["benign", "defacement", "edge_case", "malware", "not_a_url", "phishing"]
+
+def fake_predict_batch(urls):
+    """Stands in for the model: URLs containing "phish" are phishing, the rest benign"""
+    records = np.zeros(len(urls), dtype=VERDICT_DTYPE)
+    phishing = np.array(["phish" in url for url in urls], dtype=bool)
+    records["class_id"] = np.where(phishing, CLASS_NAMES.index("phishing"), 0)
+    records["score"] = np.where(phishing, 0.9, 0.0)
+    records["result"] = phishing
+    return records
+
+class FakeResult:
+    def __init__(self, fn, args):
+        self._fn, self._args = fn, args
+
+    def get(self):
+        return self._fn(*self._args)
+
+class FakePool:
+    """Runs batches in this process when their result is collected, like a pool of one"""
+
+    def apply_async(self, fn, args):
+        return FakeResult(fn, args)
+
+    def terminate(self):
+        pass
+
+    def close(self):
+        pass
+
+    def join(self):
+        pass
+
+class Interrupt:
+    """predict_batch that raises KeyboardInterrupt on the given call, as if Ctrl-C was pressed"""
+
+    def __init__(self, on_call):
+        self.on_call, self.calls = on_call, 0
+
+    def __call__(self, urls):
+        self.calls += 1
+        if self.calls == self.on_call:
+            raise KeyboardInterrupt
+        return fake_predict_batch(urls)
+
+def run_scan(input_path, output, predict=fake_predict_batch, **kwargs):
+    """scan() with the fake pool and model; returns the number of URLs or the exit code"""
+    saved = scan_urls._start_pool, scan_urls._load_decoder, getattr(scan_urls, "predict_batch", None)
+    scan_urls._start_pool = lambda workers, backend: FakePool()
+    scan_urls._load_decoder = lambda: VerdictDecoder(CLASS_NAMES)
+    scan_urls.predict_batch = predict
+    try:
+        return scan_urls.scan(input_path, output, workers=1, batch_size=4, **kwargs)
+    except SystemExit as e:
+        return e.code
+    finally:
+        scan_urls._start_pool, scan_urls._load_decoder, scan_urls.predict_batch = saved
+
+def write_txt(path, urls):
+    with (gzip.open if path.endswith(".gz") else open)(path, "wt") as f:
+        f.write("\n".join(urls) + "\n")
+
+def jsonl_rows(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+URLS = [f"https://site{i}.example/" if i % 3 else f"http://phish{i}.example/login" for i in range(30)]
+
+# Test the bulk scanner with a fake pool and model
+def test_reads_input_formats():
+    """txt (gzipped), CSV and JSONL inputs give the same URLs; unusable rows are skipped and counted"""
+    with tempfile.TemporaryDirectory() as tmp:
+        txt = os.path.join(tmp, "urls.txt.gz")
+        write_txt(txt, URLS[:3] + [""] + URLS[3:])
+        csv_path = os.path.join(tmp, "urls.csv")
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["url", "type"])
+            writer.writerows([[url, "x"] for url in URLS[:5]] + [["", "x"]] + [[url, "x"] for url in URLS[5:]])
+        jsonl = os.path.join(tmp, "urls.jsonl")
+        with open(jsonl, "w") as f:
+            f.write("\n".join([json.dumps({"url": url}) for url in URLS[:10]] + ["{broken", json.dumps({"other": 1}), ""]
+                              + [json.dumps({"url": url}) for url in URLS[10:]]) + "\n")
+
+        for path, skipped in ((txt, 0), (csv_path, 1), (jsonl, 2)):
+            reader = scan_urls.UrlReader(path)
+            assert list(reader) == URLS and reader.skipped == skipped
+            reader.close()
+        assert scan_urls.detect_format("feed.ndjson.gz") == "jsonl"
+
+        output = os.path.join(tmp, "verdicts.jsonl")
+        assert run_scan(jsonl, output) == len(URLS)
+        rows = jsonl_rows(output)
+        assert [row["url"] for row in rows] == URLS and [row["row"] for row in rows] == list(range(len(URLS)))
+        assert rows[0]["prediction"] == "phishing" and rows[0]["result"] == 1 and rows[1]["prediction"] == "benign"
+        print(f"Scanned {len(rows)} rows from txt.gz, CSV and JSONL")
+
+def test_jsonl_resume():
+    """An interrupted JSONL scan resumes from its checkpoint without duplicates or partial lines"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path, output = os.path.join(tmp, "urls.txt"), os.path.join(tmp, "verdicts.jsonl")
+        write_txt(input_path, URLS)
+        assert run_scan(input_path, output, predict=Interrupt(on_call=4)) == 130
+        with open(scan_urls.progress_path(output)) as f:
+            progress = json.load(f)
+        assert progress["rows"] == 12 and progress["malicious"] == 4
+
+        # Rows written after the checkpoint (and a line cut short) must not survive the resume
+        with open(output, "a") as f:
+            f.write('{"row": 12, "url": "stale"}\n{"row": 13, "ur')
+        assert run_scan(input_path, output, resume=True) == len(URLS)
+        rows = jsonl_rows(output)
+        assert [row["row"] for row in rows] == list(range(len(URLS))) and [row["url"] for row in rows] == URLS
+        with open(scan_urls.progress_path(output)) as f:
+            assert json.load(f)["malicious"] == sum(row["result"] for row in rows) == 10
+        print(f"Resumed after {progress['rows']} rows; {len(rows)} rows, no duplicates")
+
+def test_resume_without_output_starts_over():
+    """A checkpoint whose output file is gone restarts the scan instead of crashing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path, output = os.path.join(tmp, "urls.txt"), os.path.join(tmp, "verdicts.jsonl")
+        write_txt(input_path, URLS)
+        assert run_scan(input_path, output, predict=Interrupt(on_call=3)) == 130
+        os.unlink(output)
+        assert run_scan(input_path, output, resume=True) == len(URLS)
+        assert [row["url"] for row in jsonl_rows(output)] == URLS
+        print("Missing output: started over")
+
+def test_parquet_resume():
+    """Parquet resume drops unfinished and later parts but leaves other files in the directory"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow not installed; skipping")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path, output = os.path.join(tmp, "urls.txt"), os.path.join(tmp, "verdicts.parquet")
+        write_txt(input_path, URLS)
+        # Parts hold two batches (8 rows); interrupted after two parts and one buffered batch
+        assert run_scan(input_path, output, predict=Interrupt(on_call=6), rows_per_part=8) == 130
+        with open(scan_urls.progress_path(output)) as f:
+            progress = json.load(f)
+        assert progress["rows"] == 16 and progress["writer"] == {"parts": 2} and progress["malicious"] == 6
+
+        for name in ("part-00002.parquet", "part-00001.parquet.tmp", "part-notes.txt", "README"):
+            with open(os.path.join(output, name), "w") as f:
+                f.write("leftover")
+        assert run_scan(input_path, output, resume=True, rows_per_part=8) == len(URLS)
+        names = sorted(os.listdir(output))
+        assert names == ["README", "part-00000.parquet", "part-00001.parquet", "part-00002.parquet",
+                         "part-00003.parquet", "part-notes.txt"]
+        table = pq.read_table([os.path.join(output, name) for name in names if name.endswith(".parquet")])
+        assert table.column("row").to_pylist() == list(range(len(URLS))) and table.column("url").to_pylist() == URLS
+        print(f"Parquet parts after resume: {names}")
+
+if __name__ == "__main__":
+    print("Testing bulk scanner...")
+    test_reads_input_formats()
+    print("-" * 50)
+    test_jsonl_resume()
+    print("-" * 50)
+    test_resume_without_output_starts_over()
+    print("-" * 50)
+    test_parquet_resume()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import numpy as np
+from shared_verdicts import SharedVerdictTable, siphash24, url_key, ENTRY_DTYPE, PROBE_LIMIT
+from verdicts import VERDICT_DTYPE
+
+CLASS_NAMES = ["benign", "defacement", "edge_case", "malware", "not_a_url", "phishing"]
+
+def make_record(class_id, score, explanation=0):
+    record = np.zeros(1, dtype=VERDICT_DTYPE)[0]
+    record["class_id"] = class_id
+    record["score"] = score
+    record["result"] = int(class_id != 0)
+    record["explanation"] = explanation
+    return record
+
+def open_table(path, capacity=1024):
+    return SharedVerdictTable.open(path, capacity=capacity, class_names=CLASS_NAMES)
+
+# Test the shared verdict table the proxy reads
+def test_key():
+    """Keys are SipHash-2-4 (the proxy computes the same) under the table key and ignore ASCII case"""
+    assert ENTRY_DTYPE.itemsize == 32
+    key = bytes(range(16))
+    # Reference vectors from the SipHash paper
+    assert siphash24(key, b"") == 0x726fdb47dd0e0e31
+    assert siphash24(key, bytes(range(15))) == 0xa129ca6149be45e5
+    assert url_key("HTTP://Example.COM/Path", key) == url_key("http://example.com/path", key)
+    assert url_key("http://example.com/a", key) != url_key("http://example.com/b", key)
+    assert url_key("http://example.com/a", key) != url_key("http://example.com/a", bytes(16))
+    print(f"url_key('a') = {url_key('a', key):#x}")
+
+def test_round_trip():
+    """A written verdict reads back with its class, score and explanation"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "verdicts")
+        table = open_table(path)
+        table.put("http://phish.example/login", make_record(5, 0.93), ttl=60)
+        table.put("https://ok.example/", make_record(0, 0.1, explanation=1), ttl=60)
+        entry = table.get("http://PHISH.example/login")
+        assert entry["result"] == 1 and table.class_names[entry["class_id"]] == "phishing"
+        assert abs(float(entry["score"]) - 0.93) < 1e-6
+        assert table.get("https://ok.example/")["explanation"] == 1
+        assert table.get("https://missing.example/") is None
+
+        # A second handle (another process) sees the same entries and layout
+        other = SharedVerdictTable.open(path, capacity=4096)
+        assert other.capacity == 1024 and other.class_names == CLASS_NAMES
+        assert other.get("http://phish.example/login") is not None
+        other.close()
+        print(f"Round trip: {table.stats()}")
+        table.close()
+
+def test_expiry_and_clear():
+    """Expired verdicts are misses; clear() expires everything"""
+    with tempfile.TemporaryDirectory() as tmp:
+        table = open_table(os.path.join(tmp, "verdicts"))
+        table.put("https://old.example/", make_record(0, 0.1), ttl=-1)
+        table.put("https://new.example/", make_record(0, 0.1), ttl=60)
+        assert table.get("https://old.example/") is None
+        assert table.get("https://new.example/") is not None
+        table.clear()
+        assert table.get("https://new.example/") is None
+        table.put("https://new.example/", make_record(3, 0.8), ttl=60)
+        assert table.class_names[table.get("https://new.example/")["class_id"]] == "malware"
+        print("Expiry and clear OK")
+        table.close()
+
+def test_eviction():
+    """A full table keeps taking writes by replacing the soonest-expiring entry in the probe window"""
+    with tempfile.TemporaryDirectory() as tmp:
+        table = open_table(os.path.join(tmp, "verdicts"), capacity=PROBE_LIMIT)
+        urls = [f"https://site{i}.example/" for i in range(PROBE_LIMIT * 3)]
+        table.put_many([(url, make_record(0, 0.1), 60 + i) for i, url in enumerate(urls)])
+        assert table.stats()["used"] == PROBE_LIMIT and table.evictions == len(urls) - PROBE_LIMIT
+        assert table.get(urls[-1]) is not None and table.get(urls[0]) is None
+        print(f"Eviction: {table.stats()}")
+        table.close()
+
+def test_model_change_expires_entries():
+    """Opening for another model expires the old model's verdicts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "verdicts")
+        old, new = b"1" * 16, b"2" * 16
+        table = SharedVerdictTable.open(path, capacity=1024, class_names=CLASS_NAMES, fingerprint=old)
+        table.put("http://phish.example/", make_record(5, 0.9), ttl=60, fingerprint=old)
+        table.close()
+        table = SharedVerdictTable.open(path, fingerprint=old)
+        assert table.get("http://phish.example/") is not None
+        table.close()
+        table = SharedVerdictTable.open(path, fingerprint=new)
+        assert table.get("http://phish.example/") is None and table.invalidations == 1
+        assert table.class_names == CLASS_NAMES
+        print(f"After the model changed: {table.stats()}")
+        table.close()
+
+def test_stale_model_cannot_publish():
+    """A writer still on the old model has its verdicts dropped once the table moved on"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "verdicts")
+        old, new = b"1" * 16, b"2" * 16
+        lagging = SharedVerdictTable.open(path, capacity=1024, class_names=CLASS_NAMES, fingerprint=old)
+        reloaded = SharedVerdictTable.open(path)
+        reloaded.set_model(new, CLASS_NAMES[:-1])
+        lagging.put("http://phish.example/", make_record(5, 0.9), ttl=60, fingerprint=old)
+        assert reloaded.get("http://phish.example/") is None and lagging.fingerprint_mismatches == 1
+        reloaded.put("http://ok.example/", make_record(0, 0.1), ttl=60, fingerprint=new)
+        assert lagging.get("http://ok.example/") is not None
+
+        # The lagging process reloads the same model: the new verdicts stay
+        lagging.set_model(new, CLASS_NAMES[:-1])
+        assert lagging.get("http://ok.example/") is not None and lagging.class_names == CLASS_NAMES[:-1]
+        print(f"Stale writer: {lagging.stats()}")
+        lagging.close()
+        reloaded.close()
+
+def test_rejects_unsafe_files():
+    """Tables others could write to, or reached through a symlink, are refused"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "verdicts")
+        SharedVerdictTable.open(path, capacity=1024).close()
+        os.chmod(path, 0o666)
+        link = os.path.join(tmp, "link")
+        os.symlink(path, link)
+        for candidate in (path, link):
+            try:
+                SharedVerdictTable.open(candidate)
+            except (ValueError, OSError) as e:
+                print(f"Refused: {e}")
+            else:
+                raise AssertionError(f"{candidate} should be refused")
+
+def test_rejects_foreign_file():
+    """A file that is not a verdict table is refused, not overwritten"""
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(b"not a table" * 1000)
+        f.flush()
+        try:
+            SharedVerdictTable.open(f.name)
+        except ValueError as e:
+            print(f"Refused: {e}")
+        else:
+            raise AssertionError("expected ValueError")
+
+if __name__ == "__main__":
+    print("Testing shared verdict table...")
+    test_key()
+    print("-" * 50)
+    test_round_trip()
+    print("-" * 50)
+    test_expiry_and_clear()
+    print("-" * 50)
+    test_eviction()
+    print("-" * 50)
+    test_model_change_expires_entries()
+    print("-" * 50)
+    test_stale_model_cannot_publish()
+    print("-" * 50)
+    test_rejects_unsafe_files()
+    print("-" * 50)
+    test_rejects_foreign_file()
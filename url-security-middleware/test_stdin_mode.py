@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import subprocess
+import sys
+
+CHECKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "url_checker.py")
+
+def run_coprocess(lines, *args):
+    """Feed lines to url_checker.py --stdin and return its stdout"""
+    env = dict(os.environ, URL_SHARED_VERDICTS="off")
+    proc = subprocess.run([sys.executable, CHECKER, "--stdin", *args], input="\n".join(lines).encode("utf-8"),
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, timeout=300)
+    assert proc.returncode == 0
+    return proc.stdout.decode("utf-8")
+
+# Test the co-process mode end to end (loads the model once per run)
+def test_json_lines():
+    """One JSON answer per request line, in order, echoing ids; bad lines get an error answer"""
+    lines = [
+        "https://www.google.com",
+        json.dumps({"id": 7, "url": "http://example.com/login"}),
+        "",
+        json.dumps({"id": "no-url"}),
+        json.dumps({"id": [1, 2], "url": "https://github.com"}),
+    ]
+    answers = [json.loads(line) for line in run_coprocess(lines).splitlines()]
+    assert len(answers) == 4
+    assert answers[0]["url"] == "https://www.google.com" and answers[0]["success"] and "id" not in answers[0]
+    assert answers[1]["id"] == 7 and answers[1]["prediction"] and answers[1]["result"] in (0, 1)
+    assert not answers[2]["success"] and answers[2]["result"] == 0
+    assert answers[3]["id"] == [1, 2] and answers[3]["explanation"] == "Trusted domain (allowlisted)."
+    for answer in answers:
+        print(json.dumps(answer))
+
+def test_text_blocks():
+    """--text keeps the KEY: value blocks of --serve, one per URL"""
+    output = run_coprocess(["https://www.google.com", json.dumps({"id": 3, "url": "http://example.com/login"})],
+                           "--text")
+    blocks = output.strip().split("\n\n")
+    assert len(blocks) == 2
+    assert blocks[0].startswith("URL: https://www.google.com") and "RESULT: 0" in blocks[0]
+    assert blocks[1].startswith("ID: 3\nURL: http://example.com/login") and "SUCCESS: true" in blocks[1]
+    print(output)
+
+if __name__ == "__main__":
+    print("Testing url_checker.py --stdin...")
+    test_json_lines()
+    print("-" * 50)
+    test_text_blocks()
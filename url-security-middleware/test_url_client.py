@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import asyncio
+import email.utils
+import threading
+import time
+from url_client import URLCheckerClient, DeadlineExceeded, URLCheckerError, _retry_after_seconds
+
+class FakeResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+class FakeSession:
+    """Answers /check-urls like the service would, recording every request"""
+
+    def __init__(self, delay=0.0, busy=0):
+        self.delay = delay
+        self.busy = busy  # answer this many requests with 429 first
+        self.calls = []
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def request(self, method, url, timeout=None, json=None, params=None):
+        with self.lock:
+            self.calls.append(json["urls"])
+            busy = self.busy > 0
+            self.busy -= 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if busy:
+            return FakeResponse(429, {"detail": "busy"}, {"Retry-After": "0.01"})
+        results = [{"url": u, "status": "blocked" if "evil" in u else "allowed", "score": 0.0,
+                    "category": "DANGEROUS" if "evil" in u else "SAFE", "reasons": []} for u in json["urls"]]
+        return FakeResponse(200, {"results": results, "logged": True})
+
+    def close(self):
+        pass
+
+# Test the client against a fake session (no server needed)
+def test_coalescing():
+    """Concurrent single checks share /check-urls requests"""
+    session = FakeSession(delay=0.01)
+    with URLCheckerClient(session=session, batch_window_ms=20) as client:
+        urls = [f"https://site{i}.example/" for i in range(40)]
+        results = [None] * len(urls)
+
+        def worker(i):
+            results[i] = client.check(urls[i])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(urls))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert [r["url"] for r in results] == urls
+    assert len(session.calls) < len(urls)
+    print(f"{len(urls)} concurrent checks sent in {len(session.calls)} requests")
+
+def test_batches_run_concurrently():
+    """Coalesced requests use up to pool_size connections at once"""
+    session = FakeSession(delay=0.2)
+    with URLCheckerClient(session=session, pool_size=4, max_batch=1, batch_window_ms=0) as client:
+        urls = [f"https://site{i}.example/" for i in range(8)]
+        threads = [threading.Thread(target=client.check, args=(url,)) for url in urls]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert len(session.calls) == len(urls)
+    assert 1 < session.max_in_flight <= 4
+    print(f"{len(urls)} single-URL requests, up to {session.max_in_flight} at once with pool_size=4")
+
+def test_cache():
+    """A repeated URL is answered locally"""
+    session = FakeSession()
+    with URLCheckerClient(session=session) as client:
+        first = client.check("http://evil.example/login")
+        second = client.check("http://evil.example/login")
+        many = client.check_many(["http://evil.example/login", "https://ok.example/"])
+    assert first == second == many[0] and first["status"] == "blocked"
+    assert session.calls == [["http://evil.example/login"], ["https://ok.example/"]]
+    print(f"Cache: {client.cache.stats()}")
+
+def test_deadline():
+    """A call gives up at its deadline even while the request is still running"""
+    session = FakeSession(delay=0.5)
+    with URLCheckerClient(session=session) as client:
+        start = time.perf_counter()
+        try:
+            client.check("https://slow.example/", timeout=0.05)
+        except DeadlineExceeded:
+            elapsed = time.perf_counter() - start
+        else:
+            raise AssertionError("deadline not enforced")
+    assert elapsed < 0.3
+    print(f"Gave up after {elapsed * 1000:.0f} ms")
+
+def test_retry_after_busy():
+    """429 answers are retried after Retry-After while the deadline allows"""
+    session = FakeSession(busy=2)
+    with URLCheckerClient(session=session) as client:
+        verdict = client.check_many(["https://ok.example/"])[0]
+        assert verdict["status"] == "allowed" and client.retries == 2
+    session = FakeSession(busy=100)
+    with URLCheckerClient(session=session, timeout=0.05) as client:
+        try:
+            client.check_many(["https://ok.example/"])
+        except (URLCheckerError, DeadlineExceeded) as e:
+            print(f"Still busy at the deadline: {e!r}")
+        else:
+            raise AssertionError("expected an error")
+
+def test_retry_after_formats():
+    """Retry-After may be seconds or an HTTP-date; anything else waits one second"""
+    assert _retry_after_seconds("2.5") == 2.5 and _retry_after_seconds("-3") == 0
+    soon = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= _retry_after_seconds(soon) <= 30
+    assert _retry_after_seconds(email.utils.formatdate(time.time() - 30, usegmt=True)) == 0
+    assert _retry_after_seconds("soon") == _retry_after_seconds(None) == 1.0
+    print(f"Retry-After {soon!r} -> {_retry_after_seconds(soon):.1f} s")
+
+def test_async():
+    """acheck_many from asyncio coalesces into one request"""
+    session = FakeSession()
+
+    async def run(client):
+        return await client.acheck_many([f"https://a{i}.example/" for i in range(10)])
+
+    with URLCheckerClient(session=session, batch_window_ms=20) as client:
+        results = asyncio.run(run(client))
+    assert len(results) == 10 and len(session.calls) == 1
+    print(f"async: 10 URLs in {len(session.calls)} request")
+
+if __name__ == "__main__":
+    print("Testing URL client...")
+    test_coalescing()
+    print("-" * 50)
+    test_batches_run_concurrently()
+    print("-" * 50)
+    test_cache()
+    print("-" * 50)
+    test_deadline()
+    print("-" * 50)
+    test_retry_after_busy()
+    print("-" * 50)
+    test_retry_after_formats()
+    print("-" * 50)
+    test_async()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import time
+from verdict_cache import VerdictCache
+
+BENIGN = {"prediction": "benign", "score": 0, "result": 0, "explanation": None}
+PHISHING = {"prediction": "phishing", "score": 0.93, "result": 1, "explanation": None}
+
+# Test the VerdictCache without loading the model
+def test_lru_and_counters():
+    """Least recently used entries are evicted first and counted"""
+    cache = VerdictCache(max_size=2, ttl=60)
+    cache.put("https://a.com", BENIGN)
+    cache.put("https://b.com", BENIGN)
+    assert cache.get("HTTPS://A.COM") == BENIGN  # normalized key, refreshes a.com
+    cache.put("https://c.com", PHISHING)         # evicts b.com
+    assert cache.get("https://b.com") is None
+    assert cache.get("https://c.com") == PHISHING
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+    print(f"Stats: {stats}")
+
+def test_separate_ttls():
+    """Benign and malicious verdicts expire independently"""
+    cache = VerdictCache(benign_ttl=0.05, malicious_ttl=60)
+    cache.put("https://benign.com", BENIGN)
+    cache.put("https://phish.xyz", PHISHING)
+    time.sleep(0.1)
+    assert cache.get("https://benign.com") is None
+    assert cache.get("https://phish.xyz") == PHISHING
+    assert cache.expirations == 1
+    print("Benign verdict expired, malicious verdict kept")
+
+def test_clear():
+    """clear() (run after a model reload) drops every verdict"""
+    cache = VerdictCache(ttl=60)
+    cache.put("https://a.com", BENIGN)
+    cache.put("https://phish.xyz", PHISHING)
+    cache.clear()
+    assert cache.get("https://a.com") is None and cache.get("https://phish.xyz") is None
+    assert cache.invalidations == 1
+    print("Cache emptied")
+
+if __name__ == "__main__":
+    print("Testing VerdictCache...")
+    test_lru_and_counters()
+    print("-" * 50)
+    test_separate_ttls()
+    print("-" * 50)
+    test_clear()
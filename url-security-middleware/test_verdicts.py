@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from verdicts import VerdictDecoder, VERDICT_DTYPE, EXPLANATIONS, EXPLAIN_INVALID_URL
+
+CLASSES = ["benign", "defacement", "edge_case", "malware", "not_a_url", "phishing"]
+
+def reference_decode(row, invalid):
+    """The per-row decoding predict_url used before records"""
+    top = row.argsort()[-2:][::-1]
+    label = CLASSES[top[0]]
+    score = 0 if label == "benign" else 1 if label == "not_a_url" else max(0.1, round(float(row[top[0]]), 2))
+    explanation = EXPLANATIONS[EXPLAIN_INVALID_URL] if invalid else None
+    if label == "not_a_url":
+        explanation = "Input does not appear to be a URL."
+    elif label == "edge_case":
+        explanation = "Input is a rare/edge-case URL (e.g., IP, FTP, encoded, or partial)."
+    return {"prediction": label, "score": score, "result": 0 if label == "benign" else 1, "explanation": explanation}
+
+# Test the VerdictDecoder without loading the model
+def test_matches_reference():
+    """Vectorized decode gives the same dicts as the per-row code"""
+    rng = np.random.default_rng(0)
+    probs = rng.dirichlet(np.ones(len(CLASSES)), size=500).astype(np.float32)
+    invalid = rng.random(500) < 0.3
+    decoder = VerdictDecoder(np.array(CLASSES))
+    records = decoder.decode(probs, invalid_url=invalid)
+    assert records.dtype == VERDICT_DTYPE and len(records) == 500
+    for row, flag, record in zip(probs, invalid, records):
+        assert decoder.to_dict(record) == reference_decode(row, flag)
+        assert record["top_conf"][0] >= record["top_conf"][1]
+    print(f"500 rows match, {VERDICT_DTYPE.itemsize} bytes per record")
+
+def test_allowlisted_and_empty():
+    """Allowlisted records decode to a benign verdict; empty batches are fine"""
+    decoder = VerdictDecoder(CLASSES)
+    result = decoder.to_dict(decoder.allowlisted())
+    assert result == {"prediction": "benign", "score": 0, "result": 0, "explanation": "Trusted domain (allowlisted)."}
+    assert len(decoder.decode(np.zeros((0, len(CLASSES)), dtype=np.float32))) == 0
+    print(f"Allowlisted: {result}")
+
+if __name__ == "__main__":
+    print("Testing VerdictDecoder...")
+    test_matches_reference()
+    print("-" * 50)
+    test_allowlisted_and_empty()
@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """
 URL Security Checker - Standalone script for C integration
-This script can be called as a subprocess from C code
+This script can be called as a subprocess from C code, or run as a
+long-lived daemon that keeps the model loaded and answers requests over a
+Unix domain socket: --serve speaks the line-based KEY: value format,
+--serve-binary the length-prefixed protocol in binary_protocol.py.
+--stdin runs it as a co-process on a pipe instead: one URL (or JSON object
+with an id) per line in, one JSON line (or KEY: value block) per verdict out.
 """
 
 import sys
 import json
 import os
+import socketserver
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from predict_url import predict_url
+    from predict_url import predict_url, predict_batch, warmup, session, enable_shared_verdicts
+    from runtime_dir import runtime_dir, claim_socket_path
+    import binary_protocol as bp
     MALWARE_DETECTION_AVAILABLE = True
 except ImportError as e:
     MALWARE_DETECTION_AVAILABLE = False
@@ -22,34 +30,257 @@ except ImportError as e:
     print("SCORE: 0")
     sys.exit(1)
 
-def check_url(url):
-    """Check URL and return simple format result"""
+# Must match checker_socket_path() in proxy/UrlSecurity.c (a private 0700 directory, see runtime_dir.py)
+DEFAULT_SOCKET_PATH = os.path.join(runtime_dir(), "url_checker.sock")
+
+STDIN_MAX_BATCH = 256  # Buffered --stdin lines scored in one predict_batch call
+
+def format_result(url, result):
+    """Format a prediction as the KEY: value lines parsed by the proxy"""
+    lines = [
+        f"URL: {url}",
+        f"PREDICTION: {result['prediction']}",
+        f"SCORE: {result['score']}",
+        f"RESULT: {result['result']}",
+    ]
+    if result.get('explanation'):
+        lines.append(f"EXPLANATION: {result['explanation']}")
+    lines.append("SUCCESS: true")
+    return lines
+
+def format_error(url, error):
+    """Format a failed check; failures are reported as safe (RESULT: 0)"""
+    return [
+        f"URL: {url}",
+        f"ERROR: {str(error)}",
+        "RESULT: 0",
+        "SUCCESS: false",
+    ]
+
+def classify(url):
+    """Run the model on a URL and return (result_flag, output_lines)"""
     try:
         result = predict_url(url)
-        print(f"URL: {url}")
-        print(f"PREDICTION: {result['prediction']}")
-        print(f"SCORE: {result['score']}")
-        print(f"RESULT: {result['result']}")
-        if result.get('explanation'):
-            print(f"EXPLANATION: {result['explanation']}")
-        print("SUCCESS: true")
-        return result['result']
+        return result['result'], format_result(url, result)
     except Exception as e:
-        print(f"URL: {url}")
-        print(f"ERROR: {str(e)}")
-        print("RESULT: 0")
-        print("SUCCESS: false")
-        return 0
+        return 0, format_error(url, e)
+
+def parse_request(line):
+    """A --stdin line is a bare URL or a JSON object {"id": ..., "url": "..."}; returns (id, url)"""
+    if not line.startswith("{"):
+        return None, line
+    request = json.loads(line)
+    if not isinstance(request, dict) or not isinstance(request.get("url"), str):
+        raise ValueError('expected {"id": ..., "url": "..."}')
+    return request.get("id"), request["url"]
+
+def answer_lines(lines, text=False):
+    """Answer a batch of --stdin lines, in order, with one predict_batch call.
+
+    Each answer is a JSON line (the predict_url dict plus url, success and
+    the request id if one was given), or with text=True the KEY: value block
+    of --serve terminated by an empty line.
+    """
+    answers = [None] * len(lines)
+    checks = []
+    for i, line in enumerate(lines):
+        try:
+            request_id, url = parse_request(line)
+        except ValueError as e:
+            answers[i] = (None, line, e)
+            continue
+        checks.append((i, request_id, url))
+
+    try:
+        records = predict_batch([url for _, _, url in checks]) if checks else []
+        for (i, request_id, url), record in zip(checks, records):
+            answers[i] = (request_id, url, session.decoder.to_dict(record))
+    except Exception as e:
+        for i, request_id, url in checks:
+            answers[i] = (request_id, url, e)
+
+    out = []
+    for request_id, url, result in answers:
+        failed = isinstance(result, Exception)
+        if text:
+            lines = format_error(url, result) if failed else format_result(url, result)
+            if request_id is not None:
+                lines.insert(0, f"ID: {request_id}")
+            out.append("\n".join(lines) + "\n\n")
+            continue
+        if failed:
+            answer = {"url": url, "error": str(result), "result": 0, "success": False}
+        else:
+            answer = {"url": url, **result, "success": True}
+        if request_id is not None:
+            answer = {"id": request_id, **answer}
+        out.append(json.dumps(answer) + "\n")
+    return "".join(out)
+
+def serve_stdin(text=False):
+    """Answer lines from stdin until EOF, keeping the model loaded for the life of the pipe.
+
+    Whatever complete lines one read() returns are scored together, so a
+    writer that pipelines requests gets batching; output is flushed per batch.
+    """
+    # stdout carries the answers, so status messages go to stderr
+    print(warmup().startup_report(), file=sys.stderr, flush=True)
+    publish_verdicts()
+
+    fd = sys.stdin.fileno()
+    pending = b""
+    while True:
+        chunk = os.read(fd, 65536)
+        if chunk:
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+        else:
+            complete, pending = [pending], b""  # EOF: a last line may lack its newline
+        lines = [line.decode("utf-8", errors="replace").strip() for line in complete]
+        lines = [line for line in lines if line]
+        try:
+            for start in range(0, len(lines), STDIN_MAX_BATCH):
+                sys.stdout.write(answer_lines(lines[start:start + STDIN_MAX_BATCH], text))
+                sys.stdout.flush()
+        except BrokenPipeError:
+            break
+        if not chunk:
+            break
+
+def check_url(url):
+    """Check URL and return simple format result"""
+    result_value, lines = classify(url)
+    print("\n".join(lines))
+    return result_value
+
+class CheckerRequestHandler(socketserver.StreamRequestHandler):
+    """Answer newline-terminated URLs on one connection until the client hangs up.
+
+    Each response is the same KEY: value block printed by the one-shot mode,
+    terminated by an empty line.
+    """
+
+    def handle(self):
+        for raw_line in self.rfile:
+            url = raw_line.decode("utf-8", errors="replace").strip()
+            if not url:
+                continue
+            _, lines = classify(url)
+            try:
+                self.wfile.write(("\n".join(lines) + "\n\n").encode("utf-8"))
+            except (BrokenPipeError, ConnectionResetError):
+                break
+
+def answer_frames(frames):
+    """Build the binary responses for a list of request payloads, in request order.
+
+    All OP_CHECK requests that arrived together (e.g. pipelined by one
+    client) are scored in a single predict_batch call. Verdicts are matched
+    to frames by position, so repeated request ids each get their own answer.
+    """
+    checks = []
+    for payload in frames:
+        request_id, op = bp.HEADER.unpack_from(payload)
+        if op == bp.OP_CHECK:
+            checks.append((request_id, payload[bp.HEADER.size:].decode("utf-8", errors="replace")))
+
+    verdicts = []  # One per entry of checks, in frame order
+    if checks:
+        try:
+            records = predict_batch([url for _, url in checks])
+            for (request_id, _), record in zip(checks, records):
+                flags = bp.FLAG_MALICIOUS if record["result"] else 0
+                verdicts.append(bp.encode_verdict(
+                    request_id, int(record["class_id"]), flags, int(record["explanation"]), float(record["score"])))
+        except Exception as e:
+            print(f"ERROR: {e}", file=sys.stderr, flush=True)
+            verdicts = [bp.encode_verdict(request_id, -1, bp.FLAG_ERROR, 0, 0.0) for request_id, _ in checks]
+
+    responses = []
+    next_verdict = iter(verdicts)
+    for payload in frames:
+        request_id, op = bp.HEADER.unpack_from(payload)
+        if op == bp.OP_CHECK:
+            responses.append(next(next_verdict))
+        elif op == bp.OP_CLASSES:
+            responses.append(bp.encode_classes(request_id, session.load_labels().class_names))
+        else:
+            # Unknown opcode: reply with an error verdict so the client is not left waiting
+            responses.append(bp.encode_verdict(request_id, -1, bp.FLAG_ERROR, 0, 0.0))
+    return b"".join(responses)
+
+class BinaryRequestHandler(socketserver.BaseRequestHandler):
+    """Serve length-prefixed frames until the client hangs up or sends a malformed frame"""
+
+    def handle(self):
+        reader = bp.FrameReader()
+        while True:
+            try:
+                data = self.request.recv(65536)
+                if not data:
+                    break
+                frames = reader.feed(data)
+                if frames:
+                    self.request.sendall(answer_frames(frames))
+            except (bp.ProtocolError, BrokenPipeError, ConnectionResetError):
+                break
+
+def publish_verdicts():
+    """Let the proxy answer repeat URLs from shared memory without asking us"""
+    try:
+        table = enable_shared_verdicts()
+        if table is not None:
+            print(f"Publishing verdicts to {table.path}", file=sys.stderr, flush=True)
+    except (OSError, ValueError) as e:
+        print(f"Shared verdict table disabled: {e}", file=sys.stderr, flush=True)
+
+class CheckerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(socket_path=DEFAULT_SOCKET_PATH, handler=CheckerRequestHandler):
+    """Keep the model in memory and serve checks on a Unix domain socket"""
+    # Only our own stale socket is removed; anything else at the path is an error
+    claim_socket_path(socket_path)
+
+    # Load the model before accepting connections so no client waits on it
+    print(warmup().startup_report(), flush=True)
+    publish_verdicts()
+
+    server = CheckerServer(socket_path, handler)
+    print(f"URL checker listening on {socket_path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            claim_socket_path(socket_path)
+        except OSError:
+            pass
 
 def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+        serve(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SOCKET_PATH)
+        sys.exit(0)
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve-binary":
+        serve(sys.argv[2] if len(sys.argv) > 2 else bp.DEFAULT_BINARY_SOCKET_PATH, handler=BinaryRequestHandler)
+        sys.exit(0)
+    if len(sys.argv) >= 2 and sys.argv[1] == "--stdin":
+        serve_stdin(text=sys.argv[2:] == ["--text"])
+        sys.exit(0)
+
     if len(sys.argv) != 2:
         print("ERROR: Usage: python3 url_checker.py <url>")
+        print("       python3 url_checker.py --serve [socket_path]")
+        print("       python3 url_checker.py --serve-binary [socket_path]")
+        print("       python3 url_checker.py --stdin [--text]")
         print("RESULT: 0")
         sys.exit(1)
-    
+
     url = sys.argv[1]
     result_value = check_url(url)
-    
+
     # Exit with code 0 for safe URLs, 1 for malicious
     if result_value == 1:
         sys.exit(1)  # Malicious URL
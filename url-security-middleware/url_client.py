@@ -0,0 +1,250 @@
+# url_client.py
+"""
+Client library for the URL security REST API (main.py).
+
+    from url_client import URLCheckerClient
+
+    with URLCheckerClient("http://localhost:8000") as client:
+        verdict = client.check("https://example.com", timeout=0.5)
+        verdicts = client.check_many(urls)
+        verdict = await client.acheck(url)          # from asyncio code
+
+Verdicts are the /check-urls entries: url, status ("allowed", "blocked" or
+"invalid"), score, category and reasons.
+
+- One pooled keep-alive session is shared by every call.
+- Single checks made at about the same time, from any mix of threads and
+  coroutines, are coalesced into one /check-urls request; up to
+  ``pool_size`` of those requests are in flight at once.
+- Recent verdicts are answered from a small local cache.
+- Every call has a deadline (``timeout`` seconds, default ``client.timeout``)
+  covering queueing, retries after 429/503 and the HTTP round trip; when it
+  passes, DeadlineExceeded is raised.
+"""
+
+import asyncio
+import concurrent.futures
+import datetime
+import email.utils
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from inference_batcher import MicroBatcher
+from verdict_cache import VerdictCache
+
+DEFAULT_BASE_URL = os.environ.get("URL_CHECKER_API", "http://localhost:8000")
+
+MAX_BATCH_URLS = 100      # Must not exceed MAX_BATCH_URLS in main.py
+BATCH_WINDOW_MS = 2.0     # How long a single check waits for others to share its request
+CACHE_SIZE = 1024
+CACHE_TTL = 60.0          # Seconds; the service's own cache keeps verdicts longer
+MAX_RETRY_AFTER = 5.0     # Upper bound on a Retry-After we are willing to sleep
+
+
+def _retry_after_seconds(value) -> float:
+    """Seconds to wait for a Retry-After header: delta-seconds or an HTTP-date; 1 s if absent or unparsable"""
+    if value is None:
+        return 1.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 1.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)  # HTTP-dates are always GMT
+    return max(0.0, when.timestamp() - time.time())
+
+
+class URLCheckerError(Exception):
+    """The service answered with an error status"""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(f"HTTP {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's deadline passed before a verdict arrived"""
+
+
+class URLCheckerClient:
+    """Pooled, batching, caching client; safe to share between threads and coroutines"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout: float = 10.0, pool_size: int = 10,
+                 batch_window_ms: float = BATCH_WINDOW_MS, max_batch: int = MAX_BATCH_URLS,
+                 cache_size: int = CACHE_SIZE, cache_ttl: float = CACHE_TTL, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_batch = max(1, min(max_batch, MAX_BATCH_URLS))
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.cache = VerdictCache(max_size=cache_size, ttl=cache_ttl)
+        # Coalesced requests go out on their own threads, one per pooled connection
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="url-client")
+        self._batcher = MicroBatcher(self._check_batch, max_batch_size=self.max_batch,
+                                     max_wait_ms=batch_window_ms, name="url-client-batcher", executor=self._executor)
+        self._closed = False
+        self._lock = threading.Lock()
+
+        # Counters (approximate under concurrency)
+        self.requests = 0
+        self.retries = 0
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._batcher.close()
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 🧾 Cache entries carry "result" (0 = allowed) so VerdictCache can pick a TTL
+
+    def _cached(self, url):
+        entry = self.cache.get(url)
+        if entry is None:
+            return None
+        entry.pop("result")
+        return entry
+
+    def _remember(self, urls, verdicts):
+        # Keyed by the URL as asked; the service returns it normalised
+        for url, verdict in zip(urls, verdicts):
+            self.cache.put(url, dict(verdict, result=0 if verdict["status"] == "allowed" else 1))
+
+    def _deadline(self, timeout):
+        return time.monotonic() + (self.timeout if timeout is None else timeout)
+
+    def _request(self, method, path, deadline, **kwargs):
+        """One HTTP call, retried after 429/503 while the deadline allows"""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{method} {path} did not finish in time")
+            self.requests += 1
+            try:
+                response = self.session.request(method, self.base_url + path, timeout=remaining, **kwargs)
+            except requests.Timeout as e:
+                raise DeadlineExceeded(f"{method} {path} did not finish in time") from e
+            if response.status_code in (429, 503):
+                wait = min(_retry_after_seconds(response.headers.get("Retry-After")), MAX_RETRY_AFTER)
+                if time.monotonic() + wait < deadline:
+                    self.retries += 1
+                    time.sleep(wait)
+                    continue
+            if response.status_code >= 400:
+                try:
+                    detail = response.json().get("detail")
+                except ValueError:
+                    detail = response.text
+                raise URLCheckerError(response.status_code, detail)
+            return response
+
+    def _post_batch(self, urls, deadline):
+        response = self._request("POST", "/check-urls", deadline, json={"urls": urls})
+        verdicts = response.json()["results"]
+        self._remember(urls, verdicts)
+        return verdicts
+
+    def _check_batch(self, items):
+        """MicroBatcher callback: items are (url, deadline); one result (verdict or exception) per item"""
+        now = time.monotonic()
+        live = [(url, deadline) for url, deadline in items if deadline > now]
+        urls = list(dict.fromkeys(url for url, _ in live))
+        verdicts = {}
+        if urls:
+            # The request may run until the latest caller's deadline; earlier callers stop waiting on their own
+            verdicts = dict(zip(urls, self._post_batch(urls, max(deadline for _, deadline in live))))
+        return [verdicts.get(url) or DeadlineExceeded(f"Deadline passed before {url} was sent") for url, _ in items]
+
+    # 🔎 Sync API
+
+    def check(self, url: str, timeout: float = None) -> dict:
+        """Verdict for one URL; concurrent calls share /check-urls requests"""
+        verdict = self._cached(url)
+        if verdict is not None:
+            return verdict
+        deadline = self._deadline(timeout)
+        future = self._batcher.submit((url, deadline))
+        try:
+            result = future.result(max(0.0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            raise DeadlineExceeded(f"No verdict for {url} in time") from None
+        if isinstance(result, Exception):
+            raise result
+        return dict(result)
+
+    def check_many(self, urls, timeout: float = None) -> list:
+        """Verdicts for a list of URLs, in order; cache misses go out in /check-urls chunks"""
+        deadline = self._deadline(timeout)
+        verdicts = [self._cached(url) for url in urls]
+        missing = list(dict.fromkeys(url for url, verdict in zip(urls, verdicts) if verdict is None))
+        fetched = {}
+        for i in range(0, len(missing), self.max_batch):
+            chunk = missing[i:i + self.max_batch]
+            fetched.update(zip(chunk, self._post_batch(chunk, deadline)))
+        return [verdict if verdict is not None else dict(fetched[url]) for url, verdict in zip(urls, verdicts)]
+
+    def logs(self, limit: int = None, cursor: str = None, timeout: float = None, **filters):
+        """One page of /logs (filters: category, since, until, url, url_prefix); returns (rows, next_cursor)"""
+        params = {key: value for key, value in dict(filters, limit=limit, cursor=cursor).items() if value is not None}
+        response = self._request("GET", "/logs", self._deadline(timeout), params=params)
+        return response.json(), response.headers.get("X-Next-Cursor")
+
+    def iter_logs(self, page_size: int = None, timeout: float = None, **filters):
+        """Every matching log row, newest first, following X-Next-Cursor page by page"""
+        cursor = None
+        while True:
+            rows, cursor = self.logs(limit=page_size, cursor=cursor, timeout=timeout, **filters)
+            yield from rows
+            if not cursor:
+                return
+
+    # ⚡ asyncio API (requests run on the client's threads, so the event loop never blocks)
+
+    async def acheck(self, url: str, timeout: float = None) -> dict:
+        verdict = self._cached(url)
+        if verdict is not None:
+            return verdict
+        deadline = self._deadline(timeout)
+        future = asyncio.wrap_future(self._batcher.submit((url, deadline)))
+        try:
+            # Shielded: cancelling the batcher's future would break its set_result()
+            result = await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"No verdict for {url} in time") from None
+        if isinstance(result, Exception):
+            raise result
+        return dict(result)
+
+    async def acheck_many(self, urls, timeout: float = None) -> list:
+        """Like check_many, but every URL rides the coalescing batcher"""
+        return list(await asyncio.gather(*(self.acheck(url, timeout) for url in urls)))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "batches": self._batcher.batches,
+            "batched_urls": self._batcher.items,
+            "cache": self.cache.stats(),
+        }
@@ -1,25 +1,34 @@
 # url_validator.py
-from predict_url import predict_url
-
-def validate_url(url: str):
-    # Convert HttpUrl object to string if needed
-    if hasattr(url, '__str__'):
-        url = str(url)
-    
-    prediction, score = predict_url(url)
+import asyncio
+from predict_url import predict_url, predict_urls, submit_batch, session
 
+def _verdict(url: str, result: dict):
+    """Map a predict_url result onto the API's category/reasons format"""
+    prediction = result["prediction"]
     category = "SAFE" if prediction == "benign" else "DANGEROUS"
     reasons = [f"Predicted as {prediction.upper()} by CNN-LSTM model"]
 
-    # Convert numpy types to Python native types for JSON serialization
-    if hasattr(score, 'item'):
-        score = float(score.item())
-    else:
-        score = float(score)
-
     return {
         "url": url,
-        "score": round(score, 2),
+        "score": round(float(result["score"]), 2),
         "category": category,
         "reasons": reasons
     }
+
+def validate_url(url: str):
+    # Convert HttpUrl object to string if needed
+    if hasattr(url, '__str__'):
+        url = str(url)
+
+    return _verdict(url, predict_url(url))
+
+def validate_urls(urls):
+    """validate_url for a list of URLs, scored in one batched forward pass; results are in input order"""
+    urls = [str(url) for url in urls]
+    return [_verdict(url, result) for url, result in zip(urls, predict_urls(urls))]
+
+async def validate_urls_async(urls):
+    """validate_urls for async callers: awaits the micro-batcher instead of blocking a thread"""
+    urls = [str(url) for url in urls]
+    records = await asyncio.wrap_future(submit_batch(urls))
+    return [_verdict(url, session.decoder.to_dict(record)) for url, record in zip(urls, records)]
@@ -0,0 +1,91 @@
+# verdict_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_url(url: str) -> str:
+    """Cache key for a URL.
+
+    The tokenizer lowercases its input and the allowlist compares lowercased
+    hosts, so URLs differing only in case always get the same verdict.
+    """
+    return url.lower()
+
+
+class VerdictCache:
+    """Bounded LRU cache of predict_url results with per-verdict TTLs.
+
+    Benign verdicts (result == 0) live for ``benign_ttl`` seconds and
+    everything else for ``malicious_ttl``; both default to ``ttl``. The
+    owner calls ``clear()`` when the model behind the verdicts is replaced
+    (predict_url does so once ModelSession has reloaded a retrained model).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0, benign_ttl: float = None, malicious_ttl: float = None):
+        self.max_size = max_size
+        self.benign_ttl = ttl if benign_ttl is None else benign_ttl
+        self.malicious_ttl = ttl if malicious_ttl is None else malicious_ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, url: str):
+        """Return a copy of the cached verdict (dict or VERDICT_DTYPE record) for url, or None"""
+        key = normalize_url(url)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return result.copy()
+
+    def put(self, url: str, result):
+        """Cache a verdict; anything indexable by "result" (0 = benign) works"""
+        ttl = self.benign_ttl if result["result"] == 0 else self.malicious_ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        key = normalize_url(url)
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (expires_at, result.copy())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (e.g. after the model was reloaded)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
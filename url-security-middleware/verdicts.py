@@ -0,0 +1,105 @@
+# verdicts.py
+
+import numpy as np
+
+TOP_K = 2  # Classes kept per URL (top-1 decides, top-2 is for explanations/debugging)
+
+# One fixed-width record per URL (17 bytes) instead of a dict
+VERDICT_DTYPE = np.dtype([
+    ("class_id", np.int8),        # index into class_names
+    ("score", np.float32),        # 0 benign, 1 not_a_url, else max(0.1, top-1 confidence)
+    ("result", np.uint8),         # 0 benign, 1 anything else
+    ("explanation", np.uint8),    # index into EXPLANATIONS
+    ("top_ids", np.int8, (TOP_K,)),
+    ("top_conf", np.float32, (TOP_K,)),
+])
+
+EXPLAIN_NONE = 0
+EXPLAIN_ALLOWLISTED = 1
+EXPLAIN_NOT_A_URL = 2
+EXPLAIN_EDGE_CASE = 3
+EXPLAIN_INVALID_URL = 4
+
+EXPLANATIONS = (
+    None,
+    "Trusted domain (allowlisted).",
+    "Input does not appear to be a URL.",
+    "Input is a rare/edge-case URL (e.g., IP, FTP, encoded, or partial).",
+    "⚠️ Input is not a valid URL. Prediction may not be meaningful.",
+)
+
+
+class VerdictDecoder:
+    """Turn a [batch, n_classes] probability matrix into VERDICT_DTYPE records.
+
+    Class names are resolved once into a plain array, and top-k selection is a
+    single argpartition over the whole batch.
+    """
+
+    def __init__(self, class_names, k: int = TOP_K):
+        self.class_names = np.asarray([str(name) for name in class_names], dtype=object)
+        self.k = min(k, len(self.class_names))
+        names = list(self.class_names)
+        self.benign_id = names.index("benign") if "benign" in names else -1
+        self.not_a_url_id = names.index("not_a_url") if "not_a_url" in names else -1
+        self.edge_case_id = names.index("edge_case") if "edge_case" in names else -1
+
+    def allowlisted(self):
+        """Record for a URL that skipped the model because its host is trusted"""
+        record = np.zeros(1, dtype=VERDICT_DTYPE)[0]
+        record["class_id"] = self.benign_id
+        record["top_ids"] = -1
+        record["top_ids"][0] = self.benign_id
+        record["explanation"] = EXPLAIN_ALLOWLISTED
+        return record
+
+    def decode(self, probs: np.ndarray, invalid_url: np.ndarray = None) -> np.ndarray:
+        """Decode every row of probs; invalid_url flags inputs without scheme/host"""
+        n = len(probs)
+        records = np.zeros(n, dtype=VERDICT_DTYPE)
+        if n == 0:
+            return records
+
+        k = self.k
+        top = np.argpartition(probs, -k, axis=1)[:, -k:]
+        conf = np.take_along_axis(probs, top, axis=1)
+        order = np.argsort(-conf, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        conf = np.take_along_axis(conf, order, axis=1)
+
+        class_id = top[:, 0]
+        benign = class_id == self.benign_id
+        not_a_url = class_id == self.not_a_url_id
+
+        score = np.maximum(0.1, np.round(conf[:, 0], 2))
+        score[benign] = 0
+        score[not_a_url] = 1
+
+        # Later assignments win: not_a_url > edge_case > invalid-URL warning
+        explanation = np.zeros(n, dtype=np.uint8)
+        if invalid_url is not None:
+            explanation[np.asarray(invalid_url, dtype=bool)] = EXPLAIN_INVALID_URL
+        explanation[class_id == self.edge_case_id] = EXPLAIN_EDGE_CASE
+        explanation[not_a_url] = EXPLAIN_NOT_A_URL
+
+        records["class_id"] = class_id
+        records["score"] = score
+        records["result"] = ~benign
+        records["explanation"] = explanation
+        records["top_ids"][:, :k] = top
+        records["top_conf"][:, :k] = conf
+        return records
+
+    def to_dict(self, record) -> dict:
+        """The predict_url result dict for one record"""
+        class_id = int(record["class_id"])
+        if class_id in (self.benign_id, self.not_a_url_id):
+            score = int(record["score"])
+        else:
+            score = round(float(record["score"]), 2)
+        return {
+            "prediction": self.class_names[class_id],
+            "score": score,
+            "result": int(record["result"]),
+            "explanation": EXPLANATIONS[int(record["explanation"])],
+        }